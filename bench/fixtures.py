@@ -0,0 +1,90 @@
+import os
+import subprocess
+
+# Synthetic DVD title sets made from ffmpeg's lavfi test sources, so the
+# benchmark doesn't depend on anyone's private disc rips. Every case is laid
+# out like a real disc: <case>/VIDEO_TS/VTS_01_1.VOB (+ _2, _3 when split).
+
+VOB_BITRATE = "6000k"   # Typical DVD video rate
+SECTOR = 2048           # VOBs are split on sector boundaries
+
+# name -> (lavfi video source, extra filter, encode flags)
+CASES = {
+    # Native interlaced video camera footage, top field first
+    "interlaced": (
+        "testsrc2=size=720x480:rate=30000/1001", None,
+        ["-flags", "+ilme+ildct", "-top", "1"],
+    ),
+    # 23.976 film telecined 3:2 to 29.97 (what most movie DVDs carry)
+    "telecined": (
+        "testsrc2=size=720x480:rate=24000/1001", "telecine=first_field=top:pattern=23",
+        ["-flags", "+ilme+ildct", "-top", "1"],
+    ),
+    # 2.35:1 picture with black bars top and bottom
+    "letterboxed": (
+        "testsrc2=size=720x306:rate=30000/1001", "pad=720:480:0:87:black",
+        ["-flags", "+ilme+ildct", "-top", "1"],
+    ),
+    # Long enough to be split into several 1 GB VOBs like a real disc
+    "multi_vob": (
+        "testsrc2=size=720x480:rate=30000/1001", None,
+        ["-flags", "+ilme+ildct", "-top", "1"],
+    ),
+}
+
+
+def split_duration(split_mb):
+    """Seconds of DVD-rate video needed to spill over into a third VOB."""
+    bits_per_second = int(VOB_BITRATE.rstrip("k")) * 1000 + 448000 # + AC3 audio
+    return int(split_mb * 1024 * 1024 * 2.2 * 8 / bits_per_second) + 1
+
+
+def build_fixture_cmd(case, out_file, duration):
+    source, extra_filter, flags = CASES[case]
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"{source}:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:duration={duration}",
+        "-map", "0:v", "-map", "1:a",
+    ]
+    if extra_filter: cmd += ["-vf", extra_filter]
+    cmd += [
+        "-target", "ntsc-dvd", "-b:v", VOB_BITRATE, *flags,
+        "-ac", "2", "-c:a", "ac3", "-b:a", "448k",
+        "-f", "vob", out_file
+    ]
+    return cmd
+
+
+def split_vob(big_file, folder, split_mb):
+    """Cuts one long program stream into VTS_01_1.VOB, VTS_01_2.VOB, ...
+    on sector boundaries, the same way DVD authoring tools do."""
+    chunk = (split_mb * 1024 * 1024) // SECTOR * SECTOR
+    part = 1
+    with open(big_file, "rb") as src:
+        while True:
+            data = src.read(chunk)
+            if not data: break
+            with open(os.path.join(folder, f"VTS_01_{part}.VOB"), "wb") as dst:
+                dst.write(data)
+            part += 1
+    os.remove(big_file)
+    return part - 1
+
+
+def make_fixtures(root, duration=60, split_mb=1024, cases=None):
+    """Generates (or reuses) every case under root. Returns {case: VIDEO_TS dir}."""
+    made = {}
+    for case in cases or CASES:
+        folder = os.path.join(root, case, "VIDEO_TS")
+        made[case] = folder
+        if os.path.exists(os.path.join(folder, "VTS_01_1.VOB")): continue # Already built
+
+        os.makedirs(folder, exist_ok=True)
+        if case == "multi_vob":
+            big_file = os.path.join(folder, "full.vob")
+            subprocess.run(build_fixture_cmd(case, big_file, split_duration(split_mb)), check=True)
+            split_vob(big_file, folder, split_mb)
+        else:
+            subprocess.run(build_fixture_cmd(case, os.path.join(folder, "VTS_01_1.VOB"), duration), check=True)
+    return made
@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# Run from the repo root:  python -m bench.run --out results.json
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.engine import BatchEngine
+from bench.fixtures import CASES, make_fixtures
+
+# Each configuration is a set of BatchEngine keyword arguments
+CONFIGS = {
+    "x264-medium": {"crf": "20", "preset": "medium"},
+    "x264-fast": {"crf": "20", "preset": "fast"},
+    "x264-medium-serial": {"crf": "20", "preset": "medium", "max_jobs": 1, "chunked": False},
+    "x264-medium-yadif": {"crf": "20", "preset": "medium", "auto_deinterlace": False},
+    "x264-medium-crop": {"crf": "20", "preset": "medium", "auto_crop": True},
+    # Master + shareable copy from one decode; compare against two x264-medium runs
+    "x264-medium-2renditions": {"crf": "18", "preset": "medium", "extra_crfs": ["23"]},
+    # Sample encodes pick crf/preset; the report shows what the search costs
+    "x264-autotune-ssim": {"crf": "20", "preset": "medium", "tune_target": {"min_ssim": 0.97}},
+    "remux": {"crf": "20", "preset": "medium", "mode": "remux"},
+}
+
+
+def probe_output(path):
+    """Frame count, duration and bitrate of a finished output."""
+    cmd = [
+        "ffprobe", "-v", "error", "-select_streams", "v:0", "-count_packets",
+        "-show_entries", "stream=nb_read_packets:format=duration,bit_rate",
+        "-of", "json", path
+    ]
+    raw = json.loads(subprocess.run(cmd, capture_output=True, text=True, check=True).stdout)
+    return {
+        "frames": int(raw["streams"][0].get("nb_read_packets", 0)),
+        "duration": float(raw["format"].get("duration", 0)),
+        "bitrate": int(raw["format"].get("bit_rate", 0)),
+    }
+
+
+def bench_one(config_name, case, source, work_root):
+    """Runs one configuration over one fixture with empty caches,
+    so the journal and probe cache can't skip any of the work."""
+    settings = dict(CONFIGS[config_name])
+    output_dir = tempfile.mkdtemp(prefix=f"{case}-{config_name}-", dir=work_root)
+    cache_dir = os.path.join(output_dir, ".cache")
+    os.makedirs(cache_dir)
+
+    engine = BatchEngine(source, output_dir, settings.pop("crf"), settings.pop("preset"),
+                         cache_dir=cache_dir, min_title_seconds=0, **settings)
+
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.perf_counter()
+    ok = engine.run()
+    wall = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    result = {
+        "config": config_name,
+        "case": case,
+        "ok": ok,
+        "wall_seconds": round(wall, 3),
+        "cpu_user_seconds": round(after.ru_utime - before.ru_utime, 3),
+        "cpu_sys_seconds": round(after.ru_stime - before.ru_stime, 3),
+    }
+
+    # Every rendition is reported; the headline numbers are the primary's
+    # (the plain title name), whatever order the directory lists them in
+    (_, primary_crf), *extra = engine.renditions()
+    renditions = []
+    for name in sorted(os.listdir(output_dir)):
+        stem, ext = os.path.splitext(name)
+        if ext not in (".mp4", ".mkv"): continue
+        suffix, crf = next(((s, c) for s, c in extra if stem.endswith(s)), ("", primary_crf))
+        stats = probe_output(os.path.join(output_dir, name))
+        renditions.append(dict(stats, file=name, crf=crf, primary=not suffix))
+
+    primary = next((r for r in renditions if r["primary"]), None)
+    if primary:
+        result.update({
+            "frames": primary["frames"],
+            "fps": round(primary["frames"] / wall, 2) if wall else 0.0,
+            "output_bitrate": primary["bitrate"],
+            "speed": round(primary["duration"] / wall, 2) if wall else 0.0,
+        })
+    result["renditions"] = renditions
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    return result
+
+
+def environment():
+    def first_line(cmd):
+        try:
+            return subprocess.run(cmd, capture_output=True, text=True).stdout.splitlines()[0]
+        except (OSError, IndexError):
+            return None
+
+    return {
+        "commit": first_line(["git", "rev-parse", "HEAD"]),
+        "host": platform.node(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "ffmpeg": first_line(["ffmpeg", "-version"]),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="VobReel encode benchmark")
+    parser.add_argument("--fixtures", default=os.path.join(tempfile.gettempdir(), "vobreel_bench"),
+                        help="Where synthetic VOB sets are generated (reused between runs)")
+    parser.add_argument("--config", action="append", choices=sorted(CONFIGS),
+                        help="Configuration(s) to run (default: all)")
+    parser.add_argument("--case", action="append", choices=sorted(CASES),
+                        help="Fixture(s) to run (default: all)")
+    parser.add_argument("--duration", type=int, default=60, help="Seconds per single-VOB fixture")
+    parser.add_argument("--split-mb", type=int, default=1024, help="VOB split size for the multi_vob case")
+    parser.add_argument("--out", help="Write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    cases = args.case or list(CASES)
+    fixtures = make_fixtures(args.fixtures, args.duration, args.split_mb, cases)
+
+    work_root = tempfile.mkdtemp(prefix="vobreel_bench_out_")
+    results = []
+    try:
+        for config_name in args.config or list(CONFIGS):
+            for case in cases:
+                print(f"⏱️ {config_name} / {case}", file=sys.stderr)
+                results.append(bench_one(config_name, case, fixtures[case], work_root))
+    finally:
+        shutil.rmtree(work_root, ignore_errors=True)
+
+    report = json.dumps({"environment": environment(), "results": results}, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(report)
+    else:
+        print(report)
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
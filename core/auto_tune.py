@@ -0,0 +1,180 @@
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+
+from core.sampling import sample_starts
+
+# Short windows spread over the title, with the same sampling as idet/cropdetect
+SAMPLE_POINTS = 3
+SAMPLE_SECONDS = 8
+
+# Candidates, fastest preset first (the batch tab's speed choices).
+# CRF is searched within this range for each preset.
+PRESETS = ("fast", "medium", "slow")
+CRF_MIN = 16
+CRF_MAX = 28
+
+AUDIO_BITRATE = 192000 # What the full encode adds on top of the video
+
+SSIM_ALL = re.compile(r"SSIM .*All:\s*([\d.]+)")
+PSNR_AVG = re.compile(r"PSNR .*average:\s*([\d.]+|inf)")
+
+
+def _run(cmd):
+    return subprocess.run(cmd, capture_output=True, text=True, check=True)
+
+
+def extract_reference(source, start, picture, ref_file):
+    """Decodes and filters one window once, losslessly, so every candidate
+    encode and quality measurement reads the same frames without touching
+    the source again."""
+    _run([
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-ss", f"{start:.3f}", "-i", source, "-t", str(SAMPLE_SECONDS),
+        "-map", "0:v:0", "-an", "-sn",
+        "-vf", ",".join(f for f in (picture, "format=yuv420p") if f),
+        "-c:v", "ffv1", ref_file
+    ])
+
+
+def encode_candidate(ref_file, crf, preset, out_file):
+    _run([
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-i", ref_file,
+        "-c:v", "libx264", "-crf", str(crf), "-preset", preset, out_file
+    ])
+    return os.path.getsize(out_file)
+
+
+def measure(ref_file, enc_file):
+    """(SSIM, PSNR) of an encode against its reference, via ffmpeg's filters."""
+    result = _run([
+        "ffmpeg", "-hide_banner", "-nostats", "-loglevel", "info",
+        "-i", enc_file, "-i", ref_file,
+        "-lavfi", "[0:v]split[e1][e2];[1:v]split[r1][r2];[e1][r1]ssim;[e2][r2]psnr",
+        "-f", "null", "-"
+    ])
+    ssim = SSIM_ALL.search(result.stderr)
+    psnr = PSNR_AVG.search(result.stderr)
+    return (float(ssim.group(1)) if ssim else 0.0,
+            float(psnr.group(1)) if psnr and psnr.group(1) != "inf" else 99.0)
+
+
+class SampleSet:
+    """Lossless reference windows of one title plus a memo of candidate results."""
+
+    def __init__(self, source, duration, picture, work_dir):
+        self.duration = duration
+        self.work_dir = work_dir
+        self.refs = []
+        for i, start in enumerate(sample_starts(duration, SAMPLE_POINTS, SAMPLE_SECONDS)):
+            ref_file = os.path.join(work_dir, f"ref_{i}.mkv")
+            extract_reference(source, start, picture, ref_file)
+            self.refs.append(ref_file)
+        self.results = {}
+
+    def try_settings(self, crf, preset):
+        """Predicted full-title size in bytes plus worst-window SSIM/PSNR."""
+        key = (crf, preset)
+        if key in self.results: return self.results[key]
+
+        size, ssims, psnrs = 0, [], []
+        for i, ref_file in enumerate(self.refs):
+            enc_file = os.path.join(self.work_dir, f"enc_{i}.mkv")
+            size += encode_candidate(ref_file, crf, preset, enc_file)
+            ssim, psnr = measure(ref_file, enc_file)
+            ssims.append(ssim)
+            psnrs.append(psnr)
+
+        sampled = min(SAMPLE_SECONDS * len(self.refs), self.duration) or SAMPLE_SECONDS
+        predicted = size / sampled * self.duration + AUDIO_BITRATE / 8 * self.duration
+        # The weakest window decides: one soft scene is what people notice
+        result = {"crf": crf, "preset": preset, "size": int(predicted),
+                  "ssim": min(ssims), "psnr": min(psnrs)}
+        self.results[key] = result
+        return result
+
+
+def meets_quality(result, target):
+    if target.get("min_ssim") and result["ssim"] < target["min_ssim"]: return False
+    if target.get("min_psnr") and result["psnr"] < target["min_psnr"]: return False
+    return True
+
+
+def meets_size(result, target, duration):
+    limit = target.get("max_mb_per_hour")
+    return not limit or result["size"] <= limit * 1e6 * duration / 3600
+
+
+def shortfall(result, target, duration):
+    """How far a result misses the target, as a fraction of each limit
+    (SSIM/PSNR below the floor, size over the cap), summed. 0 = meets it."""
+    miss = 0.0
+    if target.get("min_ssim"): miss += max(0.0, target["min_ssim"] - result["ssim"]) / target["min_ssim"]
+    if target.get("min_psnr"): miss += max(0.0, target["min_psnr"] - result["psnr"]) / target["min_psnr"]
+    limit = target.get("max_mb_per_hour")
+    if limit and duration:
+        allowed = limit * 1e6 * duration / 3600
+        miss += max(0.0, result["size"] - allowed) / allowed
+    return miss
+
+
+def highest_passing(lo, hi, ok):
+    """Binary search: the highest crf in [lo, hi] with ok(crf), for tests
+    that pass below some point (quality). None if not even lo passes."""
+    best = None
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        if ok(mid):
+            best, lo = mid, mid + 1
+        else:
+            hi = mid - 1
+    return best
+
+
+def lowest_passing(lo, hi, ok):
+    """The mirror image, for tests that pass above some point (size)."""
+    best = None
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        if ok(mid):
+            best, hi = mid, mid - 1
+        else:
+            lo = mid + 1
+    return best
+
+
+def tune(source, duration, picture, target, on_log=None):
+    """Picks the fastest preset, and a CRF for it, that meets target:
+    {"min_ssim": ..., "min_psnr": ..., "max_mb_per_hour": ...} (any of them).
+
+    With a quality floor, each preset gets the highest CRF (smallest file)
+    that still meets it; with only a size cap, the lowest CRF that fits.
+    The first preset whose pick satisfies everything wins. Returns the
+    chosen result dict, or the closest miss with "met": False.
+    """
+    work_dir = tempfile.mkdtemp(prefix="vobreel_tune_")
+    try:
+        samples = SampleSet(source, duration, picture, work_dir)
+        fallback = None
+        for preset in PRESETS:
+            if target.get("min_ssim") or target.get("min_psnr"):
+                crf = highest_passing(CRF_MIN, CRF_MAX,
+                                      lambda c: meets_quality(samples.try_settings(c, preset), target))
+                if crf is None: crf = CRF_MIN
+            else:
+                crf = lowest_passing(CRF_MIN, CRF_MAX,
+                                     lambda c: meets_size(samples.try_settings(c, preset), target, duration))
+                if crf is None: crf = CRF_MAX
+
+            result = samples.try_settings(crf, preset)
+            if on_log: on_log(f"{preset} CRF {crf}: ~{result['size'] / 1e6:.0f} MB, "
+                              f"SSIM {result['ssim']:.4f}, PSNR {result['psnr']:.1f} dB")
+            if meets_quality(result, target) and meets_size(result, target, duration):
+                return dict(result, met=True)
+            if fallback is None or shortfall(result, target, duration) < shortfall(fallback, target, duration):
+                fallback = result
+        return dict(fallback, met=False)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
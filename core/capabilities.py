@@ -0,0 +1,141 @@
+import json
+import os
+import shutil
+import subprocess
+import time
+
+CACHE_NAME = "capabilities.json"
+
+# What VobReel makes use of. libx264 is needed to encode at all; these
+# others fall back to something simpler when a build lacks them
+WANTED_ENCODERS = ("libx264", "aac", "flac")
+WANTED_FILTERS = ("bwdif", "yadif", "idet", "cropdetect", "fieldmatch", "decimate", "ssim", "psnr")
+FALLBACKS = {
+    "bwdif": "deinterlacing with yadif",
+    "idet": "deinterlacing every title",
+    "fieldmatch": "deinterlacing telecined titles",
+    "decimate": "deinterlacing telecined titles",
+    "cropdetect": "no auto-crop",
+    "ssim": "no auto-tune",
+    "psnr": "no auto-tune",
+}
+
+# Calibration: a few seconds of DVD-sized test pattern through x264 medium
+CALIBRATION_SECONDS = 5
+CALIBRATION_FPS = 30000 / 1001
+
+
+def _run(cmd, timeout=30):
+    return subprocess.run(cmd, capture_output=True, text=True, check=True, timeout=timeout)
+
+
+def binary_key(path):
+    """path|mtime|size: changes whenever ffmpeg is upgraded or swapped out."""
+    st = os.stat(path)
+    return f"{os.path.realpath(path)}|{st.st_mtime_ns}|{st.st_size}"
+
+
+def _names(listing):
+    """Second column of `ffmpeg -encoders` / `-filters` rows ('V..... libx264 ...')."""
+    names = set()
+    for line in listing.splitlines():
+        parts = line.split()
+        if len(parts) >= 2: names.add(parts[1])
+    return names
+
+
+def calibrate(ffmpeg):
+    """Encode speed in fps (and x realtime) of x264 medium on 720x480, all threads."""
+    frames = int(CALIBRATION_SECONDS * CALIBRATION_FPS)
+    start = time.perf_counter()
+    _run([
+        ffmpeg, "-hide_banner", "-nostats", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size=720x480:rate=30000/1001:duration={CALIBRATION_SECONDS}",
+        "-c:v", "libx264", "-preset", "medium", "-crf", "20", "-f", "null", "-"
+    ], timeout=300)
+    elapsed = time.perf_counter() - start
+    fps = frames / elapsed if elapsed > 0 else 0.0
+    return {"fps": round(fps, 1), "speed": round(fps / CALIBRATION_FPS, 2), "cpus": os.cpu_count()}
+
+
+def probe(ffmpeg, with_calibration=True):
+    """Version, wanted encoders/filters and (optionally) encode speed of an ffmpeg binary."""
+    caps = {"ffmpeg": ffmpeg, "ffprobe": shutil.which("ffprobe"), "key": binary_key(ffmpeg),
+            "version": None, "features": {}, "calibration": None, "errors": []}
+    try:
+        caps["version"] = _run([ffmpeg, "-hide_banner", "-version"]).stdout.splitlines()[0]
+    except (OSError, IndexError, subprocess.SubprocessError) as e:
+        caps["errors"].append(f"version: {e}")
+
+    for flag, wanted in (("-encoders", WANTED_ENCODERS), ("-filters", WANTED_FILTERS)):
+        try:
+            available = _names(_run([ffmpeg, "-hide_banner", flag]).stdout)
+        except (OSError, subprocess.SubprocessError) as e:
+            # Unknown rather than missing: supports() treats these as there
+            caps["errors"].append(f"{flag}: {e}")
+            continue
+        for name in wanted: caps["features"][name] = name in available
+
+    if with_calibration and caps["features"].get("libx264", True):
+        try:
+            caps["calibration"] = calibrate(ffmpeg)
+        except (OSError, subprocess.SubprocessError) as e:
+            caps["errors"].append(f"calibration: {e}")
+    return caps
+
+
+def load_capabilities(cache_dir=None, refresh=False, with_calibration=False):
+    """What the ffmpeg on PATH can do, from <cache_dir>/capabilities.json
+    while the binary's path and mtime still match, else probed afresh.
+
+    with_calibration also wants the encode speed (a few seconds); a
+    cached entry without one is probed again. Returns a dict with
+    "ffmpeg" None when ffmpeg isn't installed.
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        return {"ffmpeg": None, "ffprobe": shutil.which("ffprobe"), "version": None,
+                "features": {}, "calibration": None, "errors": []}
+
+    cache_file = os.path.join(cache_dir, CACHE_NAME) if cache_dir else None
+    if cache_file and not refresh:
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("key") == binary_key(ffmpeg) and (cached.get("calibration") or not with_calibration):
+                cached["ffprobe"] = shutil.which("ffprobe") # Cheap, and may have come or gone
+                return cached
+        except (OSError, ValueError):
+            pass
+
+    caps = probe(ffmpeg, with_calibration)
+    if cache_file:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_file, "w", encoding="utf-8") as f:
+                json.dump(caps, f, indent=4)
+        except OSError:
+            pass
+    return caps
+
+
+def supports(caps, name):
+    """True if ffmpeg has this encoder/filter, or if it couldn't be told."""
+    if not caps.get("ffmpeg"): return False
+    return caps["features"].get(name, True)
+
+
+def describe(caps):
+    """Report lines for the diagnostics tab and `vobreel check`."""
+    if not caps.get("ffmpeg"): return ["❌ ffmpeg not found in PATH"]
+    lines = [f"✅ {caps['version'] or 'ffmpeg (version unknown)'}", f"   {caps['ffmpeg']}"]
+    lines.append(f"✅ ffprobe: {caps['ffprobe']}" if caps.get("ffprobe") else "❌ ffprobe not found in PATH")
+    for name in WANTED_ENCODERS + WANTED_FILTERS:
+        if name in caps["features"]:
+            lines.append(f"{'✅' if caps['features'][name] else '❌'} {name}")
+    calibration = caps.get("calibration")
+    if calibration:
+        lines.append(f"⏱️ x264 medium, 720x480: {calibration['fps']} fps ({calibration['speed']}x realtime) "
+                     f"on {calibration['cpus']} CPU(s)")
+    for error in caps.get("errors", []): lines.append(f"⚠️ {error}")
+    return lines
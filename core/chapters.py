@@ -0,0 +1,58 @@
+import os
+
+# Menus and fades leave sub-second chapters behind (often a last one that is
+# just a black frame); markers closer together than this are dropped
+MIN_CHAPTER_SECONDS = 1.0
+
+
+def chapter_spans(starts, duration):
+    """Turns chapter start times into (start, end) spans covering the title.
+    Returns [] when there's nothing worth marking (one chapter, or no
+    duration to close the last one off with)."""
+    if not duration: return []
+    points = [0.0]
+    for t in sorted(starts):
+        if t >= duration - MIN_CHAPTER_SECONDS: break
+        if t - points[-1] >= MIN_CHAPTER_SECONDS: points.append(t)
+    if len(points) < 2: return []
+    return list(zip(points, points[1:] + [duration]))
+
+
+def write_ffmetadata(spans, path):
+    """Chapter list in ffmpeg's metadata format, for -map_chapters."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(";FFMETADATA1\n")
+        for number, (start, end) in enumerate(spans, 1):
+            f.write("[CHAPTER]\nTIMEBASE=1/1000\n")
+            f.write(f"START={int(start * 1000)}\nEND={int(end * 1000)}\ntitle=Chapter {number}\n")
+
+
+def keyframe_times(spans, start=0.0, end=None):
+    """Chapter starts that fall inside [start, end), relative to start, for
+    x264's -force_key_frames. Every chapter then begins on a keyframe, so
+    players seek straight to it and the clips cut cleanly."""
+    return [t - start for t, _ in spans[1:] if t > start and (end is None or t < end)]
+
+
+def force_keyframes_args(times):
+    if not times: return []
+    return ["-force_key_frames", ",".join(f"{t:.3f}" for t in times)]
+
+
+def build_clip_cmd(source, spans, clip_dir, stem, container="mp4"):
+    """Cuts a finished output into one file per chapter with the segment
+    muxer. Pure stream copy: chapter starts are keyframes already."""
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-nostats", "-y",
+        "-i", source,
+        "-map", "0", "-map_chapters", "-1", "-c", "copy",
+        "-f", "segment",
+        "-segment_times", ",".join(f"{start:.3f}" for start, _ in spans[1:]),
+        "-segment_start_number", "1",
+        "-reset_timestamps", "1",
+    ]
+    if container == "mp4":
+        cmd += ["-segment_format", "mp4", "-segment_format_options", "movflags=+faststart"]
+    else:
+        cmd += ["-segment_format", "matroska"]
+    return cmd + [os.path.join(clip_dir, f"{stem}_ch%02d.{container}")]
@@ -0,0 +1,146 @@
+import os
+import subprocess
+
+from core.probe import FULL_PROBE_SIZE, QUICK_PROBE_SIZE
+from core.chapters import force_keyframes_args
+
+# Don't bother splitting anything into pieces shorter than this.
+# Each segment pays for its own ffmpeg start-up and x264 lookahead.
+MIN_SEGMENT_SECONDS = 120
+
+# Extra video decoded either side of a cut so yadif has the neighbouring
+# fields it needs. The padding is trimmed off again after deinterlacing.
+EDGE_PAD_SECONDS = 1.0
+
+# Keyframes come in presentation order, so one earlier than the last by
+# more than this means the timestamps restarted (new cell or VOB)
+PTS_RESET_SECONDS = 0.5
+
+
+def parse_keyframes(lines):
+    """Keyframe times (seconds from the first packet) and the duration,
+    from ffprobe's 'pts_time,flags' packet lines. Keyframes are None if
+    the timestamps restart part way: -ss can't seek such a title
+    reliably, so it has to be encoded in one piece."""
+    first = None
+    last = 0.0
+    keyframes = []
+    for line in lines:
+        fields = line.strip().split(",")
+        if len(fields) < 2 or fields[0] in ("", "N/A"): continue
+        pts = float(fields[0])
+        if first is None: first = pts
+        last = max(last, pts)
+        if "K" in fields[1]:
+            if keyframes and pts < keyframes[-1] - PTS_RESET_SECONDS: return None, last - first
+            keyframes.append(pts)
+
+    if first is None: return [], 0.0
+
+    # ffmpeg's -ss counts from the file's start time, so rebase on that
+    return [k - first for k in keyframes], last - first
+
+
+def probe_keyframes(source):
+    """Lists keyframe times and the title duration (see parse_keyframes).
+    Only demuxes packets, nothing gets decoded."""
+    cmd = [
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0",
+        source
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return parse_keyframes(result.stdout.splitlines())
+
+
+def plan_segments(keyframes, duration, max_segments):
+    """Picks cut points on keyframes, spaced as evenly as possible.
+    Returns a list of (start, end) tuples; end is None for the last piece."""
+    count = min(max_segments, int(duration // MIN_SEGMENT_SECONDS))
+    if count < 2 or not keyframes: return [(0.0, None)]
+
+    cuts = []
+    for i in range(1, count):
+        target = duration * i / count
+        nearest = min(keyframes, key=lambda k: abs(k - target))
+        # Two targets can snap to the same GOP on very sparse streams
+        if nearest > 0 and (not cuts or nearest > cuts[-1]): cuts.append(nearest)
+
+    bounds = [0.0] + cuts
+    return [(start, bounds[i + 1] if i + 1 < len(bounds) else None)
+            for i, start in enumerate(bounds)]
+
+
+def build_segment_cmd(source, start, end, outputs, preset, threads, picture="yadif", keyframes=()):
+    """Video-only encode of one piece into one file per (crf, seg_file) in
+    outputs. Audio is encoded separately in one go so there are no AAC
+    priming gaps at the joins. keyframes are forced, relative to start."""
+    pad = min(EDGE_PAD_SECONDS, start)
+    trim = f"trim=start={pad:.6f}"
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostats",
+           "-progress", "pipe:1", "-ss", f"{start - pad:.6f}", "-i", source]
+
+    if end is not None:
+        trim += f":end={pad + end - start:.6f}"
+        cmd += ["-t", f"{pad + end - start + EDGE_PAD_SECONDS:.6f}"]
+
+    chain = ",".join(f for f in (picture, trim, "setpts=PTS-STARTPTS", "format=yuv420p") if f)
+    if len(outputs) == 1:
+        labels = ["0:v:0"]
+        cmd += ["-vf", chain]
+    else:
+        # Decode and filter once, then feed every encoder from the same frames
+        labels = [f"[v{i}]" for i in range(len(outputs))]
+        cmd += ["-filter_complex", f"[0:v:0]{chain},split={len(outputs)}{''.join(labels)}"]
+
+    for (crf, seg_file), label in zip(outputs, labels):
+        cmd += [
+            "-map", label, "-an", "-sn",
+            "-c:v", "libx264", "-crf", crf, "-preset", preset,
+            "-threads", str(max(1, threads // len(outputs))),
+            *force_keyframes_args(keyframes),
+            "-f", "mpegts", seg_file
+        ]
+    return cmd
+
+
+def build_audio_cmd(source, audio_file, streams, late_tracks=True):
+    """Every audio and subtitle track of a chunked title in one pass, into
+    a Matroska side file the join copies from. streams: -map/codec args
+    (see core.streams.stream_args). Probes as deep as the cached probe did
+    when a track it maps starts well into the title (late_tracks)."""
+    size = FULL_PROBE_SIZE if late_tracks else QUICK_PROBE_SIZE
+    return [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-nostats",
+        "-analyzeduration", size, "-probesize", size,
+        "-i", source, *streams, "-vn",
+        "-f", "matroska", audio_file
+    ]
+
+
+def write_concat_list(seg_files, list_file):
+    with open(list_file, "w", encoding="utf-8") as f:
+        for path in seg_files:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+
+def build_join_cmd(list_file, audio_file, output_file, chapters_file=None):
+    """Stream-copies the encoded pieces (and the audio/subtitle tracks) into
+    the final MP4 or MKV, with chapter markers from chapters_file
+    (ffmetadata) if given."""
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostats", "-y",
+           "-f", "concat", "-safe", "0", "-i", list_file]
+    maps = ["-map", "0:v:0"]
+
+    if audio_file and os.path.exists(audio_file) and os.path.getsize(audio_file) > 0:
+        cmd += ["-i", audio_file]
+        maps += ["-map", "1:a?", "-map", "1:s?"]
+
+    if chapters_file:
+        maps += ["-map_chapters", str(cmd.count("-i"))]
+        cmd += ["-f", "ffmetadata", "-i", chapters_file]
+
+    cmd += maps + ["-c", "copy"]
+    if output_file.endswith(".mp4"): cmd += ["-movflags", "+faststart"]
+    return cmd + [output_file]
@@ -0,0 +1,214 @@
+import argparse
+import os
+import signal
+import sys
+import time
+
+from core.config_manager import ConfigManager
+from core.engine import BatchEngine
+from core.telemetry import summary_line, node_summary
+
+# Headless front end: nothing in here (or anything it imports) may pull in Qt.
+
+
+def build_parser(cfg):
+    parser = argparse.ArgumentParser(prog="vobreel", description="VobReel: Batch DVD Processor (headless)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_encode_options(p):
+        p.add_argument("--crf", default=str(cfg.get("ffmpeg_crf")), help="x264 CRF (lower = better quality)")
+        p.add_argument("--also-crf", action="append", default=[], metavar="CRF",
+                       help="Extra rendition from the same decode, saved as <title>_crf<CRF>.mp4 (repeatable)")
+        p.add_argument("--preset", default=cfg.get("ffmpeg_preset"), help="x264 preset")
+        p.add_argument("--target-ssim", type=float, help="Auto-tune CRF/preset per title to at least this SSIM")
+        p.add_argument("--target-psnr", type=float, help="Auto-tune CRF/preset per title to at least this PSNR (dB)")
+        p.add_argument("--max-mb-per-hour", type=float, help="Auto-tune CRF/preset per title to fit this size")
+        p.add_argument("--mode", choices=["encode", "remux"], default="encode")
+        p.add_argument("--keep-audio", action="store_true", help="Copy the original DVD audio (LPCM as FLAC)")
+        p.add_argument("--audio-langs", default=cfg.get("audio_languages"), metavar="LANGS",
+                       help="Audio tracks to keep: 'all' or languages like en,fr (default: the first track)")
+        p.add_argument("--subtitle-langs", default=cfg.get("subtitle_languages"), metavar="LANGS",
+                       help="Subtitle tracks to keep: 'all' or languages (default: none). Makes the output MKV")
+        p.add_argument("--jobs", type=int, default=cfg.get("max_parallel_jobs"),
+                       help="Encodes at once (0 = auto)")
+        p.add_argument("--no-chunk", action="store_true", help="Never split long titles into segments")
+        p.add_argument("--crop", action=argparse.BooleanOptionalAction, default=cfg.get("auto_crop"),
+                       help="Detect and crop black borders")
+        p.add_argument("--stage-dir", default=cfg.get("staging_dir") or None,
+                       help="Copy upcoming titles here first (for slow USB/network sources)")
+        p.add_argument("--stage-gb", type=float, default=cfg.get("staging_cache_gb"),
+                       help="Size cap for --stage-dir")
+        p.add_argument("--chapter-clips", action=argparse.BooleanOptionalAction, default=cfg.get("chapter_clips"),
+                       help="Also write one file per chapter into <title>_chapters/")
+        p.add_argument("--prometheus", default=cfg.get("prometheus_textfile") or None, metavar="PATH",
+                       help="Write run totals here for node_exporter's textfile collector")
+        p.add_argument("--dedupe", action=argparse.BooleanOptionalAction, default=cfg.get("dedupe_titles"),
+                       help="Link titles whose content was encoded before instead of encoding them again")
+        p.add_argument("--listen", metavar="HOST:PORT",
+                       help="Hand titles to worker nodes connecting here instead of encoding locally")
+        p.add_argument("--token", default=cfg.get("cluster_token"), help="Shared secret for worker nodes (needed unless --listen is 127.0.0.1)")
+        p.add_argument("--encode-damaged", action="store_true",
+                       help="Warn about damaged titles but encode them anyway")
+
+    convert = sub.add_parser("convert", help="Convert every title set under SOURCE once")
+    convert.add_argument("source")
+    convert.add_argument("output", nargs="?", default=cfg.get("default_export_path"))
+    add_encode_options(convert)
+
+    inspect = sub.add_parser("inspect", help="List title sets and their streams without encoding")
+    inspect.add_argument("source")
+
+    watch = sub.add_parser("watch", help="Watch drop folders and convert new VIDEO_TS sets as they land")
+    watch.add_argument("folders", nargs="+")
+    watch.add_argument("--output", default=cfg.get("default_export_path"))
+    watch.add_argument("--settle", type=int, default=60,
+                       help="Seconds a set must stay unchanged before it counts as copied")
+    watch.add_argument("--interval", type=int, default=30, help="Polling interval without inotify")
+    add_encode_options(watch)
+
+    worker = sub.add_parser("worker", help="Encode titles handed out by a coordinator (convert/watch --listen)")
+    worker.add_argument("coordinator", help="HOST:PORT of the coordinator")
+    worker.add_argument("--jobs", type=int, default=cfg.get("max_parallel_jobs"),
+                        help="Titles at once (0 = auto from the core count)")
+    worker.add_argument("--name", help="Node name shown on the coordinator (default: host name)")
+    worker.add_argument("--map", action="append", default=[], metavar="REMOTE=LOCAL",
+                        help="Path prefix rewrite, where this machine mounts the share elsewhere (repeatable)")
+    worker.add_argument("--token", default=cfg.get("cluster_token"), help="Shared secret the coordinator expects")
+    worker.add_argument("--once", action="store_true", help="Exit when the coordinator's batch is over")
+
+    check = sub.add_parser("check", help="Show what the installed ffmpeg can do, with a quick speed test")
+    check.add_argument("--refresh", action="store_true", help="Probe again even if ffmpeg hasn't changed")
+
+    return parser
+
+
+def tune_target(args):
+    target = {"min_ssim": getattr(args, "target_ssim", None),
+              "min_psnr": getattr(args, "target_psnr", None),
+              "max_mb_per_hour": getattr(args, "max_mb_per_hour", None)}
+    return {k: v for k, v in target.items() if v} or None
+
+
+def make_engine(args, cfg, source, output):
+    engine = BatchEngine(source, output,
+                         getattr(args, "crf", str(cfg.get("ffmpeg_crf"))),
+                         getattr(args, "preset", cfg.get("ffmpeg_preset")),
+                         getattr(args, "keep_audio", False),
+                         max_jobs=getattr(args, "jobs", 0),
+                         chunked=cfg.get("chunked_encoding") and not getattr(args, "no_chunk", False),
+                         cache_dir=cfg.config_dir,
+                         min_title_seconds=cfg.get("min_title_seconds"),
+                         mode=getattr(args, "mode", "encode"),
+                         auto_deinterlace=cfg.get("auto_deinterlace"),
+                         auto_crop=getattr(args, "crop", False),
+                         staging_dir=getattr(args, "stage_dir", None),
+                         staging_gb=getattr(args, "stage_gb", 20),
+                         validate=cfg.get("validate_sources"),
+                         skip_damaged=cfg.get("skip_damaged_titles") and not getattr(args, "encode_damaged", False),
+                         extra_crfs=getattr(args, "also_crf", []),
+                         chapter_markers=cfg.get("chapter_markers"),
+                         chapter_clips=getattr(args, "chapter_clips", False),
+                         prometheus_file=getattr(args, "prometheus", None),
+                         tune_target=tune_target(args),
+                         dedupe=getattr(args, "dedupe", True),
+                         listen=getattr(args, "listen", None),
+                         cluster_token=getattr(args, "token", ""),
+                         audio_langs=getattr(args, "audio_langs", ""),
+                         subtitle_langs=getattr(args, "subtitle_langs", ""))
+    engine.on_log = print
+
+    last = {}
+    def title_progress(name, percent, fps, speed, eta):
+        # Once every 10% per title is plenty for a log file
+        step = int(percent // 10)
+        if last.get(name) == step: return
+        last[name] = step
+        eta_text = time.strftime("%H:%M:%S", time.gmtime(eta)) if eta >= 0 else "--:--:--"
+        print(f"   {name}: {percent:5.1f}% | {fps:4.0f} fps | {speed:.2f}x | ETA {eta_text}")
+    engine.on_title_progress = title_progress
+    engine.on_title_stats = lambda stats: print(summary_line(stats))
+
+    last_queue = {}
+    def nodes(snapshot):
+        # Print only when the queue moves, not every second
+        counts = (snapshot["queued"], snapshot["running"], snapshot["done"], snapshot["failed"], len(snapshot["nodes"]))
+        if last_queue.get("counts") == counts: return
+        last_queue["counts"] = counts
+        print(node_summary(snapshot))
+    engine.on_nodes = nodes
+    return engine
+
+
+def run_check(args, cfg):
+    from core.capabilities import load_capabilities, describe
+
+    caps = load_capabilities(cfg.config_dir, refresh=args.refresh, with_calibration=True)
+    for line in describe(caps): print(line)
+    return 0 if caps["ffmpeg"] and caps["ffprobe"] else 1
+
+
+def run_worker(args, cfg):
+    from core.cluster import ClusterWorker
+
+    path_map = [entry.split("=", 1) for entry in args.map if "=" in entry]
+    worker = ClusterWorker(args.coordinator, name=args.name, max_jobs=args.jobs, path_map=path_map,
+                           token=args.token, once=args.once, cache_dir=cfg.config_dir)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda s, f: worker.stop())
+    worker.run()
+    return 0
+
+
+def run_watch(args, cfg):
+    # Only needed for the daemon, keep one-shot start-up lean
+    from core.watcher import DropFolderWatcher
+
+    watcher = DropFolderWatcher(args.folders, os.path.join(cfg.config_dir, "scan_index.db"),
+                                settle_seconds=args.settle, poll_interval=args.interval)
+    print(f"👀 Watching {len(watcher.folders)} folder(s) ({watcher.mode}). Ctrl+C to stop.")
+
+    state = {"engine": None, "quit": False}
+    def shutdown(signum, frame):
+        # Mid-batch: kill the encodes and let run() return; idle: just leave
+        state["quit"] = True
+        if state["engine"]: state["engine"].stop()
+        else: raise KeyboardInterrupt
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    try:
+        while not state["quit"]:
+            for folder in watcher.ready_folders():
+                if state["quit"]: break
+                print(f"📥 Ready: {folder}")
+                state["engine"] = make_engine(args, cfg, folder, args.output)
+                state["engine"].run()
+                state["engine"] = None
+            if not state["quit"]: watcher.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    print("Stopped watching.")
+    return 0
+
+
+def main(argv=None):
+    cfg = ConfigManager()
+    args = build_parser(cfg).parse_args(argv)
+
+    if args.command == "watch": return run_watch(args, cfg)
+    if args.command == "worker": return run_worker(args, cfg)
+    if args.command == "check": return run_check(args, cfg)
+
+    engine = make_engine(args, cfg, args.source, getattr(args, "output", ""))
+    # Ctrl+C / SIGTERM kill the running ffmpegs; run() then returns False
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda s, f: engine.stop())
+
+    ok = engine.inspect() if args.command == "inspect" else engine.run()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,428 @@
+import hmac
+import ipaddress
+import json
+import os
+import platform
+import socket
+import socketserver
+import subprocess
+import threading
+import time
+
+from core.engine import BatchEngine
+from core.capabilities import load_capabilities, supports
+from core.scheduler import plan_jobs
+
+# Wire protocol: one JSON object per line over TCP. A worker connects, sends
+# one request ({"op": "lease" | "heartbeat" | "finish", "node", "token", ...}),
+# reads one reply and hangs up, so either side can restart at any time.
+#
+# Sources and the output folder are NOT copied over the wire: every worker
+# must see them on shared storage (NAS, NFS/SMB mount). --map fixes up paths
+# where a worker mounts the share somewhere else.
+DEFAULT_PORT = 7878
+REQUEST_TIMEOUT = 10
+# Longest request line read; a finish with its stats is a few KB
+MAX_MESSAGE = 1024 * 1024
+
+# A lease lapses if its worker goes this long without a heartbeat; the title
+# then goes back in the queue. Workers stop their own encode after half of
+# this without reaching the coordinator, so two nodes never write one title
+LEASE_SECONDS = 60
+HEARTBEAT_SECONDS = 10
+POLL_SECONDS = 5
+
+# Attempts per title before it's given up on. A title that failed on a node
+# goes to a different one next time if there is one
+MAX_ATTEMPTS = 3
+
+QUEUED, LEASED, COLLECTING, DONE, FAILED = "queued", "leased", "collecting", "done", "failed"
+
+
+def _ignore(*args):
+    pass
+
+
+def parse_address(text, default_host="0.0.0.0"):
+    """'host:port', 'host' or ':port' -> (host, port). IPv6 hosts go in
+    brackets to take a port ('[::1]:7878'); a bare '::1' is all host."""
+    text = text.strip()
+    if text.startswith("["):
+        host, _, rest = text[1:].partition("]")
+        port = rest[1:] if rest.startswith(":") else ""
+    elif text.count(":") == 1:
+        host, _, port = text.partition(":")
+    else:
+        host, port = text, ""
+    return host or default_host, int(port or DEFAULT_PORT)
+
+
+def is_loopback(host):
+    host = host.strip("[]")
+    if host == "localhost": return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False # A host name: could be any interface
+
+
+def map_path(path, path_map):
+    """Rewrites a coordinator path for this machine: [(remote prefix, local prefix)]."""
+    for remote, local in path_map:
+        remote = remote.rstrip("/\\")
+        if path == remote or path.startswith(remote + "/") or path.startswith(remote + "\\"):
+            return local.rstrip("/\\") + path[len(remote):]
+    return path
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class _Server6(_Server):
+    address_family = socket.AF_INET6
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.connection.settimeout(REQUEST_TIMEOUT)
+        try:
+            message = json.loads(self.rfile.readline(MAX_MESSAGE))
+        except (OSError, ValueError):
+            return
+        if isinstance(message, dict):
+            reply = self.server.coordinator.handle(message, self.client_address[0])
+        else:
+            reply = {"error": "expected a JSON object"}
+        try:
+            self.wfile.write((json.dumps(reply) + "\n").encode())
+        except OSError:
+            pass
+
+
+class Coordinator:
+    """Title queue that worker processes lease jobs from over TCP.
+
+    Each job is a title: leased to one node at a time, kept alive by its
+    heartbeats and put back in the queue if they stop, retried on another
+    node if it fails. What a job's payload holds is up to the caller
+    (BatchEngine.distribute); results come back through callbacks:
+
+        on_lease(payload, node, attempt)
+        on_result(payload, node, message)        # -> error string or None
+        on_failed(payload, node, error, message) # out of attempts
+        on_status(snapshot)                      # about once a second, see snapshot()
+    """
+
+    def __init__(self, address, token="", on_log=None):
+        self.token = token or ""
+        host, port = parse_address(address)
+        # Anyone who can connect gets to run encodes against the shares
+        if not self.token and not is_loopback(host):
+            raise ValueError(f"listening on {host} needs a token (--token / cluster_token), "
+                             f"or listen on 127.0.0.1 for local workers only")
+        self.on_log = on_log or _ignore
+        self.on_lease = _ignore
+        self.on_result = lambda payload, node, message: None
+        self.on_failed = _ignore
+        self.on_status = _ignore
+        self.jobs = []  # In queue order
+        self.nodes = {} # name -> {"address", "slots", "last_seen", "done", "failed", "media_seconds", "busy_seconds"}
+        self.stopping = False
+        self.lock = threading.Lock()
+        self.server = (_Server6 if ":" in host else _Server)((host, port), _Handler)
+        self.server.coordinator = self
+        self.address = self.server.server_address
+        self._thread = None
+
+    def add(self, payload):
+        with self.lock:
+            self.jobs.append({"id": len(self.jobs), "payload": payload, "state": QUEUED, "node": None,
+                              "attempts": 0, "failed_on": set(), "expires": 0.0, "leased_at": 0.0,
+                              "progress": {}})
+
+    def serve(self):
+        """Hands out jobs until every one is done or given up on, or stop()."""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        self.on_log(f"🖧 Waiting for workers on port {self.address[1]} "
+                    f"(vobreel worker {platform.node()}:{self.address[1]})")
+        while not self.stopping:
+            self.expire_leases()
+            self.on_status(self.snapshot())
+            with self.lock:
+                if self.settled(): break
+            time.sleep(1)
+        self.on_status(self.snapshot())
+
+    def stop(self):
+        self.stopping = True
+
+    def close(self):
+        if self._thread: self.server.shutdown()
+        self.server.server_close()
+
+    def unfinished(self):
+        """Payloads of jobs still leased out (e.g. after stop())."""
+        with self.lock:
+            return [job["payload"] for job in self.jobs if job["state"] in (LEASED, COLLECTING)]
+
+    def settled(self):
+        return all(job["state"] in (DONE, FAILED) for job in self.jobs)
+
+    # --- REQUESTS (on the server's threads) ---
+
+    def handle(self, message, address):
+        if not hmac.compare_digest(str(message.get("token") or ""), self.token):
+            return {"error": "wrong token"}
+        node = str(message.get("node") or address)
+        op = message.get("op")
+        if op == "lease": return self.lease(node, address, message)
+        if op == "heartbeat": return self.heartbeat(node, message)
+        if op == "finish": return self.finish(node, message)
+        return {"error": f"unknown request {op!r}"}
+
+    def _touch(self, node, address=None, slots=None):
+        info = self.nodes.setdefault(node, {"address": address, "slots": 1, "last_seen": 0.0, "done": 0,
+                                            "failed": 0, "media_seconds": 0.0, "busy_seconds": 0.0})
+        info["last_seen"] = time.time()
+        if slots: info["slots"] = slots
+        return info
+
+    def _pick(self, node):
+        """Next queued job for node, skipping ones that already failed
+        there unless every node that's around has failed it too."""
+        now = time.time()
+        live = {name for name, info in self.nodes.items() if now - info["last_seen"] < LEASE_SECONDS}
+        fallback = None
+        for job in self.jobs:
+            if job["state"] != QUEUED: continue
+            if node not in job["failed_on"]: return job
+            if fallback is None and live <= job["failed_on"]: fallback = job
+        return fallback
+
+    def lease(self, node, address, message):
+        with self.lock:
+            self._touch(node, address, message.get("slots"))
+            if self.stopping: return {"job": None, "finished": True}
+            job = self._pick(node)
+            if job is None: return {"job": None, "finished": self.settled()}
+            job.update(state=LEASED, node=node, expires=time.time() + LEASE_SECONDS,
+                       leased_at=time.time(), progress={})
+            job["attempts"] += 1
+            payload, attempt = job["payload"], job["attempts"]
+        self.on_lease(payload, node, attempt)
+        return {"job": dict(payload, id=job["id"], attempt=attempt)}
+
+    def _job(self, node, message):
+        """The job a heartbeat/finish is about, if node still holds its lease."""
+        job_id = message.get("job")
+        if not isinstance(job_id, int) or not 0 <= job_id < len(self.jobs): return None
+        job = self.jobs[job_id]
+        if job["state"] != LEASED or job["node"] != node or job["attempts"] != message.get("attempt"): return None
+        return job
+
+    def heartbeat(self, node, message):
+        with self.lock:
+            self._touch(node)
+            job = self._job(node, message)
+            if job is None or self.stopping: return {"ok": False}
+            job["expires"] = time.time() + LEASE_SECONDS
+            job["progress"] = message.get("progress") or {}
+            return {"ok": True}
+
+    def finish(self, node, message):
+        with self.lock:
+            info = self._touch(node)
+            job = self._job(node, message)
+            if job is None: return {"ok": False} # Lease lapsed meanwhile, the title went elsewhere
+            job["state"] = COLLECTING # Keeps expire_leases off it while the outputs are checked
+            info["busy_seconds"] += time.time() - job["leased_at"]
+
+        status = message.get("status")
+        if status == "done":
+            error = self.on_result(job["payload"], node, message)
+        else:
+            error = message.get("error") or status
+
+        with self.lock:
+            if error is None:
+                job["state"] = DONE
+                info["done"] += 1
+                info["media_seconds"] += (message.get("stats") or {}).get("duration") or 0.0
+                return {"ok": True}
+            # Stopped means the worker was told to (or lost us), not that the title is bad
+            if status != "stopped": job["failed_on"].add(node)
+            final = self._retry(job, f"{error} (on {node})")
+            if final: info["failed"] += 1
+        if final: self.on_failed(job["payload"], node, error, message)
+        return {"ok": True}
+
+    def _retry(self, job, reason):
+        """Puts a job back in the queue; returns True if it's out of attempts instead."""
+        title = job["payload"].get("title", job["id"])
+        if job["attempts"] >= MAX_ATTEMPTS:
+            job["state"] = FAILED
+            self.on_log(f"❌ Giving up on {title} after {job['attempts']} attempt(s): {reason}")
+            return True
+        job.update(state=QUEUED, node=None, progress={})
+        self.on_log(f"🔁 Retrying {title}: {reason}")
+        return False
+
+    def expire_leases(self):
+        expired = []
+        with self.lock:
+            now = time.time()
+            for job in self.jobs:
+                if job["state"] == LEASED and job["expires"] < now:
+                    node = job["node"]
+                    if self._retry(job, f"no heartbeat from {node}"): expired.append((job, node))
+        for job, node in expired: self.on_failed(job["payload"], node, f"no heartbeat from {node}", {})
+
+    def snapshot(self):
+        """{"queued", "running", "done", "failed", "titles": [{title, node, percent, fps, speed, eta}],
+        "nodes": {name: {"running", "slots", "fps", "speed", "done", "failed", "throughput", "seen"}}}
+        where throughput is media seconds finished per second of lease time."""
+        with self.lock:
+            now = time.time()
+            counts = {state: 0 for state in (QUEUED, LEASED, DONE, FAILED)}
+            titles = []
+            nodes = {name: {"running": 0, "slots": info["slots"], "fps": 0.0, "speed": 0.0,
+                            "done": info["done"], "failed": info["failed"],
+                            "throughput": info["media_seconds"] / info["busy_seconds"] if info["busy_seconds"] else 0.0,
+                            "seen": round(now - info["last_seen"], 1)}
+                     for name, info in self.nodes.items()}
+            for job in self.jobs:
+                state = LEASED if job["state"] == COLLECTING else job["state"]
+                counts[state] += 1
+                if state != LEASED: continue
+                p = job["progress"]
+                node = nodes[job["node"]]
+                node["running"] += 1
+                node["fps"] += p.get("fps", 0.0)
+                node["speed"] += p.get("speed", 0.0)
+                titles.append({"title": job["payload"].get("title"), "node": job["node"],
+                               "percent": p.get("percent", 0.0), "fps": p.get("fps", 0.0),
+                               "speed": p.get("speed", 0.0), "eta": p.get("eta", -1.0)})
+        return {"queued": counts[QUEUED], "running": counts[LEASED], "done": counts[DONE],
+                "failed": counts[FAILED], "titles": titles, "nodes": nodes}
+
+
+class ClusterWorker:
+    """Leases titles from a Coordinator and encodes them here, `slots` at
+    a time with `threads` x264 threads each. Every job gets its own
+    BatchEngine, built from the settings the coordinator sends along.
+
+    With once=True the worker exits when the coordinator's batch is over
+    (or the coordinator goes away after handing out work); otherwise it
+    keeps polling, ready for the next batch.
+    """
+
+    def __init__(self, address, name=None, max_jobs=0, path_map=(), token="", once=False, on_log=None,
+                 cache_dir=None):
+        self.address = parse_address(address, default_host="localhost")
+        self.name = name or platform.node()
+        self.slots, self.threads = plan_jobs(os.cpu_count() or 1, max_jobs)
+        self.path_map = list(path_map)
+        self.token = token or ""
+        self.once = once
+        self.on_log = on_log or print
+        self.cache_dir = cache_dir # For the cached ffmpeg capabilities (None = probe every start)
+        self.caps = None
+        self.is_running = True
+        self.engines = set() # Engines encoding right now, so stop() can reach them
+        self._lock = threading.Lock()
+
+    def run(self):
+        # No point leasing titles only to fail every one of them
+        self.caps = load_capabilities(self.cache_dir)
+        if not self.caps["ffmpeg"] or not self.caps["ffprobe"]:
+            self.on_log(f"❌ {self.name}: ffmpeg/ffprobe not found in PATH, not taking any titles.")
+            return
+        if not supports(self.caps, "libx264"):
+            self.on_log(f"⚠️ {self.name}: this ffmpeg has no libx264, only remux titles will succeed.")
+        self.on_log(f"🖧 {self.name}: {self.slots} slot(s) x {self.threads} thread(s), "
+                    f"coordinator {self.address[0]}:{self.address[1]}")
+        slots = [threading.Thread(target=self.slot_loop) for _ in range(self.slots)]
+        for t in slots: t.start()
+        for t in slots: t.join()
+
+    def stop(self):
+        self.is_running = False
+        with self._lock:
+            for engine in self.engines: engine.stop()
+
+    def request(self, message):
+        with socket.create_connection(self.address, timeout=REQUEST_TIMEOUT) as sock:
+            sock.sendall((json.dumps(dict(message, node=self.name, token=self.token)) + "\n").encode())
+            return json.loads(sock.makefile("rb").readline())
+
+    def slot_loop(self):
+        had_work = False
+        while self.is_running:
+            try:
+                reply = self.request({"op": "lease", "slots": self.slots})
+            except (OSError, ValueError):
+                if self.once and had_work: return # Coordinator finished and closed
+                time.sleep(POLL_SECONDS)
+                continue
+            if reply.get("error"):
+                self.on_log(f"❌ Coordinator refused {self.name}: {reply['error']}")
+                return
+
+            job = reply.get("job")
+            if job is None:
+                if self.once and reply.get("finished"): return
+                time.sleep(POLL_SECONDS)
+                continue
+            had_work = True
+            self.run_job(job)
+
+    def run_job(self, job):
+        title = job["title"]
+        engine = BatchEngine("", map_path(job["output_dir"], self.path_map), **job["settings"])
+        engine.on_log = self.on_log
+        engine.caps = self.caps # Features (bwdif, idet...) come from this node's own ffmpeg
+        progress = {}
+        engine.on_title_progress = lambda name, percent, fps, speed, eta: progress.update(
+            percent=percent, fps=fps, speed=speed, eta=eta)
+
+        self.on_log(f"📨 Leased {title} (attempt {job['attempt']})")
+        with self._lock: self.engines.add(engine)
+        finished = threading.Event()
+        beat = threading.Thread(target=self.heartbeat, args=(job, engine, progress, finished), daemon=True)
+        beat.start()
+        try:
+            vobs = [map_path(p, self.path_map) for p in job["vobs"]]
+            stats, outputs = engine.encode_one(title, vobs, job.get("info"), self.threads)
+            status = stats["status"] if stats else "done"
+            error = stats["error"] if stats else None
+        except (OSError, ValueError, subprocess.CalledProcessError) as e:
+            stats, outputs, status, error = None, {}, "failed", str(e)
+        finally:
+            finished.set()
+            with self._lock: self.engines.discard(engine)
+        if not self.is_running: status = "stopped"
+
+        try:
+            self.request({"op": "finish", "job": job["id"], "attempt": job["attempt"], "status": status,
+                          "error": error, "stats": stats, "outputs": outputs})
+        except (OSError, ValueError) as e:
+            self.on_log(f"⚠️ Couldn't report {title} back: {e}")
+
+    def heartbeat(self, job, engine, progress, finished):
+        last_ok = time.time()
+        while not finished.wait(HEARTBEAT_SECONDS):
+            try:
+                reply = self.request({"op": "heartbeat", "job": job["id"], "attempt": job["attempt"],
+                                      "progress": dict(progress)})
+                if reply.get("ok") or finished.is_set(): # A beat can cross the finish on the wire
+                    last_ok = time.time()
+                    continue
+                self.on_log(f"⏹️ Lease on {job['title']} is gone, stopping it.")
+            except (OSError, ValueError):
+                if time.time() - last_ok < LEASE_SECONDS / 2: continue
+                self.on_log(f"⏹️ Lost the coordinator, stopping {job['title']} before its lease runs out.")
+            engine.stop()
+            return
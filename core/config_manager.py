@@ -19,7 +19,60 @@ class ConfigManager:
             
             # How to stitch VOBs: 'binary' (raw copy) or 'demuxer' (ffmpeg text list)
             # Binary is often safer for VOBs split purely by file size (1GB chunks)
-            "concat_method": "binary" 
+            "concat_method": "binary",
+
+            # How many ffmpeg encodes to run side by side (0 = auto from core count)
+            "max_parallel_jobs": 0,
+
+            # Split long titles into segments and encode them in parallel
+            # when there are fewer titles than encode slots
+            "chunked_encoding": True,
+
+            # Title sets shorter than this (per their IFO) are logos/dummies and get skipped
+            "min_title_seconds": 20,
+
+            # Sample each title with idet and pick no filter / yadif / inverse telecine
+            # (False = always yadif)
+            "auto_deinterlace": True,
+
+            # Default for the batch tab's "Crop black borders" checkbox
+            "auto_crop": False,
+
+            # Copy each upcoming title to this local folder while the current one
+            # encodes, for sources on USB drives or network shares ("" = off)
+            "staging_dir": "",
+            "staging_cache_gb": 20,
+
+            # Walk every VOB's pack structure before encoding; damaged titles are
+            # skipped with a <title>.damaged.txt report (False = just warn)
+            "validate_sources": True,
+            "skip_damaged_titles": True,
+
+            # DVD chapters become chapter markers in the output; the clips option
+            # also cuts one file per chapter (default for the batch tab checkbox)
+            "chapter_markers": True,
+            "chapter_clips": False,
+
+            # Fingerprint every title and hard-link the outputs of one already
+            # encoded (re-burned discs, shared bonus titles) instead of encoding it again
+            "dedupe_titles": True,
+
+            # Tracks to keep, by language from the DVD's IFO: "" = first audio track and
+            # no subtitles, "all", or codes like "en,fr". Subtitles make the output MKV
+            "audio_languages": "",
+            "subtitle_languages": "",
+
+            # Hand titles to worker processes on other machines (vobreel worker HOST:PORT)
+            # instead of encoding locally. Sources and exports must be on storage every
+            # worker can reach. The token is a shared secret workers must send; it's
+            # required unless cluster_listen is a loopback address like 127.0.0.1
+            "distribute_to_workers": False,
+            "cluster_listen": "0.0.0.0:7878",
+            "cluster_token": "",
+
+            # Path for a Prometheus textfile (node_exporter) with each run's totals ("" = off).
+            # Per-title numbers always go to vobreel_report.jsonl in the output folder
+            "prometheus_textfile": ""
         }
         
         self.settings = self.defaults.copy()
@@ -0,0 +1,62 @@
+import re
+import subprocess
+
+from core.sampling import sample_starts
+
+# Sample points across the title; each one runs cropdetect for a couple of seconds
+SAMPLE_POINTS = 6
+SAMPLE_SECONDS = 2
+
+# Don't bother cropping slivers: below this many pixels per side the
+# saving is nothing and it risks nibbling real picture on noisy edges
+MIN_BORDER = 8
+
+CROP_LINE = re.compile(r"crop=(-?\d+):(-?\d+):(-?\d+):(-?\d+)")
+
+
+def run_cropdetect(source, start, seconds=SAMPLE_SECONDS):
+    """Last crop rectangle cropdetect settles on in one window, as (w, h, x, y)
+    or None if the window was all black (cropdetect then reports nonsense)."""
+    cmd = [
+        "ffmpeg", "-hide_banner", "-nostats", "-loglevel", "info",
+        "-ss", f"{start:.3f}", "-i", source, "-t", str(seconds),
+        "-map", "0:v:0", "-an", "-sn",
+        "-vf", "cropdetect=limit=24:round=2:reset=0", "-f", "null", "-"
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    found = CROP_LINE.findall(result.stderr)
+    if not found: return None
+
+    w, h, x, y = map(int, found[-1])
+    if w <= 0 or h <= 0: return None
+    return w, h, x, y
+
+
+def agree(samples, width, height):
+    """Combines per-window rectangles into one that's safe for the whole
+    title: the union of them all, so a bright scene never gets cut just
+    because a dark one looked narrower. Returns None if nothing worth cropping."""
+    samples = [s for s in samples if s]
+    if not samples: return None
+
+    left = min(x for w, h, x, y in samples)
+    top = min(y for w, h, x, y in samples)
+    right = max(x + w for w, h, x, y in samples)
+    bottom = max(y + h for w, h, x, y in samples)
+
+    # Even sizes and offsets keep 4:2:0 chroma aligned
+    left, top = left - left % 2, top - top % 2
+    w = (min(right, width) - left) // 2 * 2
+    h = (min(bottom, height) - top) // 2 * 2
+
+    if width - w < MIN_BORDER * 2 and height - h < MIN_BORDER * 2: return None
+    return w, h, left, top
+
+
+def detect_crop(source, duration, width, height):
+    samples = [run_cropdetect(source, start) for start in sample_starts(duration, SAMPLE_POINTS, SAMPLE_SECONDS)]
+    return agree(samples, width, height)
+
+
+def crop_filter(crop):
+    return f"crop={crop[0]}:{crop[1]}:{crop[2]}:{crop[3]}" if crop else ""
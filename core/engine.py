@@ -0,0 +1,1176 @@
+import json
+import os
+import subprocess
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from core.scheduler import plan_jobs
+from core.scan_index import ScanIndex, VOB_PATTERN
+from core.ifo_parser import title_set_info, title_set_chapters, disc_titles
+from core.ffmpeg_progress import ProgressParser
+from core.probe import ProbeCache, stream_map, describe, probe_args
+from core.job_journal import JobJournal, partial_path, file_checksum, DONE, STOPPED, FAILED
+from core.field_analysis import detect_scan_type, deinterlace_filter, field_ratios
+from core.crop_detect import detect_crop, crop_filter
+from core.remux import pick_container, build_remux_cmd
+from core.streams import plan_streams, stream_args, maps_late_tracks, parse_languages, describe_plan
+from core.auto_tune import tune
+from core.capabilities import load_capabilities, supports, FALLBACKS
+from core.staging import StagingCache
+from core.vob_validator import validate_title
+from core.fingerprint import FingerprintMap
+from core.telemetry import RunReport, REPORT_NAME, wait_with_usage, new_usage, add_usage, write_prometheus
+from core.chapters import chapter_spans, write_ffmetadata, keyframe_times, force_keyframes_args, build_clip_cmd
+from core.chunking import (probe_keyframes, plan_segments, build_segment_cmd,
+                           build_audio_cmd, write_concat_list, build_join_cmd)
+
+# Validation is mostly waiting on reads; separate discs often sit on separate drives
+VALIDATE_THREADS = 4
+# Fingerprinting reads ~2 MB of scattered 64K blocks per title: all seeks,
+# so the same few threads keep several drives busy without thrashing one
+FINGERPRINT_THREADS = 4
+
+
+def _ignore(*args):
+    pass
+
+
+class BatchEngine:
+    """The scan/probe/encode pipeline with no Qt in sight, so it can run on
+    headless servers. Progress goes out through plain callbacks:
+
+        on_log(message)
+        on_progress(percent)                                 # whole batch, int
+        on_title_progress(name, percent, fps, speed, eta)    # eta -1 = unknown
+        on_title_stats(stats)                                # dict, see record_title
+        on_nodes(snapshot)                                   # worker nodes, see Coordinator.snapshot
+
+    VobWorker wires these to Qt signals; the CLI prints them.
+    """
+
+    def __init__(self, source_dir, output_dir, crf, preset, keep_audio=False, max_jobs=0,
+                 chunked=True, cache_dir=None, min_title_seconds=20, mode="encode",
+                 auto_deinterlace=True, auto_crop=False, staging_dir=None, staging_gb=20,
+                 validate=True, skip_damaged=True, extra_crfs=(), chapter_markers=True,
+                 chapter_clips=False, prometheus_file=None, tune_target=None, dedupe=True,
+                 listen=None, cluster_token="", audio_langs="", subtitle_langs=""):
+        self.source_dir = source_dir
+        self.output_dir = output_dir
+        self.crf = crf      # User selected value
+        # More renditions of the same decode, saved as <title>_crf<N>.mp4
+        self.extra_crfs = [c for c in extra_crfs if c != crf]
+        self.preset = preset # User selected value
+        # {"min_ssim"/"min_psnr"/"max_mb_per_hour": ...}: pick CRF/preset per title
+        # from sample encodes instead (None = use crf/preset as given)
+        self.tune_target = tune_target
+        self.keep_audio = keep_audio # Copy AC3/DTS/MP2 untouched (LPCM as FLAC) instead of AAC
+        # Tracks by language: "" = first audio / no subtitles, "all", or "eng,fre"
+        self.audio_langs = parse_languages(audio_langs)
+        self.subtitle_langs = parse_languages(subtitle_langs)
+        self.mode = mode # 'encode' (x264) or 'remux' (stream copy, no re-encode)
+        self.auto_deinterlace = auto_deinterlace # False = always yadif, like before
+        self.auto_crop = auto_crop # Detect and cut away letterbox/pillarbox bars
+        self.max_jobs = max_jobs # 0 = work it out from the core count
+        self.chunked = chunked   # Split long titles across cores when titles are scarce
+        self.cache_dir = cache_dir # Where the scan index/probe cache live (None = don't persist)
+        self.min_title_seconds = min_title_seconds # Shorter titles are logos/dummies
+        self.staging_dir = staging_dir # Local scratch to copy slow sources into (None = read in place)
+        self.staging_gb = staging_gb   # Size cap for the scratch copies
+        self.validate = validate         # Check VOB structure before spending encoder time
+        self.skip_damaged = skip_damaged # False = only warn about damaged titles
+        self.chapter_markers = chapter_markers # DVD chapters as MP4/MKV chapter markers
+        self.chapter_clips = chapter_clips     # Also cut one file per chapter
+        self.prometheus_file = prometheus_file # node_exporter textfile for the run's totals (None = off)
+        self.dedupe = dedupe # Link copies of already encoded content instead of encoding them again
+        self.listen = listen # "host:port" to hand titles to worker processes instead of encoding here
+        self.cluster_token = cluster_token # Shared secret workers must send (see core.cluster)
+        self.coordinator = None
+        self.caps = None # What this machine's ffmpeg can do, loaded on first use (see capabilities())
+        self.title_info = {} # output_name -> parsed VTS IFO (None if unreadable)
+        self.probes = None
+        self.journal = None
+        self.staging = None
+        self.report = None
+        self.fingerprints = None
+        self._fingerprint = {} # output_name -> content fingerprint
+        self._duplicates = []  # (output_name, original title, bytes reused) for the summary
+        self._usage = {} # output_name -> CPU/memory/IO totals of its ffmpeg processes
+        self.is_running = True
+        self._lock = threading.Lock()
+        self._procs = set() # Running ffmpeg processes, so stop() can kill them
+        self.on_log = _ignore
+        self.on_progress = _ignore
+        self.on_title_progress = _ignore
+        self.on_title_stats = _ignore
+        self.on_nodes = _ignore
+
+    def cache_path(self, name):
+        return os.path.join(self.cache_dir, name) if self.cache_dir else ":memory:"
+
+    def scan_for_title_sets(self):
+        """Scans source_dir for VOB sequences (via the incremental scan index)."""
+        index = ScanIndex(self.cache_path("scan_index.db"))
+        try:
+            previous = index.last_scanned(self.source_dir)
+            found, relisted = index.scan(self.source_dir)
+            self.on_log(f"🗂️ Index: {relisted} folder(s) changed since last scan.")
+
+            if previous is not None:
+                new = index.title_sets(self.source_dir, since=previous)
+                count = sum(len(titles) for titles in new.values())
+                if count: self.on_log(f"🆕 {count} new title set(s) since last run.")
+        finally:
+            index.close()
+
+        title_sets = {}
+        for root, local_groups in found.items():
+            folder_name = os.path.basename(root)
+            # Every disc's folder is called VIDEO_TS: name outputs after the disc instead
+            if folder_name.upper() == "VIDEO_TS":
+                folder_name = os.path.basename(os.path.dirname(root)) or folder_name
+            for title_id, file_paths in local_groups.items():
+                unique_key = f"{folder_name}_Title_{title_id}"
+                title_sets[unique_key] = file_paths
+
+        return title_sets
+
+    def inspect_titles(self, title_sets):
+        """Reads each set's VTS IFO, drops junk titles (logos, dummy sets)
+        shorter than min_title_seconds and decoy sets no title in the disc's
+        VIDEO_TS.IFO plays, and orders the rest longest-first so the big ones
+        start early and the short ones pack in around them."""
+        kept = []
+        disc = {} # folder -> VMG title list (None if unreadable)
+        for name, vobs in title_sets.items():
+            folder = os.path.dirname(vobs[0])
+            title_id = VOB_PATTERN.match(os.path.basename(vobs[0])).group(1)
+            if folder not in disc: disc[folder] = disc_titles(folder)
+            titles = disc[folder]
+            if titles and int(title_id) not in {t["vts"] for t in titles}:
+                self.on_log(f"🗑️ Skipping {name}: no title on the disc plays it (decoy set).")
+                continue
+
+            info = title_set_info(folder, title_id)
+            self.title_info[name] = info
+
+            if info is None:
+                self.on_log(f"⚠️ No readable IFO for {name}, keeping it unfiltered.")
+                kept.append((0.0, name, vobs))
+                continue
+
+            if info["duration"] < self.min_title_seconds:
+                self.on_log(f"🗑️ Skipping {name}: only {info['duration']:.1f}s long.")
+                continue
+            if info["angles"] > 1: self.on_log(f"🎥 {name}: {info['angles']} camera angles, encoding the first.")
+            kept.append((info["duration"], name, vobs))
+
+        kept.sort(key=lambda t: t[0], reverse=True)
+        return {name: vobs for duration, name, vobs in kept}
+
+    def capabilities(self):
+        if self.caps is None: self.caps = load_capabilities(self.cache_dir)
+        return self.caps
+
+    def check_toolchain(self):
+        """False (with the reason logged) if ffmpeg can't do this run at all.
+        Also says which optional filters are missing and what's used instead."""
+        caps = self.capabilities()
+        if not caps["ffmpeg"] or not caps["ffprobe"]:
+            self.on_log("❌ ffmpeg/ffprobe not found in PATH. Install FFmpeg (see the Diagnostics tab).")
+            return False
+        if self.mode == "encode" and not supports(caps, "libx264"):
+            self.on_log(f"❌ This ffmpeg has no libx264 encoder ({caps['ffmpeg']}). Install a full build or remux.")
+            return False
+        missing = [f"{name} ({fallback})" for name, fallback in FALLBACKS.items() if not supports(caps, name)]
+        if missing: self.on_log(f"ℹ️ Not in this ffmpeg: {', '.join(missing)}.")
+        return True
+
+    def run(self):
+        # The coordinator only probes; its worker nodes check their own ffmpeg
+        if not self.listen and not self.check_toolchain(): return False
+        self.on_log(f"Scanning {self.source_dir}...")
+        title_sets = self.scan_for_title_sets()
+        
+        if not title_sets:
+            self.on_log("❌ No valid VOB Title Sets found.")
+            return False
+
+        title_sets = self.inspect_titles(title_sets)
+        if not title_sets:
+            self.on_log("❌ Every title set was filtered out (too short, or not played by any title on the disc).")
+            return False
+
+        self.on_log(f"Found {len(title_sets)} titles to process.")
+        if not os.path.exists(self.output_dir): os.makedirs(self.output_dir)
+
+        total = len(title_sets)
+        jobs, threads = plan_jobs(total, self.max_jobs)
+        slots, slot_threads = plan_jobs(os.cpu_count() or 1, self.max_jobs)
+        segments = 1
+
+        if self.listen:
+            self.on_log(f"🖧 Handing titles out to worker nodes on {self.listen}.")
+        elif self.mode == "remux":
+            # Stream copy is disk-bound: no x264 threads to hand out, nothing to split
+            self.on_log(f"📦 Remuxing without re-encoding, {jobs} title(s) at once.")
+        elif self.chunked and total < slots:
+            # Fewer titles than encode slots: do titles one after another
+            # and spread each one across all the slots instead
+            jobs, threads, segments = 1, slot_threads, slots
+            self.on_log(f"✂️ Splitting titles into up to {segments} segments, {threads} thread(s) each.")
+        else:
+            self.on_log(f"⚙️ Running {jobs} encode(s) at once, {threads} thread(s) each.")
+
+        # Titles finish out of order, so count them under a lock
+        self._done = 0
+        self._counted = set() # Titles mark_done has seen, so a failure isn't counted twice
+        self._total = total
+        self._active = {} # output_name -> duration + latest stats per running piece
+
+        self.probes = ProbeCache(self.cache_path("probe_cache.db"))
+        self.journal = JobJournal(self.cache_path("jobs.db"))
+        self.fingerprints = FingerprintMap(self.cache_path("fingerprints.db"))
+        self.report = RunReport(os.path.join(self.output_dir, REPORT_NAME), {
+            "mode": self.mode, "preset": self.preset,
+            "crf": [crf for suffix, crf in self.renditions()],
+            "jobs": jobs, "threads": threads, "segments": segments,
+        })
+        unfinished = self.journal.unfinished(self.output_dir)
+        if unfinished:
+            self.on_log(f"↩️ {len(unfinished)} title(s) didn't finish last time and will be redone.")
+
+        followers = {}
+        try:
+            if self.dedupe: title_sets, followers = self.dedupe_titles(title_sets)
+            if self.validate: title_sets = self.validate_titles(title_sets)
+
+            if self.staging_dir and not self.listen:
+                self.staging = StagingCache(self.staging_dir, int(self.staging_gb * 1024 ** 3), self.on_log)
+                # Titles in the order the pool will start them, minus ones already done
+                self._stage_queue = [(name, vobs) for name, vobs in title_sets.items()
+                                     if not self.has_output(name)]
+                self._stage_jobs = jobs
+
+            if self.listen:
+                self.distribute(title_sets)
+            else:
+                self.analyse_titles(title_sets)
+                with ThreadPoolExecutor(max_workers=jobs) as pool:
+                    futures = [
+                        pool.submit(self.encode_title, name, vobs, threads, total, segments)
+                        for name, vobs in title_sets.items()
+                    ]
+                    for future in as_completed(futures):
+                        future.result()
+            self.link_followers(followers)
+        finally:
+            self.probes.close()
+            self.journal.close()
+            self.fingerprints.close()
+            if self.prometheus_file:
+                try:
+                    write_prometheus(self.prometheus_file, self.report.records, self.report.run_info)
+                except OSError as e:
+                    self.on_log(f"⚠️ Couldn't write {self.prometheus_file}: {e}")
+            if self.staging:
+                if self.staging.stall_seconds:
+                    self.on_log(f"📥 Encodes waited {self.staging.stall_seconds:.1f}s in total on staging.")
+                self.staging.close()
+                self.staging = None
+
+        if self._duplicates:
+            reused = sum(size for name, original, size in self._duplicates)
+            self.on_log(f"🔁 {len(self._duplicates)} duplicate title(s) linked instead of encoded "
+                        f"({reused / 1e9:.2f} GB of output reused):")
+            for name, original, size in self._duplicates: self.on_log(f"   {name} = {original}")
+
+        self.on_log("--- BATCH COMPLETE ---" if self.is_running else "--- BATCH STOPPED ---")
+        return self.is_running
+
+    def inspect(self):
+        """Scans, probes and damage-checks the source without encoding anything.
+        Results come from (and go into) the probe cache, so a later batch
+        over the same discs doesn't have to probe again."""
+        self.on_log(f"Scanning {self.source_dir}...")
+        title_sets = self.inspect_titles(self.scan_for_title_sets())
+        if not title_sets:
+            self.on_log("❌ No valid VOB Title Sets found.")
+            return False
+
+        self.probes = ProbeCache(self.cache_path("probe_cache.db"))
+        try:
+            for current, (name, vobs) in enumerate(title_sets.items(), 1):
+                if not self.is_running: break
+                meta = self.probe_title(name, vobs)
+                if meta: self.on_log(f"📋 {name}: {describe(meta)}")
+                if self.validate:
+                    result = self.validate_one(name, vobs)
+                    if result and result["ok"] and not result["warnings"]:
+                        self.on_log(f"🩺 {name}: {result['packs']} packs, no damage found")
+                self.on_progress(int((current / len(title_sets)) * 100))
+        finally:
+            self.probes.close()
+
+        return self.is_running
+
+    def dedupe_titles(self, title_sets):
+        """Fingerprints every title and drops the ones whose content was
+        encoded before, under any name, in this run or an earlier one: their
+        outputs become hard links to the existing encode. Copies of a title
+        that is still to be encoded in this batch wait for it; they're
+        returned as {name: (vobs, original)} for link_followers."""
+        with ThreadPoolExecutor(max_workers=FINGERPRINT_THREADS) as pool:
+            fingerprints = list(pool.map(lambda item: self.fingerprint_one(*item), title_sets.items()))
+
+        # Titles already done go first, so copies link to them rather than
+        # the other way round. Outputs made before the map existed get added
+        first = {} # fingerprint -> title that will have the outputs
+        for (name, vobs), fp in zip(title_sets.items(), fingerprints):
+            if fp is None or not self.has_output(name): continue
+            self._fingerprint[name] = fp
+            self.register_outputs(name, fp)
+            first.setdefault(fp, name)
+
+        kept, followers = {}, {}
+        for (name, vobs), fp in zip(title_sets.items(), fingerprints):
+            if fp is None or name in self._fingerprint:
+                kept[name] = vobs
+                continue
+            self._fingerprint[name] = fp
+            if self.link_duplicate(name):
+                self.mark_done(self._total)
+            elif fp in first:
+                followers[name] = (vobs, first[fp])
+                self.on_log(f"🔁 {name} is the same as {first[fp]}, it'll be linked once that's done.")
+            else:
+                first[fp] = name
+                kept[name] = vobs
+        return kept, followers
+
+    def fingerprint_one(self, output_name, vob_list):
+        if not self.is_running: return None
+        try:
+            return self.fingerprints.fingerprint(vob_list)
+        except OSError as e:
+            self.on_log(f"⚠️ Couldn't fingerprint {output_name}: {e}")
+            return None
+
+    def register_outputs(self, output_name, fp):
+        """Puts a title's finished, up-to-date outputs in the fingerprint map."""
+        for suffix, crf in self.renditions():
+            params = self.job_params(crf)
+            for ext in ("mp4", "mkv"):
+                output_file = os.path.join(self.output_dir, f"{output_name}{suffix}.{ext}")
+                job = self.journal.get(output_file)
+                if job and job["state"] == DONE and job["params"] == params and os.path.exists(output_file) \
+                        and job["size"] == os.path.getsize(output_file):
+                    self.fingerprints.add(fp, params, output_file, output_name)
+
+    def link_duplicate(self, output_name, original=None):
+        """Gives a title the outputs of an earlier encode of the same content,
+        as hard links (or a reference file where the drive can't do them).
+        Returns False if the map has nothing finished with today's settings."""
+        fp = self._fingerprint[output_name]
+        found = []
+        for suffix, crf in self.renditions():
+            params = self.job_params(crf)
+            entry = self.fingerprints.find(fp, params)
+            if entry is None: return False
+            found.append((suffix, params, entry))
+
+        started = time.perf_counter()
+        original = original or found[0][2]["title"]
+        outputs = []
+        for suffix, params, entry in found:
+            source = entry["output_file"]
+            output_file = os.path.join(self.output_dir, output_name + suffix + os.path.splitext(source)[1])
+            if os.path.abspath(output_file) == source: continue
+            try:
+                if os.path.exists(output_file): os.remove(output_file)
+                os.link(source, output_file)
+            except OSError as e:
+                note = os.path.join(self.output_dir, f"{output_name}{suffix}.duplicate.txt")
+                with open(note, "w") as f: f.write(f"Same content as {source}\n")
+                self.on_log(f"⚠️ Couldn't hard-link {os.path.basename(output_file)} ({e}), "
+                            f"wrote {os.path.basename(note)} instead.")
+                continue
+
+            job = self.journal.get(source)
+            self.journal.start(output_file, output_name, params)
+            self.journal.finish(output_file, entry["size"], job and job["checksum"])
+            self.fingerprints.add(fp, params, output_file, output_name)
+            if self.chapter_clips: self.link_clips(source, output_file)
+            outputs.append((None, output_file, None))
+
+        self._duplicates.append((output_name, original, sum(e["size"] for s, p, e in found)))
+        self.record_title(output_name, "duplicate", started, [], outputs, duplicate_of=original)
+        self.on_log(f"🔁 {output_name}: same content as {original}, linked instead of encoded.")
+        return True
+
+    def link_clips(self, source, output_file):
+        """Hard-links the original's chapter clips under the duplicate's name."""
+        source_stem = os.path.splitext(os.path.basename(source))[0]
+        stem = os.path.splitext(os.path.basename(output_file))[0]
+        source_dir = os.path.join(os.path.dirname(source), f"{source_stem}_chapters")
+        if not os.path.isdir(source_dir): return
+        clip_dir = os.path.join(self.output_dir, f"{stem}_chapters")
+        shutil.rmtree(clip_dir, ignore_errors=True)
+        try:
+            os.makedirs(clip_dir)
+            for clip in os.listdir(source_dir):
+                if clip.startswith(source_stem):
+                    os.link(os.path.join(source_dir, clip), os.path.join(clip_dir, stem + clip[len(source_stem):]))
+        except OSError as e:
+            self.on_log(f"⚠️ Couldn't link chapter clips for {stem}: {e}")
+
+    def link_followers(self, followers):
+        """Links the copies dedupe_titles held back, now their originals are done."""
+        for name, (vobs, original) in followers.items():
+            if not self.is_running: return
+            if not self.link_duplicate(name, original):
+                self.on_log(f"⚠️ {name} not linked: {original} didn't finish.")
+            self.mark_done(self._total)
+
+    def validate_titles(self, title_sets):
+        """Walks the pack structure of every title still to do and reports
+        damage. Damaged titles are dropped from the batch (quarantined) with a
+        <name>.damaged.txt next to where the output would have gone."""
+        todo = [(name, vobs) for name, vobs in title_sets.items() if not self.has_output(name)]
+        if not todo: return title_sets
+
+        self.on_log(f"🩺 Checking {len(todo)} title(s) for damage...")
+        with ThreadPoolExecutor(max_workers=VALIDATE_THREADS) as pool:
+            results = list(pool.map(lambda item: self.validate_one(*item), todo))
+
+        damaged = set()
+        for (name, vobs), result in zip(todo, results):
+            report = os.path.join(self.output_dir, f"{name}.damaged.txt")
+            if result is None or result["ok"]:
+                if os.path.exists(report): os.remove(report) # Fixed since last time
+                continue
+
+            with open(report, "w") as f:
+                f.write("\n".join(result["errors"] + result["warnings"]) + "\n")
+            if self.skip_damaged:
+                damaged.add(name)
+                self.mark_done(self._total)
+                self.on_log(f"🚫 Quarantined {name}, see {os.path.basename(report)}")
+
+        if damaged: self.on_log(f"🚫 {len(damaged)} damaged title(s) will not be encoded.")
+        return {name: vobs for name, vobs in title_sets.items() if name not in damaged}
+
+    def validate_one(self, output_name, vob_list):
+        if not self.is_running: return None
+        result = self.probes.get_validation(vob_list)
+        try:
+            # Empty titles used to pass: don't trust an old cached pass for one
+            if result is None or not result["packs"]:
+                result = validate_title(vob_list, self.title_info.get(output_name))
+                self.probes.store_validation(vob_list, result)
+        except (OSError, ValueError) as e:
+            self.on_log(f"⚠️ Couldn't check {output_name}: {e}")
+            return None
+
+        for error in result["errors"]: self.on_log(f"❌ {output_name}: {error}")
+        for warning in result["warnings"]: self.on_log(f"⚠️ {output_name}: {warning}")
+        return result
+
+    def analyse_titles(self, title_sets):
+        """Analysis stage: probes every title and samples it for field order
+        and crop, all titles side by side. Results land in the probe cache,
+        where encode_title picks them up without sampling again."""
+        if self.mode == "remux": return
+        todo = [(name, vobs) for name, vobs in title_sets.items() if not self.has_output(name)]
+        if not todo: return
+
+        self.on_log(f"🔬 Analysing {len(todo)} title(s)...")
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+            list(pool.map(lambda item: self.analyse_title(*item), todo))
+
+    def analyse_title(self, output_name, vob_list):
+        if not self.is_running: return
+        meta = self.probe_title(output_name, vob_list)
+        duration = self.title_duration(output_name, meta)
+        picture = self.pick_picture(output_name, vob_list, meta, duration)
+        if self.tune_target: self.pick_settings(output_name, vob_list, meta, duration, picture)
+
+    # --- WORKER NODES (see core.cluster) ---
+
+    def settings(self):
+        """The constructor arguments a worker needs to encode a title the way this engine would."""
+        return {"crf": self.crf, "preset": self.preset, "keep_audio": self.keep_audio, "mode": self.mode,
+                "auto_deinterlace": self.auto_deinterlace, "auto_crop": self.auto_crop,
+                "extra_crfs": self.extra_crfs, "chapter_markers": self.chapter_markers,
+                "chapter_clips": self.chapter_clips, "tune_target": self.tune_target,
+                "audio_langs": ",".join(self.audio_langs), "subtitle_langs": ",".join(self.subtitle_langs)}
+
+    def distribute(self, title_sets):
+        """Queues titles for worker processes (vobreel worker HOST:PORT)
+        instead of encoding them here, and takes in what they finish:
+        outputs are checked, journaled and reported as if encoded locally.
+        Returns once every title is done or given up on, or on stop()."""
+        from core.cluster import Coordinator # Only needed with workers
+
+        try:
+            coordinator = Coordinator(self.listen, self.cluster_token, self.on_log)
+        except (OSError, ValueError) as e:
+            self.on_log(f"❌ Can't listen on {self.listen}: {e}")
+            self.is_running = False
+            return
+        coordinator.on_lease = self.job_leased
+        coordinator.on_result = self.collect_job
+        coordinator.on_failed = self.job_failed
+        coordinator.on_status = self.nodes_changed
+
+        settings = self.settings()
+        queued = 0
+        for name, vobs in title_sets.items():
+            # The probe decides MP4 or MKV (see output_container)
+            meta = self.probe_title(name, vobs)
+            container, outputs = self.pending_outputs(name, meta)
+            if not outputs:
+                self.mark_done(self._total)
+                continue
+            coordinator.add({"title": name, "vobs": [os.path.abspath(p) for p in vobs],
+                             "info": self.title_info.get(name), "output_dir": os.path.abspath(self.output_dir),
+                             "outputs": [[crf, output_file] for crf, output_file, temp_file in outputs],
+                             "settings": settings})
+            queued += 1
+
+        self.coordinator = coordinator
+        try:
+            if queued and self.is_running: coordinator.serve()
+        finally:
+            self.coordinator = None
+            coordinator.close()
+            for job in coordinator.unfinished():
+                for crf, output_file in job["outputs"]: self.journal.set_state(output_file, STOPPED)
+
+    def job_leased(self, job, node, attempt):
+        for crf, output_file in job["outputs"]:
+            self.journal.start(output_file, job["title"], self.job_params(crf))
+        self.on_log(f"🎥 {job['title']} -> {node}" + (f" (attempt {attempt})" if attempt > 1 else ""))
+
+    def collect_job(self, job, node, message):
+        """Takes in a title a worker says is done. Returns an error if its
+        outputs aren't in the output folder as reported (the coordinator
+        then retries it elsewhere)."""
+        reported = dict(message.get("outputs") or {})
+        for crf, output_file in job["outputs"]:
+            got = reported.get(os.path.basename(output_file))
+            if not got and os.path.exists(output_file):
+                # An earlier attempt finished it after its lease lapsed, so this
+                # node skipped it. Outputs only appear under their real name
+                # complete (renamed from .partial), so it counts as done. Workers
+                # report a checksum for these; an older one that didn't leaves it
+                # blank, since hashing gigabytes here would outlast the request
+                got = reported[os.path.basename(output_file)] = {
+                    "size": os.path.getsize(output_file), "checksum": None}
+                self.on_log(f"♻️ {os.path.basename(output_file)} was finished by an earlier attempt, keeping it.")
+            if not got or not os.path.exists(output_file) or os.path.getsize(output_file) != got["size"]:
+                return f"{os.path.basename(output_file)} isn't in {self.output_dir} (is it shared with {node}?)"
+
+        name = job["title"]
+        for crf, output_file in job["outputs"]:
+            got = reported[os.path.basename(output_file)]
+            self.journal.finish(output_file, got["size"], got["checksum"])
+            if name in self._fingerprint:
+                self.fingerprints.add(self._fingerprint[name], self.job_params(crf), output_file, name)
+
+        self.report_job(job, node, message.get("stats"), "done")
+        done = self.mark_done(self._total, name)
+        self.on_log(f"✅ Finished ({done}/{self._total}) on {node}: {name}")
+        return None
+
+    def job_failed(self, job, node, error, message):
+        for crf, output_file in job["outputs"]: self.journal.set_state(output_file, FAILED, error)
+        self.report_job(job, node, message.get("stats"), "failed", error)
+        self.mark_done(self._total, job["title"])
+
+    def report_job(self, job, node, stats, status, error=None):
+        """The worker's stats for a title (or an empty record if it never
+        sent any) into this run's report, tagged with the node."""
+        if not stats:
+            stats = dict(new_usage(), title=job["title"], outputs=[], timestamp=time.strftime("%Y-%m-%dT%H:%M:%S"),
+                         wall_seconds=0.0, bytes_read=0, bytes_written=0, frames=0, duration=0.0,
+                         fps=0.0, speed=0.0, duplicate_of=None)
+        stats = dict(stats, status=status, error=error, node=node)
+        try:
+            if self.report: stats = self.report.record(stats)
+        except OSError as e:
+            self.on_log(f"⚠️ Couldn't write the run report: {e}")
+        self.on_title_stats(stats)
+
+    def nodes_changed(self, snapshot):
+        for t in snapshot["titles"]:
+            self.on_title_progress(t["title"], t["percent"], t["fps"], t["speed"], t["eta"])
+        self.on_nodes(snapshot)
+
+    def encode_one(self, output_name, vob_list, info, threads):
+        """Worker side: encodes a single title leased from a coordinator,
+        with throwaway in-memory caches. Returns (stats or None if there was
+        nothing to do, {output file name: {"size", "checksum"}} of what's done)."""
+        self.title_info[output_name] = info
+        self._done, self._total, self._active, self._counted = 0, 1, {}, set()
+        self.probes = ProbeCache(":memory:")
+        self.journal = JobJournal(":memory:")
+        results = []
+        on_title_stats = self.on_title_stats
+        self.on_title_stats = lambda stats: (results.append(stats), on_title_stats(stats))
+        try:
+            self.encode_title(output_name, vob_list, threads, 1)
+            outputs = {}
+            for suffix, crf in self.renditions():
+                for ext in ("mp4", "mkv"):
+                    output_file = os.path.join(self.output_dir, f"{output_name}{suffix}.{ext}")
+                    job = self.journal.get(output_file)
+                    if job and job["state"] == DONE:
+                        outputs[os.path.basename(output_file)] = {"size": job["size"], "checksum": job["checksum"]}
+                    elif os.path.exists(output_file):
+                        # Skipped as already there (an earlier attempt's lease lapsed
+                        # after it finished): hash it here, not on the coordinator
+                        outputs[os.path.basename(output_file)] = {"size": os.path.getsize(output_file),
+                                                                  "checksum": file_checksum(output_file)}
+        finally:
+            self.on_title_stats = on_title_stats
+            self.probes.close()
+            self.journal.close()
+        return (results[0] if results else None), outputs
+
+    def has_output(self, output_name):
+        return any(os.path.exists(os.path.join(self.output_dir, f"{output_name}.{ext}"))
+                   for ext in ("mp4", "mkv"))
+
+    def stage_title(self, output_name, vob_list):
+        """Where ffmpeg should read this title from: its staged copy if the
+        prefetcher got to it, else the source. Also queues the title that
+        will start next, so it copies while this one encodes."""
+        if not self.staging: return vob_list
+        names = [name for name, vobs in self._stage_queue]
+        if output_name in names:
+            # The first `jobs` titles start together; after that each title
+            # starts when one finishes, so the next one up is simply i + 1
+            upcoming = max(names.index(output_name) + 1, self._stage_jobs)
+            if upcoming < len(names): self.staging.prefetch(self._stage_queue[upcoming][1])
+        return self.staging.acquire(vob_list)
+
+    def title_duration(self, output_name, meta):
+        # The IFO running time beats ffprobe's bitrate-based estimate
+        info = self.title_info.get(output_name)
+        return (info and info["duration"]) or (meta and meta["duration"]) or 0.0
+
+    def mark_done(self, total, output_name=None):
+        with self._lock:
+            self._done += 1
+            done = self._done
+            self._active.pop(output_name, None)
+            if output_name: self._counted.add(output_name)
+        if output_name: self.on_title_progress(output_name, 100.0, 0.0, 0.0, 0.0)
+        self.on_progress(int((done / total) * 100))
+        return done
+
+    def encode_title(self, output_name, vob_list, threads, total, segments=1):
+        """Encodes one title set. Runs on a pool thread. Anything that goes
+        wrong (chapters file, journal, sqlite...) stays with this title:
+        it's logged and counted as finished, and the batch carries on."""
+        try:
+            self._encode_title(output_name, vob_list, threads, total, segments)
+        except Exception as e:
+            self.on_log(f"❌ Error on {output_name}: {type(e).__name__}: {e}")
+            with self._lock:
+                counted = output_name in self._counted
+            if not counted: self.mark_done(total, output_name)
+
+    def _encode_title(self, output_name, vob_list, threads, total, segments=1):
+        # Queued jobs bail out once stop() is pressed
+        if not self.is_running: return
+
+        meta = self.probe_title(output_name, vob_list)
+        duration = self.title_duration(output_name, meta)
+
+        container, outputs = self.pending_outputs(output_name, meta)
+        if not outputs:
+            self.mark_done(total)
+            return
+
+        self.on_log(f"🎥 Converting: {output_name}" +
+                    (f" ({len(outputs)} renditions)" if len(outputs) > 1 else ""))
+
+        started = time.perf_counter()
+        source_files = self.stage_title(output_name, vob_list)
+        chapters_path = os.path.join(self.output_dir, f".{output_name}.chapters.txt")
+        try:
+            concat_string = "concat:" + "|".join(source_files)
+            targets = [(crf, temp_file) for crf, output_file, temp_file in outputs]
+            for crf, temp_file in targets:
+                if os.path.exists(temp_file): os.remove(temp_file)
+
+            spans = self.title_chapters(output_name, meta, duration)
+            chapters_file = None
+            if spans and self.chapter_markers:
+                chapters_file = chapters_path
+                write_ffmetadata(spans, chapters_file)
+
+            plan = self.stream_plan(output_name, meta)
+            if self.keep_audio or self.audio_langs or self.subtitle_langs:
+                self.on_log(f"🔊 {output_name}: {describe_plan(plan)}")
+
+            picture, preset = None, self.preset
+            if self.mode == "remux":
+                cmd = build_remux_cmd(concat_string, meta, targets[0][1], container, chapters_file, plan)
+            else:
+                picture = self.pick_picture(output_name, vob_list, meta, duration)
+                crf, preset = self.pick_settings(output_name, vob_list, meta, duration, picture)
+                targets = [(c or crf, temp_file) for c, temp_file in targets] # Fill in the tuned CRF
+                cmd = self.build_encode_cmd(concat_string, meta, targets, threads, picture,
+                                            chapters_file, keyframe_times(spans), preset, plan)
+
+            if segments > 1:
+                pieces, duration = self.plan_chunks(concat_string, segments, duration)
+            else:
+                pieces = []
+
+            with self._lock:
+                self._active[output_name] = {"duration": duration, "pieces": {}}
+
+            for crf, output_file, temp_file in outputs:
+                self.journal.start(output_file, output_name, self.job_params(crf))
+
+            try:
+                if len(pieces) > 1:
+                    ok = self.encode_chunked(output_name, concat_string, targets, pieces, threads, picture,
+                                             chapters_file, spans, preset, plan)
+                else:
+                    ok = self.run_ffmpeg(cmd, output_name)
+
+                if not ok:
+                    # Killed by stop(): the journal keeps it as unfinished for next time
+                    for crf, output_file, temp_file in outputs:
+                        if os.path.exists(temp_file): os.remove(temp_file)
+                        self.journal.set_state(output_file, STOPPED)
+                    self.record_title(output_name, "stopped", started, vob_list, outputs)
+                    self.on_log(f"⏹️ Stopped: {output_name}")
+                    return
+
+                for crf, output_file, temp_file in outputs:
+                    checksum = file_checksum(temp_file)
+                    size = os.path.getsize(temp_file)
+                    os.replace(temp_file, output_file)
+                    self.journal.finish(output_file, size, checksum)
+                    if spans and self.chapter_clips: self.cut_chapters(output_file, spans, container)
+                    if output_name in self._fingerprint:
+                        self.fingerprints.add(self._fingerprint[output_name], self.job_params(crf),
+                                              output_file, output_name)
+
+                self.record_title(output_name, "done", started, vob_list, outputs)
+                done = self.mark_done(total, output_name)
+                labels = ", ".join(os.path.basename(output_file) for crf, output_file, temp_file in outputs)
+                self.on_log(f"✅ Finished ({done}/{total}): {labels}")
+            except (OSError, subprocess.CalledProcessError) as e:
+                for crf, output_file, temp_file in outputs:
+                    if os.path.exists(temp_file): os.remove(temp_file)
+                    self.journal.set_state(output_file, FAILED, str(e))
+                self.record_title(output_name, "failed", started, vob_list, outputs, str(e))
+                self.mark_done(total, output_name)
+                self.on_log(f"❌ Error: {str(e)}")
+        finally:
+            if self.staging: self.staging.release(source_files)
+            if os.path.exists(chapters_path): os.remove(chapters_path)
+
+    def pending_outputs(self, output_name, meta):
+        """(container, [(crf, output, temp)]) for every rendition of a title
+        that still needs doing. Everything writes to a temp name first; only
+        a complete file gets renamed to the real output name."""
+        container = self.output_container(output_name, meta)
+        outputs = []
+        for suffix, crf in self.renditions():
+            output_file = os.path.join(self.output_dir, f"{output_name}{suffix}.{container}")
+            if self.check_existing(output_name, output_file, crf):
+                outputs.append((crf, output_file, partial_path(output_file)))
+        return container, outputs
+
+    def stream_plan(self, output_name, meta):
+        """Audio/subtitle tracks for a title and how each is handled (see core.streams)."""
+        return plan_streams(meta, self.title_info.get(output_name), self.keep_audio or self.mode == "remux",
+                            self.audio_langs, self.subtitle_langs)
+
+    def output_container(self, output_name, meta):
+        """'mp4', or 'mkv' when the tracks kept (subtitles, LPCM) or a
+        remuxed video codec don't fit in MP4."""
+        plan = self.stream_plan(output_name, meta)
+        if self.mode == "remux": return pick_container(meta, plan)
+        return "mp4" if plan["mp4"] else "mkv"
+
+    def record_title(self, output_name, status, started, vob_list, outputs, error=None, duplicate_of=None):
+        """Puts one title's numbers into the run report and hands them to
+        on_title_stats. Call before mark_done, which drops the progress."""
+        wall = time.perf_counter() - started
+        with self._lock:
+            usage = self._usage.pop(output_name, None) or new_usage()
+            title = self._active.get(output_name) or {}
+        frames = sum(p.get("frame", 0) for p in title.get("pieces", {}).values())
+        duration = title.get("duration") or 0.0
+
+        stats = {
+            "title": output_name,
+            "status": status,
+            "outputs": [os.path.basename(output_file) for crf, output_file, temp_file in outputs],
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "wall_seconds": round(wall, 3),
+            **usage,
+            "bytes_read": sum(os.path.getsize(p) for p in vob_list if os.path.exists(p)),
+            "bytes_written": sum(os.path.getsize(o) for c, o, t in outputs if os.path.exists(o)),
+            "frames": frames,
+            "duration": round(duration, 3),
+            "fps": round(frames / wall, 2) if wall else 0.0,
+            "speed": round(duration / wall, 3) if wall and status == "done" else 0.0,
+            "error": error,
+            "duplicate_of": duplicate_of,
+        }
+        try:
+            if self.report: stats = self.report.record(stats)
+        except OSError as e:
+            self.on_log(f"⚠️ Couldn't write the run report: {e}")
+        self.on_title_stats(stats)
+
+    def title_chapters(self, output_name, meta, duration):
+        """Chapter (start, end) spans for a title: from the IFO's program
+        chains, or whatever chapters ffprobe found. [] if there are none."""
+        if not (self.chapter_markers or self.chapter_clips): return []
+        info = self.title_info.get(output_name)
+        starts = title_set_chapters(info) if info else []
+        if len(starts) < 2 and meta: starts = meta.get("chapters", [])
+        return chapter_spans(starts, duration)
+
+    def cut_chapters(self, output_file, spans, container):
+        """Splits a finished output into <stem>_chapters/<stem>_chNN files.
+        Stream copy only; a failure here leaves the full output alone."""
+        stem = os.path.splitext(os.path.basename(output_file))[0]
+        clip_dir = os.path.join(self.output_dir, f"{stem}_chapters")
+        work_dir = os.path.join(self.output_dir, f".{stem}_chapters.partial")
+        shutil.rmtree(work_dir, ignore_errors=True)
+        os.makedirs(work_dir)
+        try:
+            if not self.run_ffmpeg(build_clip_cmd(output_file, spans, work_dir, stem, container)): return
+            shutil.rmtree(clip_dir, ignore_errors=True)
+            os.replace(work_dir, clip_dir)
+            self.on_log(f"🎬 {len(spans)} chapter clips in {os.path.basename(clip_dir)}")
+        except (OSError, subprocess.CalledProcessError) as e:
+            self.on_log(f"⚠️ Couldn't cut chapter clips for {stem}: {e}")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def renditions(self):
+        """(file name suffix, crf) for each output a title gets. The first
+        one keeps the plain title name, as with a single rendition."""
+        if self.mode == "remux": return [("", None)]
+        # None = tuned per title, filled in once the title's settings are picked
+        primary = None if self.tune_target else self.crf
+        return [("", primary)] + [(f"_crf{crf}", crf) for crf in self.extra_crfs]
+
+    def job_params(self, crf=None):
+        """Settings that shape the output. If any of these change, outputs
+        made with the old values are redone."""
+        if self.mode == "remux": return {"mode": "remux"}
+        if self.tune_target:
+            # Tuned CRF/preset follow from the target (and the cached samples)
+            params = {"mode": self.mode, "tune": self.tune_target}
+            if crf: params["crf"] = crf
+        else:
+            params = {"mode": self.mode, "crf": crf or self.crf, "preset": self.preset}
+        if self.auto_crop: params["crop"] = "auto"
+        # Only when set, so outputs from before these existed aren't redone
+        if self.keep_audio and self.mode != "remux": params["audio"] = "copy"
+        if self.audio_langs: params["audio_langs"] = self.audio_langs
+        if self.subtitle_langs: params["subtitles"] = self.subtitle_langs
+        return params
+
+    def check_existing(self, output_name, output_file, crf=None):
+        """Decides whether a title still needs doing. Clears out stale
+        outputs so they get redone; returns False to skip the title."""
+        label = os.path.basename(output_file)
+        job = self.journal.get(output_file)
+
+        if not os.path.exists(output_file):
+            if job and job["state"] != DONE:
+                self.on_log(f"↩️ Resuming unfinished: {output_name}")
+            return True
+
+        if job is None:
+            # Made before the journal existed (or by hand): nothing to check it against
+            self.on_log(f"⚠️ Skipping existing: {label}")
+            return False
+
+        params = self.job_params(crf)
+        if job["state"] == DONE and job["params"] == params \
+                and job["size"] == os.path.getsize(output_file):
+            self.on_log(f"⚠️ Skipping existing: {label}")
+            return False
+
+        reason = "settings changed" if job["params"] != params else "output incomplete or modified"
+        self.on_log(f"♻️ Redoing {label}: {reason}")
+        os.remove(output_file)
+        return True
+
+    def pick_scan_type(self, output_name, vob_list, meta, duration):
+        """'progressive', 'interlaced' or 'telecine' for a title. Sampled
+        with idet once, then kept in the probe cache with the rest of the
+        title's metadata."""
+        if not self.auto_deinterlace: return "interlaced"
+        if meta and meta.get("scan_type"): return meta["scan_type"]
+        if not supports(self.capabilities(), "idet"): return "interlaced"
+
+        try:
+            scan_type, counts = detect_scan_type("concat:" + "|".join(vob_list), duration)
+        except (OSError, subprocess.CalledProcessError) as e:
+            self.on_log(f"⚠️ Field analysis failed for {output_name}, using yadif: {e}")
+            return "interlaced"
+
+        repeated, progressive = field_ratios(counts)
+        self.on_log(f"🔬 {output_name}: {scan_type} (idet TFF {counts['tff']} / BFF {counts['bff']} / "
+                    f"progressive {counts['progressive']}, repeated fields {counts['top'] + counts['bottom']}; "
+                    f"{repeated:.0%} repeated, {progressive:.0%} progressive)")
+        if meta:
+            meta["scan_type"] = scan_type
+            try:
+                self.probes.update(vob_list, meta)
+            except OSError:
+                pass
+        return scan_type
+
+    def pick_picture(self, output_name, vob_list, meta, duration):
+        """The title's picture filter chain. Deinterlace first, then crop,
+        so field parity is untouched."""
+        caps = self.capabilities()
+        scan_type = self.pick_scan_type(output_name, vob_list, meta, duration)
+        if scan_type == "telecine" and not (supports(caps, "fieldmatch") and supports(caps, "decimate")):
+            scan_type = "interlaced" # No inverse telecine in this build: plain deinterlace still looks fine
+        crop = self.pick_crop(output_name, vob_list, meta, duration)
+        deinterlace = deinterlace_filter(scan_type, supports(caps, "bwdif"))
+        return ",".join(f for f in (deinterlace, crop_filter(crop)) if f)
+
+    def pick_settings(self, output_name, vob_list, meta, duration, picture):
+        """(crf, preset) for a title's main rendition: as chosen, or with a
+        tune target, the fastest settings that meet it on sample encodes.
+        Tuned values are cached with the title's metadata."""
+        if not self.tune_target: return self.crf, self.preset
+        caps = self.capabilities()
+        if not supports(caps, "ssim") or not supports(caps, "psnr"): return self.crf, self.preset
+        if not duration:
+            self.on_log(f"⚠️ Can't tune {output_name} without a duration, using CRF {self.crf} / {self.preset}")
+            return self.crf, self.preset
+
+        # Same target on the same picture chain -> same answer
+        key = json.dumps([self.tune_target, picture], sort_keys=True)
+        cached = (meta or {}).get("tuned", {}).get(key)
+        if cached: return cached["crf"], cached["preset"]
+
+        self.on_log(f"🎯 Tuning {output_name} on sample encodes...")
+        try:
+            result = tune("concat:" + "|".join(vob_list), duration, picture, self.tune_target,
+                          lambda message: self.on_log(f"🎯 {output_name}: {message}"))
+        except (OSError, subprocess.CalledProcessError) as e:
+            self.on_log(f"⚠️ Auto-tune failed for {output_name}, using CRF {self.crf} / {self.preset}: {e}")
+            return self.crf, self.preset
+
+        crf, preset = str(result["crf"]), result["preset"]
+        verdict = "meets the target" if result["met"] else "closest to the target (not met)"
+        self.on_log(f"🎯 {output_name}: {preset} CRF {crf}, {verdict}")
+        if meta:
+            meta.setdefault("tuned", {})[key] = {"crf": crf, "preset": preset}
+            try:
+                self.probes.update(vob_list, meta)
+            except OSError:
+                pass
+        return crf, preset
+
+    def pick_crop(self, output_name, vob_list, meta, duration):
+        """Crop rectangle (w, h, x, y) for a title, or None. Detected once
+        from sampled cropdetect runs and cached with the title's metadata."""
+        if not self.auto_crop or not meta or not meta["video"]: return None
+        if "crop" in meta: return meta["crop"]
+        if not supports(self.capabilities(), "cropdetect"): return None
+
+        video = meta["video"]
+        try:
+            crop = detect_crop("concat:" + "|".join(vob_list), duration, video["width"], video["height"])
+        except (OSError, subprocess.CalledProcessError) as e:
+            self.on_log(f"⚠️ Crop detection failed for {output_name}, encoding full frame: {e}")
+            return None
+
+        if crop: self.on_log(f"✂️ {output_name}: cropping {video['width']}x{video['height']} to {crop[0]}x{crop[1]}")
+        meta["crop"] = crop
+        try:
+            self.probes.update(vob_list, meta)
+        except OSError:
+            pass
+        return crop
+
+    def build_encode_cmd(self, concat_string, meta, outputs, threads, picture="yadif",
+                         chapters_file=None, keyframes=(), preset=None, plan=None):
+        """One ffmpeg run for a title, writing each (crf, file) in outputs.
+        With several renditions the picture is decoded and filtered once and
+        split between the x264 encoders, which share the job's threads.
+        chapters_file (ffmetadata) adds chapter markers; keyframes are forced.
+        plan (see stream_plan) picks the audio/subtitle tracks."""
+        # Streams are already known from the cached probe: map them explicitly.
+        # A quick look is enough unless one of them starts late
+        video = stream_map(meta["video"]) if meta and meta["video"] else "0:v:0"
+        plan = plan or plan_streams(meta)
+        tracks = stream_args(plan)
+
+        cmd = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-nostats",
+            "-progress", "pipe:1",
+            *probe_args(meta, maps_late_tracks(plan)),
+            "-i", concat_string,
+        ]
+        if chapters_file: cmd += ["-f", "ffmetadata", "-i", chapters_file]
+        chain = ",".join(f for f in (picture, "format=yuv420p") if f)
+
+        if len(outputs) == 1:
+            maps = [["-map", video]]
+            cmd += ["-vf", chain]
+        else:
+            labels = [f"[v{i}]" for i in range(len(outputs))]
+            cmd += ["-filter_complex", f"[{video}]{chain},split={len(outputs)}{''.join(labels)}"]
+            maps = [["-map", label] for label in labels]
+
+        for (crf, output_file), output_maps in zip(outputs, maps):
+            cmd += [
+                *output_maps,
+                "-c:v", "libx264", "-crf", crf, "-preset", preset or self.preset,
+                "-threads", str(max(1, threads // len(outputs))),
+                *force_keyframes_args(keyframes),
+                *(["-map_chapters", "1"] if chapters_file else []),
+                *tracks,
+                *(["-movflags", "+faststart"] if output_file.endswith(".mp4") else []),
+                output_file
+            ]
+        return cmd
+
+    def probe_title(self, output_name, vob_list):
+        """Cached ffprobe metadata for a title set (None if it can't be probed)."""
+        try:
+            return self.probes.get(vob_list)
+        except (OSError, ValueError, subprocess.CalledProcessError) as e:
+            self.on_log(f"⚠️ Probe failed for {output_name}: {e}")
+            return None
+
+    def plan_chunks(self, concat_string, segments, duration):
+        try:
+            keyframes, keyframe_duration = probe_keyframes(concat_string)
+        except (OSError, subprocess.CalledProcessError) as e:
+            self.on_log(f"⚠️ Keyframe scan failed, encoding in one piece: {e}")
+            return [], duration
+        if keyframes is None:
+            self.on_log("⚠️ Timestamps restart part way through this title, encoding it in one piece.")
+            return [], duration
+        return plan_segments(keyframes, keyframe_duration, segments), keyframe_duration or duration
+
+    def encode_chunked(self, output_name, concat_string, outputs, pieces, threads, picture="yadif",
+                       chapters_file=None, spans=(), preset=None, plan=None):
+        """Encodes the pieces side by side, then joins them without re-encoding,
+        once per (crf, file) in outputs. Returns False if stop() was pressed
+        part way through."""
+        work_dir = os.path.join(self.output_dir, f".{output_name}.chunks")
+        os.makedirs(work_dir, exist_ok=True)
+
+        # seg_files[rendition][piece]
+        seg_files = [[os.path.join(work_dir, f"seg_{r}_{i:03d}.ts") for i in range(len(pieces))]
+                     for r in range(len(outputs))]
+        # Audio and subtitles go in a side file, joined back onto the video at the end
+        audio_file = os.path.join(work_dir, "streams.mkv")
+        tracks = stream_args(plan or plan_streams(None))
+
+        self.on_log(f"✂️ {output_name}: encoding {len(pieces)} segments in parallel")
+
+        try:
+            with ThreadPoolExecutor(max_workers=len(pieces) + 1) as pool:
+                # Audio is cheap and has no progress worth showing
+                futures = [pool.submit(self.run_ffmpeg, build_audio_cmd(concat_string, audio_file, tracks,
+                                                                       maps_late_tracks(plan)),
+                                       usage_name=output_name)]
+                for i, (start, end) in enumerate(pieces):
+                    targets = [(crf, files[i]) for (crf, output_file), files in zip(outputs, seg_files)]
+                    seg_cmd = build_segment_cmd(concat_string, start, end, targets, preset or self.preset, threads,
+                                                picture, keyframe_times(spans, start, end))
+                    futures.append(pool.submit(self.run_ffmpeg, seg_cmd, output_name, i))
+                results = [f.result() for f in futures]
+            if not all(results): return False
+
+            for r, (crf, output_file) in enumerate(outputs):
+                list_file = os.path.join(work_dir, f"segments_{r}.txt")
+                write_concat_list(seg_files[r], list_file)
+                if not self.run_ffmpeg(build_join_cmd(list_file, audio_file, output_file, chapters_file),
+                                       usage_name=output_name):
+                    return False
+            return True
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def run_ffmpeg(self, cmd, output_name=None, piece=0, usage_name=None):
+        """Runs one ffmpeg process that stop() can kill at any moment.
+        If output_name is given, its -progress output feeds the title's stats.
+        Its CPU/memory/IO go on usage_name's bill (default: output_name).
+        Returns False if it was stopped, raises CalledProcessError on failure."""
+        if not self.is_running: return False
+
+        stdout = subprocess.PIPE if output_name else subprocess.DEVNULL
+        proc = subprocess.Popen(cmd, stdout=stdout, text=True)
+        with self._lock:
+            self._procs.add(proc)
+        # stop() may have run between the check above and registering
+        if not self.is_running: proc.terminate()
+
+        try:
+            if output_name:
+                parser = ProgressParser()
+                for line in proc.stdout:
+                    snapshot = parser.feed(line)
+                    if snapshot: self.report_progress(output_name, piece, snapshot)
+            returncode, usage = wait_with_usage(proc)
+        finally:
+            with self._lock:
+                self._procs.discard(proc)
+
+        usage_name = usage_name or output_name
+        if usage and usage_name:
+            with self._lock:
+                add_usage(self._usage.setdefault(usage_name, new_usage()), usage)
+
+        if not self.is_running: return False
+        if returncode != 0: raise subprocess.CalledProcessError(returncode, cmd)
+        return True
+
+    def report_progress(self, output_name, piece, snapshot):
+        with self._lock:
+            title = self._active.get(output_name)
+            if title is None: return
+            title["pieces"][piece] = snapshot
+
+            # Chunked titles have several pieces running: their encoded
+            # time, fps and speed all add up
+            encoded = sum(p["out_time"] for p in title["pieces"].values())
+            fps = sum(p["fps"] for p in title["pieces"].values())
+            speed = sum(p["speed"] for p in title["pieces"].values())
+            duration = title["duration"]
+
+            fraction = min(1.0, encoded / duration) if duration else 0.0
+            eta = max(0.0, duration - encoded) / speed if duration and speed else -1.0
+            title["fraction"] = fraction
+
+            running = sum(t.get("fraction", 0.0) for t in self._active.values())
+            overall = (self._done + running) / self._total
+
+        self.on_title_progress(output_name, fraction * 100, fps, speed, eta)
+        self.on_progress(int(overall * 100))
+
+    def stop(self):
+        self.is_running = False
+        if self.staging: self.staging.cancel()
+        if self.coordinator: self.coordinator.stop()
+        # Kill whatever is encoding right now rather than waiting for it
+        with self._lock:
+            for proc in self._procs: proc.terminate()
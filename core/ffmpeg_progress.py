@@ -0,0 +1,33 @@
+class ProgressParser:
+    """Reads the key=value blocks ffmpeg writes with '-progress pipe:1'.
+
+    Each block ends with a 'progress=continue' (or 'end') line; feed()
+    returns a snapshot dict at that point and None otherwise.
+    """
+
+    def __init__(self):
+        self.block = {}
+
+    def feed(self, line):
+        key, sep, value = line.strip().partition("=")
+        if not sep: return None
+
+        self.block[key] = value
+        if key != "progress": return None
+
+        block, self.block = self.block, {}
+        return {
+            "frame": int(_number(block.get("frame"))),
+            "fps": _number(block.get("fps")),
+            # out_time_ms is really microseconds too; older builds only have that
+            "out_time": _number(block.get("out_time_us", block.get("out_time_ms"))) / 1000000,
+            "speed": _number(block.get("speed", "").rstrip("x")),
+            "ended": value == "end",
+        }
+
+
+def _number(value):
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return 0.0 # 'N/A' until the first frames are out
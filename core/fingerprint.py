@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+from core.probe import file_signature
+
+# Blocks hashed per title, spread evenly over the whole VOB sequence (plus
+# the very first and last). About 2 MB of reads however long the title is
+SAMPLE_BLOCKS = 32
+BLOCK_SIZE = 64 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    key TEXT PRIMARY KEY,
+    signature TEXT NOT NULL,
+    fingerprint TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS outputs (
+    fingerprint TEXT NOT NULL,
+    params TEXT NOT NULL,
+    output_file TEXT NOT NULL,
+    title TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (fingerprint, params, output_file)
+);
+"""
+
+
+def sample_offsets(total):
+    """Offsets into the concatenated title to hash a block at."""
+    if total <= BLOCK_SIZE * (SAMPLE_BLOCKS + 2): return list(range(0, total, BLOCK_SIZE))
+    step = (total - BLOCK_SIZE) / (SAMPLE_BLOCKS + 1)
+    return [int(step * i) // 2048 * 2048 for i in range(SAMPLE_BLOCKS + 1)] + [total - BLOCK_SIZE]
+
+
+def fingerprint(vob_list):
+    """Content hash of a title: its total size plus sampled blocks.
+
+    Offsets are taken across the VOBs as one stream and file names aren't
+    hashed, so the same title ripped from another copy of the disc (or
+    sitting in another folder) gets the same fingerprint.
+    """
+    sizes = [os.path.getsize(p) for p in vob_list]
+    total = sum(sizes)
+    h = hashlib.blake2b(digest_size=20)
+    h.update(str(total).encode())
+
+    handles = {}
+    try:
+        for offset in sample_offsets(total):
+            # Find which part the offset falls in; blocks may run over the end of it
+            part, base = 0, 0
+            while offset >= base + sizes[part]:
+                base += sizes[part]
+                part += 1
+            remaining = BLOCK_SIZE
+            while remaining and part < len(vob_list):
+                if part not in handles: handles[part] = open(vob_list[part], "rb")
+                f = handles[part]
+                f.seek(offset - base)
+                data = f.read(remaining)
+                h.update(data)
+                remaining -= len(data)
+                offset += len(data)
+                base += sizes[part]
+                part += 1
+    finally:
+        for f in handles.values(): f.close()
+    return h.hexdigest()
+
+
+class FingerprintMap:
+    """Which outputs were made from which content, kept across runs.
+
+    Maps a title fingerprint plus the job params (CRF, preset, mode...) to
+    every finished output made that way, under whatever title name. Also
+    caches each title's fingerprint by VOB path, size and mtime, so
+    unchanged discs aren't read again. Safe to share between threads.
+    """
+
+    def __init__(self, db_path):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def fingerprint(self, vob_list):
+        key = "|".join(vob_list)
+        signature = file_signature(vob_list)
+        with self.lock:
+            row = self.db.execute("SELECT signature, fingerprint FROM fingerprints WHERE key = ?", (key,)).fetchone()
+        if row and row[0] == signature: return row[1]
+
+        value = fingerprint(vob_list)
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO fingerprints (key, signature, fingerprint) VALUES (?, ?, ?)",
+                            (key, signature, value))
+        return value
+
+    def add(self, fingerprint, params, output_file, title):
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO outputs (fingerprint, params, output_file, title, size) VALUES (?, ?, ?, ?, ?)",
+                (fingerprint, json.dumps(params, sort_keys=True), os.path.abspath(output_file), title,
+                 os.path.getsize(output_file)))
+
+    def find(self, fingerprint, params):
+        """An existing output made from this content with these params, as
+        {"output_file", "title", "size"}, or None. Entries whose file has
+        gone or changed size are dropped on the way."""
+        params = json.dumps(params, sort_keys=True)
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT output_file, title, size FROM outputs WHERE fingerprint = ? AND params = ?",
+                (fingerprint, params)).fetchall()
+
+        for output_file, title, size in rows:
+            if os.path.exists(output_file) and os.path.getsize(output_file) == size:
+                return {"output_file": output_file, "title": title, "size": size}
+            with self.lock, self.db:
+                self.db.execute("DELETE FROM outputs WHERE fingerprint = ? AND params = ? AND output_file = ?",
+                                (fingerprint, params, output_file))
+        return None
@@ -0,0 +1,297 @@
+import os
+import struct
+
+# Pure-Python reader for the DVD-Video navigation files:
+#   VIDEO_TS.IFO  (VMG)  - which titles exist and where they live
+#   VTS_xx_0.IFO  (VTS)  - program chains, cells, chapters for one title set
+# Offsets follow the DVD-Video spec as documented on dvd.sourceforge.net.
+
+SECTOR = 2048
+
+# Audio coding modes (top 3 bits of an audio attribute entry)
+AUDIO_CODINGS = {0: "ac3", 2: "mp2", 3: "mp2", 4: "lpcm", 6: "dts"}
+
+
+class IfoError(ValueError):
+    """Raised when an IFO file is missing, truncated or not an IFO at all."""
+
+
+def _u8(data, offset):
+    return data[offset]
+
+
+def _u16(data, offset):
+    return struct.unpack_from(">H", data, offset)[0]
+
+
+def _u32(data, offset):
+    return struct.unpack_from(">I", data, offset)[0]
+
+
+def _bcd(byte):
+    return (byte >> 4) * 10 + (byte & 0x0F)
+
+
+def dvd_time(data, offset):
+    """Decodes the 4-byte BCD playback time (hh mm ss ff) into seconds.
+    The top two bits of the frame byte give the rate: 01 = 25 fps, 11 = 29.97 fps."""
+    hours, minutes, seconds, frames = data[offset:offset + 4]
+    rate = {1: 25.0, 3: 30000 / 1001}.get(frames >> 6)
+    total = _bcd(hours) * 3600 + _bcd(minutes) * 60 + _bcd(seconds)
+    if rate: total += _bcd(frames & 0x3F) / rate
+    return total
+
+
+def _read(path, magic):
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        raise IfoError(f"Can't read {path}: {e}")
+    if len(data) < SECTOR or data[:12] != magic:
+        raise IfoError(f"{os.path.basename(path)} is not a valid {magic.decode()} IFO")
+    return data
+
+
+def parse_vmg_ifo(path):
+    """Reads VIDEO_TS.IFO: one dict per title on the disc."""
+    data = _read(path, b"DVDVIDEO-VMG")
+    try:
+        table = _u32(data, 0xC4) * SECTOR # TT_SRPT
+        titles = []
+        for i in range(_u16(data, table)):
+            entry = table + 8 + i * 12
+            titles.append({
+                "title": i + 1,
+                "angles": _u8(data, entry + 1),
+                "chapters": _u16(data, entry + 2),
+                "vts": _u8(data, entry + 6),
+                "vts_title": _u8(data, entry + 7),
+            })
+        return titles
+    except (IndexError, struct.error):
+        raise IfoError(f"{os.path.basename(path)} is truncated")
+
+
+def parse_vts_ifo(path):
+    """Reads VTS_xx_0.IFO: program chains with durations, cells and chapters.
+
+    'duration' is the running time of every distinct cell in the set (what
+    concatenating the title VOBs actually encodes). 'longest' is the
+    longest single program chain, i.e. the main feature for that set.
+    """
+    data = _read(path, b"DVDVIDEO-VTS")
+    try:
+        video = _u16(data, 0x200)
+        info = {
+            "standard": "PAL" if (video >> 12) & 0x3 == 1 else "NTSC",
+            "aspect": "16:9" if (video >> 10) & 0x3 == 3 else "4:3",
+            "audio_streams": _u16(data, 0x202),
+            "subpicture_streams": _u16(data, 0x254),
+            "audio_attributes": [_audio_attributes(data, 0x204 + i * 8) for i in range(min(_u16(data, 0x202), 8))],
+            "subpicture_attributes": [_subpicture_attributes(data, 0x256 + i * 6)
+                                      for i in range(min(_u16(data, 0x254), 32))],
+            "pgcs": _parse_pgcit(data, _u32(data, 0xCC) * SECTOR),
+        }
+    except (IndexError, struct.error):
+        raise IfoError(f"{os.path.basename(path)} is truncated")
+
+    unique = {}
+    for pgc in info["pgcs"]:
+        for cell in pgc["cells"]:
+            if not cell["angle_skip"]: unique[(cell["vob_id"], cell["cell_id"])] = cell["duration"]
+
+    info["duration"] = sum(unique.values())
+    info["longest"] = max((pgc["duration"] for pgc in info["pgcs"]), default=0.0)
+    info["angles"] = max((pgc["angles"] for pgc in info["pgcs"]), default=1)
+    return info
+
+
+def _language(data, offset, present):
+    code = data[offset:offset + 2]
+    if not present or not code.isalpha(): return "und"
+    return code.decode("ascii").lower()
+
+
+def _audio_attributes(data, offset):
+    coding = _u8(data, offset) >> 5
+    return {
+        "coding": AUDIO_CODINGS.get(coding, "unknown"),
+        "channels": (_u8(data, offset + 1) & 0x07) + 1,
+        "language": _language(data, offset + 2, (_u8(data, offset) >> 2) & 0x3 == 1),
+        # 1 normal, 2 visually impaired, 3/4 director's comments
+        "extension": _u8(data, offset + 5),
+    }
+
+
+def _subpicture_attributes(data, offset):
+    return {
+        "language": _language(data, offset + 2, _u8(data, offset) & 0x3 == 1),
+        # 1 normal, 2 large, 3 children, 5-7 closed captions, 9 forced, 13-15 director's comments
+        "extension": _u8(data, offset + 5),
+    }
+
+
+def _parse_pgcit(data, table):
+    pgcs = []
+    for i in range(_u16(data, table)):
+        entry = table + 8 + i * 8
+        category = _u32(data, entry)
+        pgc = _parse_pgc(data, table + _u32(data, entry + 4))
+        pgc["number"] = i + 1
+        pgc["title"] = (category >> 24) & 0x7F
+        pgc["entry"] = bool(category >> 31)
+        pgcs.append(pgc)
+    return pgcs
+
+
+def _parse_pgc(data, start):
+    programs = _u8(data, start + 0x02)
+    cell_count = _u8(data, start + 0x03)
+    program_map = start + _u16(data, start + 0xE6)
+    playback = start + _u16(data, start + 0xE8)
+    position = start + _u16(data, start + 0xEA)
+
+    cells = []
+    angles = 1
+    block_angles = 0
+    for i in range(cell_count if _u16(data, start + 0xE8) else 0):
+        c = playback + i * 24
+        category = _u8(data, c)
+        block_mode = category >> 6          # 1 = first cell of block, 2 = inside, 3 = last
+        in_angle_block = (category >> 4) & 0x3 == 1
+
+        if in_angle_block:
+            block_angles = 1 if block_mode == 1 else block_angles + 1
+            angles = max(angles, block_angles)
+
+        cells.append({
+            "vob_id": _u16(data, position + i * 4),
+            "cell_id": _u8(data, position + i * 4 + 3),
+            "duration": dvd_time(data, c + 4),
+            "first_sector": _u32(data, c + 8),
+            "last_sector": _u32(data, c + 20),
+            # Only the first angle counts towards running time
+            "angle_skip": in_angle_block and block_mode != 1,
+        })
+
+    # Chapters: each program starts at an entry cell (1-based)
+    chapters = []
+    entry_cells = []
+    for p in range(programs if _u16(data, start + 0xE6) else 0):
+        entry_cell = _u8(data, program_map + p) - 1
+        entry_cells.append(entry_cell)
+        chapters.append(sum((c["duration"] for c in cells[:entry_cell] if not c["angle_skip"]), 0.0))
+
+    # Which MPEG stream each logical track plays from. Audio: one per track.
+    # Subpictures: one each for 4:3, wide, letterbox and pan&scan playback
+    audio_control = []
+    for i in range(8):
+        entry = _u16(data, start + 0x0C + i * 2)
+        audio_control.append((entry >> 8) & 0x07 if entry & 0x8000 else None)
+    subpicture_control = []
+    for i in range(32):
+        entry = _u32(data, start + 0x1C + i * 4)
+        subpicture_control.append({"4:3": (entry >> 24) & 0x1F, "wide": (entry >> 16) & 0x1F,
+                                   "letterbox": (entry >> 8) & 0x1F, "panscan": entry & 0x1F}
+                                  if entry & 0x80000000 else None)
+
+    return {
+        "duration": dvd_time(data, start + 0x04),
+        "audio_control": audio_control,
+        "subpicture_control": subpicture_control,
+        "cells": cells,
+        "chapters": chapters,
+        "entry_cells": entry_cells,
+        "angles": angles,
+    }
+
+
+def title_set_chapters(info):
+    """Chapter starts (seconds) on the timeline you get by concatenating the
+    set's VOBs: every distinct cell once, in disc order. Chapters of all
+    program chains are merged, so a set holding several episodes still
+    gets a marker at the start of each one."""
+    cells = {}
+    for pgc in info["pgcs"]:
+        for cell in pgc["cells"]:
+            if not cell["angle_skip"]: cells[(cell["vob_id"], cell["cell_id"])] = cell
+
+    starts = {}
+    position = 0.0
+    for key, cell in sorted(cells.items(), key=lambda item: item[1]["first_sector"]):
+        starts[key] = position
+        position += cell["duration"]
+
+    chapters = set()
+    for pgc in info["pgcs"]:
+        for entry in pgc["entry_cells"]:
+            if entry >= len(pgc["cells"]): continue
+            cell = pgc["cells"][entry]
+            key = (cell["vob_id"], cell["cell_id"])
+            if key in starts: chapters.add(round(starts[key], 3))
+    return sorted(chapters)
+
+
+def title_set_tracks(info):
+    """Audio and subtitle tracks as the disc menu lists them, with the
+    MPEG stream number each plays from (the low bits of ffprobe's stream
+    id: 0x80+n for AC3, 0xA0+n for LPCM, 0x20+n for subtitles...).
+
+    Returns {"audio": [{"stream", "language", ...}], "subtitles": [...]}.
+    Subtitles use the 4:3 or wide stream to match the title's aspect, so
+    letterbox/pan&scan copies of the same track aren't listed twice.
+    """
+    audio, subtitles = [], []
+    # Any program chain that enables a track says where it lives
+    for pgc in info["pgcs"]:
+        for i, attributes in enumerate(info.get("audio_attributes", [])):
+            stream = pgc["audio_control"][i]
+            if stream is not None and i not in [t["track"] for t in audio]:
+                audio.append(dict(attributes, track=i, stream=stream))
+        for i, attributes in enumerate(info.get("subpicture_attributes", [])):
+            control = pgc["subpicture_control"][i]
+            if control is not None and i not in [t["track"] for t in subtitles]:
+                stream = control["wide"] if info["aspect"] == "16:9" else control["4:3"]
+                subtitles.append(dict(attributes, track=i, stream=stream))
+    audio.sort(key=lambda t: t["track"])
+    subtitles.sort(key=lambda t: t["track"])
+    return {"audio": audio, "subtitles": subtitles}
+
+
+def find_vts_ifo(folder, title_id):
+    """Locates VTS_<title_id>_0.IFO in folder, falling back to the .BUP copy
+    (same layout, kept on the disc in case the IFO sectors are damaged)."""
+    wanted = [f"VTS_{int(title_id):02d}_0.IFO", f"VTS_{int(title_id):02d}_0.BUP"]
+    try:
+        names = {name.upper(): name for name in os.listdir(folder)}
+    except OSError:
+        return []
+    return [os.path.join(folder, names[w]) for w in wanted if w in names]
+
+
+def disc_titles(folder):
+    """Titles from the folder's VIDEO_TS.IFO (or its .BUP copy), or None if
+    neither can be read."""
+    try:
+        names = {name.upper(): name for name in os.listdir(folder)}
+    except OSError:
+        return None
+    for wanted in ("VIDEO_TS.IFO", "VIDEO_TS.BUP"):
+        if wanted not in names: continue
+        try:
+            return parse_vmg_ifo(os.path.join(folder, names[wanted]))
+        except IfoError:
+            continue
+    return None
+
+
+def title_set_info(folder, title_id):
+    """Parsed VTS info for a title set, trying the IFO then the BUP.
+    Returns None if neither can be read."""
+    for path in find_vts_ifo(folder, title_id):
+        try:
+            return parse_vts_ifo(path)
+        except IfoError:
+            continue
+    return None
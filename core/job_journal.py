@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    output_file TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    params TEXT NOT NULL,
+    state TEXT NOT NULL,
+    size INTEGER,
+    checksum TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL
+);
+"""
+
+# Job states. Anything other than DONE is unfinished and gets redone next run.
+RUNNING = "running"
+STOPPED = "stopped"
+FAILED = "failed"
+DONE = "done"
+
+
+def partial_path(output_file):
+    """Temp name an encode writes to before being renamed into place.
+    Keeps the real extension last so ffmpeg still picks the right muxer."""
+    folder, name = os.path.split(output_file)
+    stem, ext = os.path.splitext(name)
+    return os.path.join(folder, f".{stem}.partial{ext}")
+
+
+def file_checksum(path, block_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class JobJournal:
+    """Persistent record of every output: the settings it was made with,
+    how far it got and the checksum of the finished file.
+
+    Safe to share between the encode pool threads.
+    """
+
+    def __init__(self, db_path):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def get(self, output_file):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT title, params, state, size, checksum, error FROM jobs WHERE output_file = ?",
+                (os.path.abspath(output_file),)).fetchone()
+        if row is None: return None
+        title, params, state, size, checksum, error = row
+        return {"title": title, "params": json.loads(params), "state": state,
+                "size": size, "checksum": checksum, "error": error}
+
+    def start(self, output_file, title, params):
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO jobs (output_file, title, params, state, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (os.path.abspath(output_file), title, json.dumps(params, sort_keys=True), RUNNING, time.time()))
+
+    def set_state(self, output_file, state, error=None):
+        with self.lock, self.db:
+            self.db.execute("UPDATE jobs SET state = ?, error = ?, updated_at = ? WHERE output_file = ?",
+                            (state, error, time.time(), os.path.abspath(output_file)))
+
+    def finish(self, output_file, size, checksum):
+        with self.lock, self.db:
+            self.db.execute(
+                "UPDATE jobs SET state = ?, size = ?, checksum = ?, error = NULL, updated_at = ? "
+                "WHERE output_file = ?",
+                (DONE, size, checksum, time.time(), os.path.abspath(output_file)))
+
+    def unfinished(self, output_dir):
+        """Titles under output_dir that were started but never completed."""
+        prefix = os.path.join(os.path.abspath(output_dir), "")
+        with self.lock:
+            rows = self.db.execute("SELECT output_file, title FROM jobs WHERE state != ?", (DONE,)).fetchall()
+        return [title for path, title in rows if path.startswith(prefix)]
@@ -0,0 +1,205 @@
+import json
+import os
+import sqlite3
+import subprocess
+import threading
+
+# The one-off probe reads deep so late-starting audio/subtitle streams on
+# DVDs are still found, then takes a quick look to see which streams the
+# small probe finds too. Encodes reuse the result: a run that maps a stream
+# only the deep probe found ("late") has to read as deep again, anything
+# else (the video, the main audio) gets by with the small probe.
+FULL_PROBE_SIZE = "100M"
+QUICK_PROBE_SIZE = "5M"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS probes (
+    key TEXT PRIMARY KEY,
+    signature TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS validations (
+    key TEXT PRIMARY KEY,
+    signature TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+"""
+
+
+def concat_input(vob_list):
+    return "concat:" + "|".join(vob_list)
+
+
+def file_signature(vob_list):
+    """Path, size and mtime of every VOB: if any of them change, re-probe."""
+    signature = []
+    for path in vob_list:
+        st = os.stat(path)
+        signature.append([path, st.st_size, st.st_mtime])
+    return json.dumps(signature)
+
+
+def quick_stream_ids(vob_list):
+    """Ids (or indexes, where there's no id) of the streams a quick probe
+    finds. None if it fails: then every stream counts as late."""
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-analyzeduration", QUICK_PROBE_SIZE, "-probesize", QUICK_PROBE_SIZE,
+        "-show_entries", "stream=index,id", "-of", "json",
+        concat_input(vob_list)
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        streams = json.loads(result.stdout or "{}").get("streams", [])
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        return None
+    return {s.get("id") or s.get("index") for s in streams}
+
+
+def run_ffprobe(vob_list):
+    """Probes a title set once and boils the result down to what we use.
+    Each stream's "late" says the quick probe didn't find it."""
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-analyzeduration", FULL_PROBE_SIZE, "-probesize", FULL_PROBE_SIZE,
+        "-show_streams", "-show_format", "-show_chapters", "-of", "json",
+        concat_input(vob_list)
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    raw = json.loads(result.stdout or "{}")
+    quick = quick_stream_ids(vob_list) or set()
+
+    meta = {
+        "duration": float(raw.get("format", {}).get("duration") or 0),
+        "video": None,
+        "audio": [],
+        "subtitles": [],
+        # Chapter starts, if the container has any (VOBs themselves don't;
+        # their chapters come from the IFO)
+        "chapters": [float(c["start_time"]) for c in raw.get("chapters", []) if "start_time" in c],
+    }
+
+    for stream in raw.get("streams", []):
+        kind = stream.get("codec_type")
+        common = {
+            "index": stream.get("index"),
+            "id": stream.get("id"), # MPEG-PS stream id, e.g. 0x1e0 / 0x80
+            "codec": stream.get("codec_name"),
+            "language": stream.get("tags", {}).get("language", "und"),
+            "late": (stream.get("id") or stream.get("index")) not in quick,
+        }
+
+        if kind == "video" and meta["video"] is None:
+            common.update({
+                "width": stream.get("width"),
+                "height": stream.get("height"),
+                "field_order": stream.get("field_order", "unknown"),
+                "frame_rate": stream.get("r_frame_rate"),
+                "aspect": stream.get("display_aspect_ratio"),
+            })
+            meta["video"] = common
+        elif kind == "audio":
+            common.update({
+                "channels": stream.get("channels"),
+                "sample_rate": stream.get("sample_rate"),
+            })
+            meta["audio"].append(common)
+        elif kind == "subtitle":
+            meta["subtitles"].append(common)
+
+    return meta
+
+
+def is_late(stream):
+    """True if only the deep probe found this stream (or the cached probe
+    is from before streams were marked)."""
+    return stream.get("late", True)
+
+
+def probe_args(meta, late_tracks=True):
+    """-analyzeduration/-probesize for an ffmpeg run on a title. Quick when
+    the quick probe found the video too and no late track is mapped
+    (late_tracks=False, see core.streams.maps_late_tracks)."""
+    quick = meta and meta["video"] and not is_late(meta["video"]) and not late_tracks
+    size = QUICK_PROBE_SIZE if quick else FULL_PROBE_SIZE
+    return ["-analyzeduration", size, "-probesize", size]
+
+
+def stream_map(stream):
+    """'-map' target for a probed stream. Maps by stream id rather than
+    index, since index order can shift when ffmpeg probes less deeply."""
+    return f"0:i:{stream['id']}" if stream.get("id") else f"0:{stream['index']}"
+
+
+class ProbeCache:
+    """ffprobe results per title set, stored in SQLite and keyed by the
+    VOB paths. Entries are reused while every file's size and mtime match.
+
+    Safe to share between the encode pool threads.
+    """
+
+    def __init__(self, db_path):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def get(self, vob_list):
+        """Cached metadata for vob_list, probing on a miss. Raises OSError /
+        CalledProcessError if ffprobe can't read the files."""
+        key = "|".join(vob_list)
+        signature = file_signature(vob_list)
+
+        with self.lock:
+            row = self.db.execute("SELECT signature, data FROM probes WHERE key = ?", (key,)).fetchone()
+        if row and row[0] == signature:
+            meta = json.loads(row[1])
+            # Entries from before streams were marked late get probed again
+            if not meta["video"] or "late" in meta["video"]: return meta
+
+        meta = run_ffprobe(vob_list)
+        self.update(vob_list, meta, signature)
+        return meta
+
+    def update(self, vob_list, meta, signature=None):
+        """Stores (or replaces) the metadata for a title set."""
+        key = "|".join(vob_list)
+        signature = signature or file_signature(vob_list)
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO probes (key, signature, data) VALUES (?, ?, ?)",
+                            (key, signature, json.dumps(meta)))
+
+    def get_validation(self, vob_list):
+        """Cached vob_validator result for a title set, or None if the files changed."""
+        key = "|".join(vob_list)
+        with self.lock:
+            row = self.db.execute("SELECT signature, data FROM validations WHERE key = ?", (key,)).fetchone()
+        if row and row[0] == file_signature(vob_list): return json.loads(row[1])
+        return None
+
+    def store_validation(self, vob_list, result):
+        key = "|".join(vob_list)
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO validations (key, signature, data) VALUES (?, ?, ?)",
+                            (key, file_signature(vob_list), json.dumps(result)))
+
+
+def describe(meta):
+    """One-line human summary for the log window."""
+    minutes, seconds = divmod(int(meta["duration"]), 60)
+    parts = [f"{minutes // 60}h{minutes % 60:02d}m{seconds:02d}s"]
+
+    video = meta["video"]
+    if video:
+        parts.append(f"{video['codec']} {video['width']}x{video['height']} "
+                     f"{video['field_order']} {video['frame_rate']}")
+
+    if meta["audio"]:
+        tracks = ", ".join(f"{a['codec']} {a['channels']}ch {a['language']}" for a in meta["audio"])
+        parts.append(f"audio: {tracks}")
+    if meta["subtitles"]:
+        parts.append(f"{len(meta['subtitles'])} subtitle track(s)")
+
+    return " | ".join(parts)
@@ -0,0 +1,55 @@
+from core.probe import stream_map, probe_args
+from core.streams import plan_streams, stream_args, maps_late_tracks
+
+# Video codecs ffmpeg's MP4 muxer will take as-is. Audio and subtitles are
+# up to the stream plan (see core.streams); anything MP4 can't hold means
+# the remux goes into MKV instead.
+MP4_CODECS = {"mpeg1video", "mpeg2video", "h264"}
+
+
+def pick_container(meta, plan=None):
+    """'mp4' if every stream we're copying fits in MP4, else 'mkv'.
+    Unprobed titles go to MKV since it will hold whatever is in there."""
+    if not meta or not meta["video"]: return "mkv"
+    plan = plan or plan_streams(meta, copy_audio=True)
+    return "mp4" if meta["video"]["codec"] in MP4_CODECS and plan["mp4"] else "mkv"
+
+
+def build_remux_cmd(concat_string, meta, output_file, container, chapters_file=None, plan=None):
+    """Stream-copies a title set into one file at disk speed.
+
+    VOB timestamps restart at cell and VOB boundaries and MPEG-2 B-frames
+    often carry no PTS, so regenerate missing timestamps and shift the
+    start to zero. Damaged packets are dropped instead of stopping the copy.
+    chapters_file (ffmetadata) adds chapter markers. plan (see core.streams)
+    picks the audio/subtitle tracks; by default the first audio track.
+    """
+    if meta and meta["video"]:
+        plan = plan or plan_streams(meta, copy_audio=True)
+        maps = ["-map", stream_map(meta["video"])] + stream_args(plan)
+    else:
+        plan = None
+        maps = ["-map", "0:v:0", "-map", "0:a:0?", "-c:a", "copy"]
+
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-nostats",
+        "-progress", "pipe:1",
+        "-fflags", "+genpts+discardcorrupt",
+        *probe_args(meta, maps_late_tracks(plan)),
+        "-i", concat_string,
+    ]
+    if chapters_file: cmd += ["-f", "ffmetadata", "-i", chapters_file, "-map_chapters", "1"]
+
+    cmd += [
+        "-c:v", "copy",
+        *maps,
+        "-avoid_negative_ts", "make_zero",
+        "-max_muxing_queue_size", "4096",
+    ]
+
+    if container == "mp4":
+        cmd += ["-movflags", "+faststart", "-f", "mp4"]
+    else:
+        cmd += ["-f", "matroska"]
+
+    return cmd + [output_file]
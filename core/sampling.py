@@ -0,0 +1,7 @@
+def sample_starts(duration, count, seconds, margin=0.1):
+    """Start times of `count` windows, `seconds` long, spread evenly over a
+    title but skipping `margin` of it at each end (logos, credits, fades to
+    black). A title too short for that gets one window from the start."""
+    if duration <= seconds * count: return [0.0]
+    usable = duration * (1 - 2 * margin) - seconds
+    return [duration * margin + usable * i / max(count - 1, 1) for i in range(count)]
@@ -0,0 +1,154 @@
+import json
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+VOB_PATTERN = re.compile(r"VTS_(\d+)_(\d+)\.VOB", re.IGNORECASE)
+
+# Directory listing is I/O bound (especially on a NAS), so use plenty of threads
+SCAN_THREADS = 16
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    subdirs TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS title_sets (
+    dir TEXT NOT NULL,
+    title_id TEXT NOT NULL,
+    files TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    PRIMARY KEY (dir, title_id)
+);
+CREATE TABLE IF NOT EXISTS scans (
+    root TEXT PRIMARY KEY,
+    scanned_at REAL NOT NULL
+);
+"""
+
+
+def list_dir(path):
+    """One scandir pass: returns (subdirs, {title_id: [(path, size), ...]})."""
+    subdirs = []
+    groups = {}
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+                continue
+
+            match = VOB_PATTERN.match(entry.name)
+            if not match: continue
+            if int(match.group(2)) == 0: continue # Skip menus
+
+            groups.setdefault(match.group(1), []).append((entry.path, entry.stat().st_size))
+
+    for files in groups.values(): files.sort()
+    return sorted(subdirs), groups
+
+
+class ScanIndex:
+    """On-disk index of VIDEO_TS title sets, keyed by directory path + mtime.
+
+    A directory whose mtime hasn't changed since the last scan is answered
+    from the index with a single stat() call; only changed directories get
+    listed again. Pass ':memory:' to get the parallel walk without persistence.
+    """
+
+    def __init__(self, db_path):
+        self.db = sqlite3.connect(db_path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def scan(self, root):
+        """Walks root and returns {dir: {title_id: [vob paths]}}.
+        Also returns how many directories actually had to be re-listed."""
+        root = os.path.abspath(root)
+        known = {path: (mtime, json.loads(subdirs))
+                 for path, mtime, subdirs in self.db.execute(
+                     "SELECT path, mtime, subdirs FROM dirs WHERE path = ? OR path LIKE ? ESCAPE '\\'",
+                     (root, _prefix(root)))}
+
+        seen = set()
+        changed = {}
+        level = [root]
+
+        with ThreadPoolExecutor(max_workers=SCAN_THREADS) as pool:
+            while level:
+                next_level = []
+                for path, result in zip(level, pool.map(lambda p: self._visit(p, known), level)):
+                    if result is None: continue # Vanished or unreadable
+                    seen.add(path)
+                    subdirs, listing = result
+                    if listing is not None: changed[path] = listing
+                    next_level.extend(subdirs)
+                level = next_level
+
+        self._store(root, known, seen, changed)
+        return self.title_sets(root), len(changed)
+
+    def _visit(self, path, known):
+        # Runs on a pool thread: filesystem only, no database access
+        try:
+            mtime = os.stat(path).st_mtime
+            cached = known.get(path)
+            if cached and cached[0] == mtime: return cached[1], None
+            subdirs, groups = list_dir(path)
+            return subdirs, (mtime, subdirs, groups)
+        except OSError:
+            return None
+
+    def _store(self, root, known, seen, changed):
+        now = time.time()
+        with self.db:
+            # Directories that disappeared since last time
+            for path in set(known) - seen:
+                self.db.execute("DELETE FROM dirs WHERE path = ?", (path,))
+                self.db.execute("DELETE FROM title_sets WHERE dir = ?", (path,))
+
+            for path, (mtime, subdirs, groups) in changed.items():
+                self.db.execute(
+                    "INSERT OR REPLACE INTO dirs (path, mtime, subdirs) VALUES (?, ?, ?)",
+                    (path, mtime, json.dumps(subdirs)))
+                self.db.execute(
+                    f"DELETE FROM title_sets WHERE dir = ? AND title_id NOT IN ({','.join('?' * len(groups))})",
+                    (path, *groups))
+                for title_id, files in groups.items():
+                    # Keep first_seen for sets that were already indexed
+                    self.db.execute(
+                        "INSERT INTO title_sets (dir, title_id, files, first_seen) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (dir, title_id) DO UPDATE SET files = excluded.files",
+                        (path, title_id, json.dumps(files), now))
+
+            self.db.execute(
+                "INSERT OR REPLACE INTO scans (root, scanned_at) VALUES (?, ?)", (root, now))
+
+    def title_sets(self, root, since=None):
+        """Indexed title sets under root, optionally only those first seen after `since`."""
+        root = os.path.abspath(root)
+        query = "SELECT dir, title_id, files FROM title_sets WHERE (dir = ? OR dir LIKE ? ESCAPE '\\')"
+        params = [root, _prefix(root)]
+        if since is not None:
+            query += " AND first_seen > ?"
+            params.append(since)
+
+        found = {}
+        for path, title_id, files in self.db.execute(query + " ORDER BY dir, title_id", params):
+            found.setdefault(path, {})[title_id] = [p for p, size in json.loads(files)]
+        return found
+
+    def last_scanned(self, root):
+        row = self.db.execute("SELECT scanned_at FROM scans WHERE root = ?",
+                              (os.path.abspath(root),)).fetchone()
+        return row[0] if row else None
+
+
+def _prefix(root):
+    # LIKE pattern for everything below root (escape the wildcards in real paths)
+    escaped = root.rstrip(os.sep).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + os.sep.replace("\\", "\\\\") + "%"
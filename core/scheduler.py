@@ -0,0 +1,28 @@
+import os
+
+# x264 stops scaling well past ~6 threads on SD (720x480/576) material:
+# there are only 30-36 macroblock rows per frame to share out. Past that
+# point it is faster to run more ffmpeg processes side by side.
+SD_THREADS_PER_JOB = 6
+
+
+def plan_jobs(title_count, max_jobs=0, cpu_count=None):
+    """Works out how many ffmpeg jobs to run at once and how many
+    x264 threads each one gets.
+
+    max_jobs=0 means 'pick automatically from the core count'.
+    Returns (jobs, threads_per_job).
+    """
+    cores = cpu_count or os.cpu_count() or 1
+
+    if max_jobs and int(max_jobs) > 0:
+        jobs = int(max_jobs)
+    else:
+        jobs = cores // SD_THREADS_PER_JOB
+
+    # Never more jobs than titles (idle slots) or cores (oversubscribed)
+    jobs = max(1, min(jobs, title_count, cores))
+
+    # Hand the whole machine out evenly between the running jobs
+    threads = max(1, cores // jobs)
+    return jobs, threads
@@ -0,0 +1,163 @@
+import hashlib
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# One big sequential read at a time is what optical drives and SMB/NFS
+# shares like best; ffmpeg's own reads through concat: are 32 KB
+COPY_BLOCK = 8 * 1024 * 1024
+
+
+def copy_sequential(source, dest, cancelled):
+    """Copies one file in COPY_BLOCK reads. Returns bytes copied, or None
+    if cancelled part way (the half-written file is removed)."""
+    copied = 0
+    with open(source, "rb", buffering=0) as src, open(dest, "wb") as dst:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(src.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        buffer = bytearray(COPY_BLOCK)
+        view = memoryview(buffer)
+        while True:
+            if cancelled.is_set(): break
+            n = src.readinto(buffer)
+            if not n: return copied
+            dst.write(view[:n])
+            copied += n
+    os.remove(dest)
+    return None
+
+
+class StagingCache:
+    """Copies upcoming titles' VOBs to local scratch space while the current
+    title encodes, so ffmpeg reads from local disk instead of a slow drive
+    or network share.
+
+    Titles are staged one at a time on a background thread. Staged titles
+    stay until the cache is over `max_bytes`; then the least recently used
+    ones that nothing is reading from get evicted.
+    """
+
+    def __init__(self, scratch_dir, max_bytes, on_log=None):
+        self.scratch_dir = scratch_dir
+        self.max_bytes = max_bytes
+        self.on_log = on_log or (lambda message: None)
+        self.entries = OrderedDict() # key -> {"paths", "size", "users"}, oldest first
+        self.pending = {}            # key -> future of a copy in flight
+        self.stall_seconds = 0.0     # Time encodes spent waiting on the prefetcher
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=1)
+        os.makedirs(scratch_dir, exist_ok=True)
+
+    @staticmethod
+    def key(vob_list):
+        # Same files, same sizes and mtimes -> same staged copy
+        h = hashlib.sha1()
+        for path in vob_list:
+            st = os.stat(path)
+            h.update(f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+        return h.hexdigest()[:16]
+
+    def prefetch(self, vob_list):
+        """Queues a title for staging. Does nothing if it's already staged or queued."""
+        try:
+            key = self.key(vob_list)
+        except OSError:
+            return
+        with self._lock:
+            if key in self.entries or key in self.pending: return
+            self.pending[key] = self._pool.submit(self._stage, key, vob_list)
+
+    def acquire(self, vob_list):
+        """Paths for ffmpeg to read: the staged copies if this title was
+        prefetched (waiting for the copy to finish if it's still going),
+        otherwise the originals. Pair every call with release()."""
+        try:
+            key = self.key(vob_list)
+        except OSError:
+            return vob_list
+
+        with self._lock:
+            future = self.pending.get(key)
+        if future is not None:
+            start = time.perf_counter()
+            future.result()
+            waited = time.perf_counter() - start
+            if waited >= 0.1:
+                with self._lock: self.stall_seconds += waited
+                self.on_log(f"⏳ Waited {waited:.1f}s for staging to catch up.")
+
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None: return vob_list
+            entry["users"] += 1
+            self.entries.move_to_end(key)
+            return entry["paths"]
+
+    def release(self, paths):
+        with self._lock:
+            for entry in self.entries.values():
+                if entry["paths"] == paths:
+                    entry["users"] -= 1
+                    break
+
+    def cancel(self):
+        """Abandons the copy in flight; queued ones bail out straight away."""
+        self._cancelled.set()
+
+    def close(self):
+        """Stops any copy in flight and deletes everything staged."""
+        self.cancel()
+        self._pool.shutdown(wait=True)
+        with self._lock:
+            for key in list(self.entries):
+                shutil.rmtree(os.path.join(self.scratch_dir, key), ignore_errors=True)
+            self.entries.clear()
+
+    def _make_room(self, size):
+        """Evicts least recently used, unused titles until `size` more bytes
+        fit. Returns False if it can't be done without touching titles in use."""
+        with self._lock:
+            used = sum(e["size"] for e in self.entries.values())
+            for key in list(self.entries):
+                if used + size <= self.max_bytes: break
+                entry = self.entries[key]
+                if entry["users"]: continue
+                shutil.rmtree(os.path.join(self.scratch_dir, key), ignore_errors=True)
+                used -= entry["size"]
+                del self.entries[key]
+            return used + size <= self.max_bytes
+
+    def _stage(self, key, vob_list):
+        try:
+            size = sum(os.path.getsize(p) for p in vob_list)
+            if not self._make_room(size):
+                self.on_log(f"⚠️ Staging cache full, reading {os.path.basename(vob_list[0])} from source.")
+                return
+
+            folder = os.path.join(self.scratch_dir, key)
+            os.makedirs(folder, exist_ok=True)
+            start = time.perf_counter()
+            paths = []
+            for source in vob_list:
+                dest = os.path.join(folder, os.path.basename(source))
+                if copy_sequential(source, dest, self._cancelled) is None:
+                    shutil.rmtree(folder, ignore_errors=True)
+                    return
+                paths.append(dest)
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                self.entries[key] = {"paths": paths, "size": size, "users": 0}
+            rate = size / elapsed / 1e6 if elapsed else 0.0
+            self.on_log(f"📥 Staged {os.path.basename(vob_list[0])} (+{len(vob_list) - 1}): "
+                        f"{size / 1e9:.2f} GB in {elapsed:.1f}s ({rate:.0f} MB/s)")
+        except OSError as e:
+            shutil.rmtree(os.path.join(self.scratch_dir, key), ignore_errors=True)
+            self.on_log(f"⚠️ Staging failed, reading from source instead: {e}")
+        finally:
+            with self._lock:
+                self.pending.pop(key, None)
@@ -0,0 +1,141 @@
+from core.ifo_parser import title_set_tracks
+from core.probe import stream_map, is_late
+
+# Audio that MP4 takes as-is; Matroska takes all of these too
+MP4_AUDIO = {"ac3", "eac3", "mp2", "mp3", "aac", "dts"}
+# DVD LPCM can't be stream-copied into anything but a VOB. It goes into
+# MKV as FLAC instead: still lossless, and cheap to encode
+LPCM = {"pcm_dvd", "pcm_s16be", "pcm_s16le", "pcm_s24be", "pcm_s24le"}
+
+AAC_BITRATE = "192k"
+
+# IFOs give ISO 639-1 codes; MP4/MKV want ISO 639-2 (bibliographic)
+ISO639_2 = {
+    "en": "eng", "fr": "fre", "de": "ger", "es": "spa", "it": "ita", "pt": "por", "nl": "dut",
+    "sv": "swe", "da": "dan", "no": "nor", "fi": "fin", "is": "ice", "pl": "pol", "cs": "cze",
+    "sk": "slo", "hu": "hun", "ro": "rum", "el": "gre", "tr": "tur", "ru": "rus", "uk": "ukr",
+    "he": "heb", "ar": "ara", "hi": "hin", "th": "tha", "zh": "chi", "ja": "jpn", "ko": "kor",
+    # Terminology codes people type for the same languages
+    "fra": "fre", "deu": "ger", "nld": "dut", "ces": "cze", "slk": "slo", "ron": "rum",
+    "ell": "gre", "isl": "ice", "zho": "chi",
+}
+
+# IFO code extensions worth a track title
+AUDIO_TITLES = {2: "Visually Impaired", 3: "Commentary", 4: "Commentary"}
+SUBTITLE_TITLES = {5: "Captions", 6: "Captions", 7: "Captions", 9: "Forced", 13: "Commentary",
+                   14: "Commentary", 15: "Commentary"}
+
+
+def language_code(code):
+    code = (code or "und").strip().lower()
+    return ISO639_2.get(code, code)
+
+
+def parse_languages(text):
+    """'' -> [] (default tracks only), 'all' -> ['all'], 'en, fra' -> ['eng', 'fre']."""
+    codes = [c for c in (text or "").replace(";", ",").split(",") if c.strip()]
+    if any(c.strip().lower() == "all" for c in codes): return ["all"]
+    return [language_code(c) for c in codes]
+
+
+def _stream_number(stream, mask):
+    """Low bits of the MPEG-PS stream id (0x82 -> 2), or None if unknown."""
+    try:
+        return int(str(stream.get("id")), 16) & mask
+    except (TypeError, ValueError):
+        return None
+
+
+def _pick(tracks, languages, default_first):
+    if not tracks: return []
+    if "all" in languages: return list(tracks)
+    if languages:
+        picked = [t for t in tracks if t["language"] in languages]
+        if picked or not default_first: return picked
+    return tracks[:1] if default_first else []
+
+
+def _tracks(streams, ifo_tracks, mask, titles):
+    """Probed streams with languages and titles from the IFO's track list.
+    Streams no track plays from (leftovers, letterbox/pan&scan twins of a
+    listed subtitle) are dropped, unless the IFO matches none of them."""
+    by_stream = {t["stream"]: t for t in ifo_tracks}
+    tracks = []
+    for stream in streams:
+        ifo = by_stream.get(_stream_number(stream, mask))
+        language = stream["language"] if stream["language"] != "und" else (ifo or {}).get("language")
+        tracks.append({"stream": stream, "language": language_code(language),
+                       "title": titles.get((ifo or {}).get("extension")), "listed": ifo is not None})
+    if any(t["listed"] for t in tracks): tracks = [t for t in tracks if t["listed"]]
+    return tracks
+
+
+def plan_streams(meta, info=None, copy_audio=False, audio_langs=(), subtitle_langs=()):
+    """Which audio and subtitle tracks of a title go into the output, and how.
+
+    audio_langs: [] for the first track only, ['all'], or language codes
+    (falling back to the first track if none match). subtitle_langs: the
+    same, but [] means none. Languages come from the IFO where the probe
+    has none (VOBs don't carry language tags).
+
+    Audio is copied where copy_audio is set and the codec allows, LPCM
+    becomes FLAC, everything else AAC. Returns {"audio": [{"stream",
+    "codec", "language", "title"}], "subtitles": [...], "mp4": bool},
+    where mp4 says whether MP4 can hold it all (else the output is MKV).
+    """
+    if not meta: return {"audio": [], "subtitles": [], "mp4": True, "copy_audio": copy_audio}
+
+    ifo = title_set_tracks(info) if info else {"audio": [], "subtitles": []}
+    audio = _tracks(meta["audio"], ifo["audio"], 0x07, AUDIO_TITLES)
+    subtitles = _tracks(meta["subtitles"], ifo["subtitles"], 0x1F, SUBTITLE_TITLES)
+
+    audio = _pick(audio, audio_langs, default_first=True)
+    subtitles = _pick(subtitles, subtitle_langs, default_first=False)
+
+    for track in audio:
+        codec = track["stream"]["codec"]
+        if codec in LPCM:
+            track["codec"] = "flac" if copy_audio else "aac"
+        else:
+            track["codec"] = "copy" if copy_audio and codec in MP4_AUDIO else "aac"
+
+    # dvd_subtitle is bitmap VobSub: MKV carries it properly, MP4 players mostly ignore it
+    return {"audio": audio, "subtitles": subtitles, "copy_audio": copy_audio,
+            "mp4": not subtitles and all(t["codec"] != "flac" for t in audio)}
+
+
+def maps_late_tracks(plan):
+    """True if stream_args maps a track only the deep probe found.
+    Subpictures (and some audio) first show up well into a title, so the
+    ffmpeg run then has to probe as deep as the cached probe did (see
+    core.probe.probe_args), or the map matches nothing and the title fails."""
+    if not plan: return True
+    return any(is_late(t["stream"]) for t in plan["audio"] + plan["subtitles"])
+
+
+def stream_args(plan):
+    """-map and codec arguments for a plan's audio and subtitle tracks,
+    from input 0. With no probe to go on, just the first audio track.
+    Check maps_late_tracks() for the probe depth this needs."""
+    if not plan["audio"] and not plan["subtitles"]:
+        if plan["copy_audio"]: return ["-map", "0:a:0?", "-c:a", "copy"]
+        return ["-map", "0:a:0?", "-c:a", "aac", "-b:a", AAC_BITRATE]
+
+    args = []
+    for track in plan["audio"] + plan["subtitles"]: args += ["-map", stream_map(track["stream"])]
+    for kind, tracks in (("a", plan["audio"]), ("s", plan["subtitles"])):
+        for n, track in enumerate(tracks):
+            args += [f"-c:{kind}:{n}", track.get("codec", "copy")]
+            if track.get("codec") == "aac": args += [f"-b:{kind}:{n}", AAC_BITRATE]
+            args += [f"-metadata:s:{kind}:{n}", f"language={track['language']}"]
+            if track["title"]: args += [f"-metadata:s:{kind}:{n}", f"title={track['title']}"]
+    return args
+
+
+def describe_plan(plan):
+    """'ac3 eng copied, lpcm fre -> flac | subs: eng, fre' for the log."""
+    audio = ", ".join(f"{t['stream']['codec']} {t['language']} " +
+                      ("copied" if t["codec"] == "copy" else f"-> {t['codec']}") for t in plan["audio"])
+    text = f"audio: {audio or 'first track'}"
+    if plan["subtitles"]: text += " | subs: " + ", ".join(t["language"] for t in plan["subtitles"])
+    return text
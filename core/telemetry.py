@@ -0,0 +1,128 @@
+import json
+import os
+import platform
+import sys
+import threading
+import time
+
+REPORT_NAME = "vobreel_report.jsonl"
+
+# ru_maxrss is in KB on Linux but bytes on macOS
+RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def wait_with_usage(proc):
+    """proc.wait() that also returns the child's rusage, or None where
+    os.wait4 isn't available (Windows)."""
+    if not hasattr(os, "wait4"): return proc.wait(), None
+    try:
+        pid, status, usage = os.wait4(proc.pid, 0)
+    except ChildProcessError:
+        return proc.wait(), None
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return proc.returncode, usage
+
+
+def new_usage():
+    return {"cpu_user_seconds": 0.0, "cpu_sys_seconds": 0.0, "peak_rss_bytes": 0, "disk_read_bytes": 0,
+            "disk_write_bytes": 0, "processes": 0}
+
+
+def add_usage(totals, usage):
+    """Adds one finished process's rusage to a title's totals. CPU and block
+    I/O add up; peak RSS is the biggest single process."""
+    totals["cpu_user_seconds"] += usage.ru_utime
+    totals["cpu_sys_seconds"] += usage.ru_stime
+    totals["peak_rss_bytes"] = max(totals["peak_rss_bytes"], usage.ru_maxrss * RSS_UNIT)
+    totals["disk_read_bytes"] += usage.ru_inblock * 512
+    totals["disk_write_bytes"] += usage.ru_oublock * 512
+    totals["processes"] += 1
+
+
+class RunReport:
+    """One JSON object per title, appended to a JSON-lines file as each
+    title finishes, so a killed run still leaves its numbers behind.
+    Every line carries the run id, host and settings for grouping later.
+    """
+
+    def __init__(self, path, run_info):
+        self.path = path
+        self.run_info = dict(run_info, run_id=time.strftime("%Y%m%d-%H%M%S"), host=platform.node())
+        self.records = []
+        self.lock = threading.Lock()
+
+    def record(self, stats):
+        line = dict(self.run_info, **stats)
+        with self.lock:
+            self.records.append(line)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(line) + "\n")
+        return line
+
+
+def _labels(labels):
+    escaped = {k: str(v).replace("\\", "\\\\").replace('"', '\\"') for k, v in labels.items()}
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped.items()) + "}"
+
+
+def write_prometheus(path, records, run_info):
+    """Writes the run's totals in Prometheus text format for node_exporter's
+    textfile collector. Written to a temp file and renamed, so the
+    collector never reads half a file."""
+    labels = {"host": platform.node(), "mode": run_info.get("mode"), "preset": run_info.get("preset")}
+    by_status = {}
+    for r in records: by_status[r["status"]] = by_status.get(r["status"], 0) + 1
+    done = [r for r in records if r["status"] == "done"]
+
+    def total(key):
+        return sum(r.get(key) or 0 for r in done)
+
+    wall = total("wall_seconds")
+    metrics = [
+        ("vobreel_titles", "gauge", "Titles handled in the last run, by outcome",
+         [(dict(labels, status=s), n) for s, n in sorted(by_status.items())]),
+        ("vobreel_encode_wall_seconds", "gauge", "Wall time spent on finished titles", [(labels, wall)]),
+        ("vobreel_encode_cpu_seconds", "gauge", "ffmpeg CPU time on finished titles",
+         [(dict(labels, cpu="user"), total("cpu_user_seconds")), (dict(labels, cpu="sys"), total("cpu_sys_seconds"))]),
+        ("vobreel_encode_frames", "gauge", "Frames encoded", [(labels, total("frames"))]),
+        ("vobreel_encode_fps", "gauge", "Average frames per second over finished titles",
+         [(labels, total("frames") / wall if wall else 0.0)]),
+        ("vobreel_encode_speed", "gauge", "Average speed factor (media seconds per wall second)",
+         [(labels, total("duration") / wall if wall else 0.0)]),
+        ("vobreel_bytes_read", "gauge", "Source bytes read by finished titles", [(labels, total("bytes_read"))]),
+        ("vobreel_bytes_written", "gauge", "Output bytes written by finished titles", [(labels, total("bytes_written"))]),
+        ("vobreel_peak_rss_bytes", "gauge", "Largest ffmpeg resident set size",
+         [(labels, max((r.get("peak_rss_bytes") or 0 for r in done), default=0))]),
+        ("vobreel_last_run_timestamp_seconds", "gauge", "When the last run finished", [(labels, time.time())]),
+    ]
+
+    lines = []
+    for name, kind, help_text, samples in metrics:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        lines += [f"{name}{_labels(l)} {v}" for l, v in samples]
+
+    temp = path + ".tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(temp, path)
+
+
+def node_summary(snapshot):
+    """Queue depth and per-node throughput from a Coordinator snapshot, one line."""
+    text = (f"🖧 Queue: {snapshot['queued']} waiting, {snapshot['running']} running, "
+            f"{snapshot['done']} done, {snapshot['failed']} failed")
+    for name, node in sorted(snapshot["nodes"].items()):
+        text += (f" | {name}: {node['running']}/{node['slots']} busy, {node['fps']:.0f} fps, "
+                 f"{node['speed']:.2f}x, {node['done']} done")
+    return text
+
+
+def summary_line(stats):
+    """One human-readable line for a title's stats."""
+    if stats["status"] == "duplicate":
+        return f"📊 {stats['title']}: same content as {stats['duplicate_of']}, nothing encoded"
+    minutes, seconds = divmod(int(stats["wall_seconds"]), 60)
+    return (f"📊 {stats['title']}: {minutes}m{seconds:02d}s, {stats['fps']:.0f} fps, {stats['speed']:.2f}x, "
+            f"CPU {stats['cpu_user_seconds']:.0f}s user / {stats['cpu_sys_seconds']:.0f}s sys, "
+            f"peak RSS {stats['peak_rss_bytes'] / 1e6:.0f} MB, "
+            f"read {stats['bytes_read'] / 1e9:.2f} GB, wrote {stats['bytes_written'] / 1e9:.2f} GB")
@@ -0,0 +1,147 @@
+import mmap
+import os
+import time
+
+from core.scan_index import VOB_PATTERN
+
+# DVD-Video program streams are cut into 2048-byte packs, each starting
+# with an MPEG-2 pack header and holding one or more whole PES packets
+SECTOR = 2048
+PACK_START = b"\x00\x00\x01\xba"
+ZERO_PACK = bytes(SECTOR)
+
+# A handful of bad sectors is a blip ffmpeg decodes straight past; more
+# than this and the title is treated as damaged rather than just flagged
+MAX_BAD_PACKS = 16
+
+# SCR runs at 90 kHz. Inside a cell consecutive packs are a few ms apart,
+# so a step back in time or a jump of over a second means missing data
+SCR_JUMP = 90000
+
+# Report at most this many offsets per kind of problem
+MAX_LISTED = 5
+
+
+def pack_scr(mm, off):
+    """SCR base (90 kHz ticks) of the MPEG-2 pack header at off, or None
+    if the header isn't MPEG-2 (marker bits '01')."""
+    b0, b1, b2, b3, b4 = mm[off + 4:off + 9]
+    if b0 & 0xC0 != 0x40: return None
+    return (((b0 >> 3) & 0x07) << 30 | (b0 & 0x03) << 28 | b1 << 20 |
+            ((b2 >> 3) & 0x1F) << 15 | (b2 & 0x03) << 13 | b3 << 5 | b4 >> 3)
+
+
+def pes_fits(mm, off):
+    """True if the PES packets after the pack header fill the pack exactly.
+    A PES header cut off by the end of the pack counts as not fitting."""
+    pos = off + 14 + (mm[off + 13] & 0x07) # Pack header + stuffing
+    end = off + SECTOR
+    while pos < end:
+        header = mm[pos:min(pos + 6, end)]
+        if len(header) < 6 or header[:3] != b"\x00\x00\x01" or header[3] < 0xBB: return False
+        pos += 6 + (header[4] << 8 | header[5])
+    return pos == end
+
+
+def _sequence_problems(vob_list):
+    """Missing parts and short middle parts in a VTS_xx_1..n sequence."""
+    errors = []
+    parts = [int(VOB_PATTERN.match(os.path.basename(p)).group(2)) for p in vob_list]
+    missing = sorted(set(range(1, max(parts) + 1)) - set(parts))
+    if missing: errors.append(f"missing part(s) {', '.join(map(str, missing))} of the VOB sequence")
+
+    # Authoring tools fill every part but the last to the same size
+    sizes = [os.path.getsize(p) for p in vob_list]
+    for path, size in zip(vob_list[:-1], sizes[:-1]):
+        if size < sizes[0]:
+            errors.append(f"{os.path.basename(path)} is {size} bytes, shorter than part 1 ({sizes[0]})")
+    return errors
+
+
+def validate_title(vob_list, info=None):
+    """Walks every pack of a title's VOBs through mmap, without decoding.
+
+    `info` is the parsed VTS IFO (optional): its cell table gives the
+    expected size and the sectors where SCR is allowed to restart.
+    Returns {"ok", "errors", "warnings", "packs", "seconds"}; ok is False
+    when the title is damaged enough that it shouldn't be encoded.
+    """
+    start_time = time.perf_counter()
+    errors = _sequence_problems(vob_list)
+    warnings = []
+
+    cell_starts = set()
+    expected = 0
+    if info:
+        for pgc in info["pgcs"]:
+            for cell in pgc["cells"]:
+                cell_starts.add(cell["first_sector"])
+                expected = max(expected, cell["last_sector"] + 1)
+
+    sector = 0 # Sector number across the whole title, like the IFO counts them
+    bad, zero_runs, jumps = [], [], []
+    zero_packs = 0
+    last_scr = None
+
+    for path in vob_list:
+        name = os.path.basename(path)
+        size = os.path.getsize(path)
+        if not size: errors.append(f"{name} is empty")
+        if size % SECTOR:
+            errors.append(f"{name} is truncated mid-sector ({size % SECTOR} stray bytes at the end)")
+        if size < SECTOR:
+            sector += size // SECTOR
+            continue
+
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, "madvise"): mm.madvise(mmap.MADV_SEQUENTIAL)
+            zero_start = None
+            for off in range(0, size - SECTOR + 1, SECTOR):
+                if mm[off:off + 4] == PACK_START:
+                    if zero_start is not None:
+                        zero_runs.append((name, zero_start, off - zero_start))
+                        zero_start = None
+
+                    scr = pack_scr(mm, off)
+                    if scr is None or not pes_fits(mm, off):
+                        bad.append((name, off))
+                    elif last_scr is not None and sector not in cell_starts and \
+                            not 0 <= scr - last_scr <= SCR_JUMP:
+                        jumps.append((name, off, (scr - last_scr) / 90000))
+                    if scr is not None: last_scr = scr
+
+                elif mm[off:off + SECTOR] == ZERO_PACK:
+                    zero_packs += 1
+                    if zero_start is None: zero_start = off
+                else:
+                    bad.append((name, off))
+                sector += 1
+
+            if zero_start is not None: zero_runs.append((name, zero_start, size // SECTOR * SECTOR - zero_start))
+
+    if not sector: errors.append("no complete packs to read")
+    if expected and sector < expected:
+        errors.append(f"{sector} sectors on disk but the IFO's cells need {expected} "
+                      f"({(expected - sector) * SECTOR / 1e6:.1f} MB missing)")
+
+    if zero_runs:
+        listed = ", ".join(f"{n}@{o} ({length // SECTOR} packs)" for n, o, length in zero_runs[:MAX_LISTED])
+        message = f"{zero_packs} zero-filled pack(s) in {len(zero_runs)} region(s): {listed}"
+        (errors if zero_packs > MAX_BAD_PACKS else warnings).append(message)
+
+    if bad:
+        listed = ", ".join(f"{n}@{o}" for n, o in bad[:MAX_LISTED])
+        message = f"{len(bad)} malformed pack(s): {listed}"
+        (errors if len(bad) > MAX_BAD_PACKS else warnings).append(message)
+
+    if jumps:
+        listed = ", ".join(f"{n}@{o} ({delta:+.2f}s)" for n, o, delta in jumps[:MAX_LISTED])
+        warnings.append(f"{len(jumps)} SCR discontinuit{'y' if len(jumps) == 1 else 'ies'}: {listed}")
+
+    return {
+        "ok": not errors,
+        "errors": errors,
+        "warnings": warnings,
+        "packs": sector,
+        "seconds": round(time.perf_counter() - start_time, 3),
+    }
@@ -0,0 +1,149 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+from core.scan_index import ScanIndex
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII") # wd, mask, cookie, name length
+
+
+class Inotify:
+    """Minimal recursive inotify watcher through ctypes (Linux only).
+    Raises OSError if inotify isn't available, so callers can fall back to polling."""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name: raise OSError("libc not found")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self.libc, "inotify_init1"): raise OSError("inotify not supported")
+
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0: raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.paths = {} # watch descriptor -> directory
+
+    def close(self):
+        os.close(self.fd)
+
+    def add_tree(self, root):
+        for path, dirs, files in os.walk(root):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+            if wd < 0: raise OSError(ctypes.get_errno(), f"Can't watch {path} (raise fs.inotify.max_user_watches?)")
+            self.paths[wd] = path
+
+    def wait(self, timeout):
+        """Blocks until something changes or timeout passes. Returns True on change."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable: return False
+
+        data = b""
+        try:
+            while True:
+                chunk = os.read(self.fd, 65536)
+                if not chunk: break
+                data += chunk
+        except BlockingIOError:
+            pass
+
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += EVENT_HEADER.size + length
+
+            # New disc folders get dropped in whole: watch them too
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and wd in self.paths:
+                try:
+                    self.add_tree(os.path.join(self.paths[wd], os.fsdecode(name)))
+                except OSError:
+                    pass
+        return True
+
+
+class DropFolderWatcher:
+    """Watches drop folders for VIDEO_TS sets and hands out each one once it
+    has finished copying, i.e. none of its VOBs changed size or mtime for
+    `settle_seconds`. Uses inotify to wake up early; without it, it polls.
+    """
+
+    def __init__(self, folders, cache_path=":memory:", settle_seconds=60, poll_interval=30):
+        self.folders = [os.path.abspath(f) for f in folders]
+        self.index = ScanIndex(cache_path)
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.pending = {}  # folder -> (signature, time it last changed)
+        self.handled = {}  # folder -> signature it was queued with
+
+        try:
+            self.notifier = Inotify()
+            for folder in self.folders: self.notifier.add_tree(folder)
+        except OSError:
+            self.notifier = None
+
+    @property
+    def mode(self):
+        return "inotify" if self.notifier else "polling"
+
+    def close(self):
+        if self.notifier: self.notifier.close()
+        self.index.close()
+
+    def ready_folders(self):
+        """Folders whose title sets are new (or changed) and have settled."""
+        now = time.time()
+        ready = []
+        for root in self.folders:
+            found, relisted = self.index.scan(root)
+            for folder, titles in found.items():
+                signature = _signature(titles)
+                if signature is None or self.handled.get(folder) == signature: continue
+
+                previous = self.pending.get(folder)
+                if previous is None or previous[0] != signature:
+                    # Still being copied (or just showed up): start the clock again
+                    self.pending[folder] = (signature, now)
+                    continue
+
+                if now - previous[1] >= self.settle_seconds:
+                    del self.pending[folder]
+                    self.handled[folder] = signature
+                    ready.append(folder)
+        return ready
+
+    def wait(self):
+        """Sleeps until the next check is due. With inotify that's when
+        something changes (or the settle time runs out), otherwise the poll interval."""
+        timeout = self.poll_interval
+        if self.pending: timeout = min(timeout, self.settle_seconds)
+
+        if self.notifier:
+            if self.notifier.wait(timeout):
+                time.sleep(1) # Let a burst of writes finish before rescanning
+        else:
+            time.sleep(timeout)
+
+
+def _signature(titles):
+    # Directory mtimes don't move while a file grows, so stat the VOBs themselves
+    signature = []
+    try:
+        for paths in titles.values():
+            for path in paths:
+                st = os.stat(path)
+                signature.append((path, st.st_size, st.st_mtime))
+    except OSError:
+        return None
+    return tuple(sorted(signature))
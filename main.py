@@ -1,13 +1,11 @@
+import shutil
 import sys
-from PyQt6.QtWidgets import (QApplication, QMainWindow, QTabWidget)
+from PyQt6.QtWidgets import (QApplication, QMainWindow, QTabWidget, QWidget)
 
 # --- IMPORT MODULES ---
-# These will be created in the next steps
+# Tab modules are imported when their tab is first opened (see build_tab),
+# so the window comes up without loading the engine and its helpers
 from core.config_manager import ConfigManager
-from tabs.info_tab import WelcomeTab
-from tabs.batch_convert_tab import BatchConvertTab
-from tabs.diagnostics_tab import DiagnosticsTab
-from tabs.help_tab import HelpTab
 
 class VobReelApp(QMainWindow):
     def __init__(self):
@@ -27,26 +25,65 @@ class VobReelApp(QMainWindow):
         """)
         self.setCentralWidget(self.tabs)
 
-        # Build Tabs
+        # Tabs start as empty placeholders and are built on first view
+        self.tab_factories = [
+            ("🏠 Welcome", self.make_welcome_tab),
+            ("💿 Batch Converter", self.make_convert_tab),
+            ("🔧 Diagnostics", self.make_diag_tab),
+            ("❓ Help Guide", self.make_help_tab),
+        ]
+        self.built = {} # index -> real tab widget
+        for label, factory in self.tab_factories:
+            self.tabs.addTab(QWidget(), label)
+        self.tabs.currentChanged.connect(self.build_tab)
+        self.build_tab(0)
+
+        # Only a PATH lookup here; the full capability check (cached per ffmpeg
+        # build) runs when the Diagnostics tab opens. Open it now if ffmpeg is missing
+        if not shutil.which("ffmpeg") or not shutil.which("ffprobe"):
+            self.tabs.setCurrentIndex(2)
+
+    def build_tab(self, index):
+        if index < 0 or index in self.built: return
+        label, factory = self.tab_factories[index]
+        widget = factory()
+        self.built[index] = widget
+
+        # Swap the placeholder out without re-entering this slot
+        self.tabs.blockSignals(True)
+        placeholder = self.tabs.widget(index)
+        self.tabs.removeTab(index)
+        placeholder.deleteLater()
+        self.tabs.insertTab(index, widget, label)
+        self.tabs.setCurrentIndex(index)
+        self.tabs.blockSignals(False)
+
+    def make_welcome_tab(self):
+        from tabs.info_tab import WelcomeTab
         self.welcome_tab = WelcomeTab()
-        # Pass config to converter so it knows default paths
-        self.convert_tab = BatchConvertTab(self.cfg) 
-        self.diag_tab = DiagnosticsTab()
+        return self.welcome_tab
 
-        # Add Tabs to Window
-        self.tabs.addTab(self.welcome_tab, "🏠 Welcome")
-        self.tabs.addTab(self.convert_tab, "💿 Batch Converter")
-        self.tabs.addTab(self.diag_tab, "🔧 Diagnostics")
+    def make_convert_tab(self):
+        from tabs.batch_convert_tab import BatchConvertTab
+        # Pass config to converter so it knows default paths
+        self.convert_tab = BatchConvertTab(self.cfg)
+        return self.convert_tab
 
-        # Auto-run diagnostics on startup to ensure FFmpeg is ready
+    def make_diag_tab(self):
+        from tabs.diagnostics_tab import DiagnosticsTab
+        self.diag_tab = DiagnosticsTab(self.cfg)
+        # Cached results come back straight away; a new or changed ffmpeg gets probed
         self.diag_tab.run_diagnostics()
+        return self.diag_tab
 
+    def make_help_tab(self):
+        from tabs.help_tab import HelpTab
         self.help_tab = HelpTab()
-        self.tabs.addTab(self.help_tab, "❓ Help Guide")
+        return self.help_tab
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     app.setStyle("Fusion") # Standard clean look for PyQt6
     window = VobReelApp()
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
@@ -1,10 +1,12 @@
 import os
+import time
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QPushButton, 
                              QProgressBar, QTextEdit, QFileDialog, QHBoxLayout,
                              QLineEdit, QMessageBox, QComboBox, QGroupBox, 
                              QCheckBox)
 from PyQt6.QtCore import Qt
-from core.vob_worker import VobWorker
+from core.vob_worker import VobWorker, TitleInspector
+from core.telemetry import summary_line
 
 class BatchConvertTab(QWidget):
     def __init__(self, config):
@@ -52,18 +54,48 @@ class BatchConvertTab(QWidget):
         settings_group = QGroupBox("2. Quality & format")
         settings_layout = QHBoxLayout()
 
-        # Quality Dropdown (Plain English)
-        self.combo_quality = QComboBox()
-        self.combo_quality.addItem("🌟 Best Quality (Preserve Grain)", 18)
-        self.combo_quality.addItem("✅ Standard (Balanced)", 20)
-        self.combo_quality.addItem("💾 Compact (Shareable)", 23)
-        self.combo_quality.setToolTip(
-            "Controls the visual clarity.\n"
+        # Output Mode Dropdown
+        self.combo_mode = QComboBox()
+        self.combo_mode.addItem("🎞️ Encode (H.264 MP4)", "encode")
+        self.combo_mode.addItem("📦 Remux (No Re-encode)", "remux")
+        self.combo_mode.setToolTip(
+            "• Encode: Converts to H.264 using the Quality and Speed settings.\n"
+            "• Remux: Copies the original DVD video and audio untouched into MP4\n"
+            "  (or MKV if MP4 can't hold the audio or subtitles). Runs at disk speed, archival use."
+        )
+        self.combo_mode.currentIndexChanged.connect(self.on_mode_changed)
+
+        # Quality Checkboxes (Plain English). Ticking several makes one file
+        # per quality from a single decode, e.g. a master plus a shareable copy
+        quality_tip = (
+            "Controls the visual clarity. Tick more than one to get several files at once.\n"
             "• Best Quality: Larger files, keeps VHS grain intact.\n"
             "• Standard: Good balance for most DVDs.\n"
-            "• Compact: Smoother image, smaller file size."
+            "• Compact: Smoother image, smaller file size.\n"
+            "The best ticked quality is saved as Title.mp4, the others as Title_crf20.mp4 etc."
         )
-        self.combo_quality.setCurrentIndex(0) 
+        self.quality_checks = []
+        for label, crf in (("🌟 Best Quality", 18), ("✅ Standard", 20), ("💾 Compact", 23)):
+            chk = QCheckBox(label)
+            chk.setToolTip(quality_tip)
+            self.quality_checks.append((chk, crf))
+        self.quality_checks[0][0].setChecked(True)
+
+        # Auto-tune Dropdown: let sample encodes pick quality/speed per title
+        self.combo_tune = QComboBox()
+        self.combo_tune.addItem("🎛️ Off (use my choices)", None)
+        self.combo_tune.addItem("🔍 Visually Lossless", {"min_ssim": 0.985})
+        self.combo_tune.addItem("👍 Good Quality", {"min_ssim": 0.97})
+        self.combo_tune.addItem("💾 Fit 2 GB per Hour", {"max_mb_per_hour": 2000})
+        self.combo_tune.addItem("📧 Fit 1 GB per Hour", {"max_mb_per_hour": 1000})
+        self.combo_tune.setToolTip(
+            "Encodes a few short samples of each title first and picks the fastest\n"
+            "speed and quality settings that hit the target, title by title.\n"
+            "• Visually Lossless / Good Quality: smallest file that still looks this good.\n"
+            "• Fit N GB per Hour: best picture that stays under that size.\n"
+            "Adds a minute or two per title before encoding starts."
+        )
+        self.combo_tune.currentIndexChanged.connect(self.on_mode_changed)
 
         # Speed Dropdown
         self.combo_speed = QComboBox()
@@ -81,17 +113,76 @@ class BatchConvertTab(QWidget):
         self.chk_audio_copy = QCheckBox("Keep Original Audio")
         self.chk_audio_copy.setChecked(False)
         self.chk_audio_copy.setToolTip(
-            "If checked, the original DVD audio (AC3/PCM) is copied exactly.\n"
+            "If checked, the original DVD audio (AC3/DTS) is copied exactly,\n"
+            "and PCM is stored losslessly as FLAC (the file becomes MKV).\n"
             "If unchecked, audio is converted to AAC (widely compatible but slight quality loss)."
         )
 
+        # Track Dropdowns: which audio languages and subtitles to keep
+        self.combo_audio = QComboBox()
+        self.combo_audio.addItem("🔈 Main Track Only", "")
+        self.combo_audio.addItem("🌐 All Languages", "all")
+        self.combo_subs = QComboBox()
+        self.combo_subs.addItem("🚫 No Subtitles", "")
+        self.combo_subs.addItem("🌐 All Subtitles", "all")
+        # The languages from the config file, if any, as a third choice
+        for combo, key in ((self.combo_audio, "audio_languages"), (self.combo_subs, "subtitle_languages")):
+            langs = self.config.get(key)
+            if langs and langs != "all":
+                combo.addItem(f"🗣️ {langs}", langs)
+                combo.setCurrentIndex(2)
+            elif langs == "all":
+                combo.setCurrentIndex(1)
+        tracks_tip = (
+            "Languages come from the DVD's menus (IFO files).\n"
+            "Set 'audio_languages' / 'subtitle_languages' in the config file (e.g. \"en,fr\")\n"
+            "to get a choice of just those. DVD subtitles are pictures, so they make the file MKV."
+        )
+        self.combo_audio.setToolTip(tracks_tip)
+        self.combo_subs.setToolTip(tracks_tip)
+
+        self.chk_chapters = QCheckBox("Per-Chapter Clips")
+        self.chk_chapters.setChecked(bool(self.config.get("chapter_clips")))
+        self.chk_chapters.setToolTip(
+            "Besides the full title, saves each DVD chapter as its own file\n"
+            "in a <title>_chapters folder. Cut from the finished file, no extra encoding."
+        )
+
+        self.chk_crop = QCheckBox("Crop Black Borders")
+        self.chk_crop.setChecked(bool(self.config.get("auto_crop")))
+        self.chk_crop.setToolTip(
+            "Samples each title for letterbox/pillarbox bars and crops them off.\n"
+            "Smaller files, and no bitrate wasted on black."
+        )
+
+        self.chk_workers = QCheckBox("Use Worker Nodes")
+        self.chk_workers.setChecked(bool(self.config.get("distribute_to_workers")))
+        self.chk_workers.setToolTip(
+            "Hands titles to other computers instead of encoding them here.\n"
+            "Needs 'cluster_token' (a shared password) in the config file. Start\n"
+            f"'vobreel worker <this computer>:{self.config.get('cluster_listen').rpartition(':')[2]} --token <password>' on each one.\n"
+            "The source and export folders must be on a share they can all reach."
+        )
+
+        settings_layout.addWidget(QLabel("Output:"))
+        settings_layout.addWidget(self.combo_mode)
+        settings_layout.addSpacing(15)
         settings_layout.addWidget(QLabel("Video Quality:"))
-        settings_layout.addWidget(self.combo_quality)
+        for chk, crf in self.quality_checks: settings_layout.addWidget(chk)
+        settings_layout.addSpacing(15)
+        settings_layout.addWidget(QLabel("Auto-tune:"))
+        settings_layout.addWidget(self.combo_tune)
         settings_layout.addSpacing(15)
         settings_layout.addWidget(QLabel("Speed:"))
         settings_layout.addWidget(self.combo_speed)
         settings_layout.addSpacing(15)
+        settings_layout.addWidget(QLabel("Tracks:"))
+        settings_layout.addWidget(self.combo_audio)
+        settings_layout.addWidget(self.combo_subs)
         settings_layout.addWidget(self.chk_audio_copy)
+        settings_layout.addWidget(self.chk_crop)
+        settings_layout.addWidget(self.chk_chapters)
+        settings_layout.addWidget(self.chk_workers)
         
         settings_group.setLayout(settings_layout)
         layout.addWidget(settings_group)
@@ -103,18 +194,59 @@ class BatchConvertTab(QWidget):
         self.btn_start.setMinimumHeight(50)
         self.btn_start.setStyleSheet("font-size: 12pt; font-weight: bold; background-color: #2196F3; color: white;")
         self.btn_start.clicked.connect(self.start_conversion)
-        layout.addWidget(self.btn_start)
+
+        self.btn_stop = QPushButton("⏹ Stop")
+        self.btn_stop.setMinimumHeight(50)
+        self.btn_stop.setEnabled(False)
+        self.btn_stop.clicked.connect(self.stop_conversion)
+
+        # Probe-only pass: lists each title's streams, filling the probe cache
+        self.btn_inspect = QPushButton("🔍 Inspect Titles")
+        self.btn_inspect.setMinimumHeight(50)
+        self.btn_inspect.clicked.connect(self.inspect_titles)
+
+        action_row = QHBoxLayout()
+        action_row.addWidget(self.btn_start, 4)
+        action_row.addWidget(self.btn_inspect, 1)
+        action_row.addWidget(self.btn_stop, 1)
+        layout.addLayout(action_row)
 
         # --- PROGRESS & LOGS ---
         self.progress = QProgressBar()
         self.progress.setValue(0)
         layout.addWidget(self.progress)
 
+        # Live per-title stats (one line per title currently encoding)
+        self.title_stats = {}
+        self.lbl_stats = QLabel("")
+        self.lbl_stats.setStyleSheet("color: #888; font-family: Monospace;")
+        layout.addWidget(self.lbl_stats)
+
+        # Queue depth and per-node throughput when using worker nodes
+        self.lbl_nodes = QLabel("")
+        self.lbl_nodes.setStyleSheet("color: #888; font-family: Monospace;")
+        layout.addWidget(self.lbl_nodes)
+
         self.log_window = QTextEdit()
         self.log_window.setReadOnly(True)
         self.log_window.setStyleSheet("background-color: #111; color: #0f0; font-family: Monospace;")
         layout.addWidget(self.log_window)
 
+    def on_mode_changed(self):
+        # Quality/speed/audio settings mean nothing when nothing is re-encoded
+        encoding = self.combo_mode.currentData() == "encode"
+        # Auto-tune picks quality and speed itself
+        tuning = encoding and self.combo_tune.currentData() is not None
+        for chk, crf in self.quality_checks: chk.setEnabled(encoding and not tuning)
+        self.combo_speed.setEnabled(encoding and not tuning)
+        self.combo_tune.setEnabled(encoding)
+        self.chk_audio_copy.setEnabled(encoding)
+        self.chk_crop.setEnabled(encoding)
+
+    def selected_crfs(self):
+        """Ticked qualities as CRF strings, best (lowest CRF) first."""
+        return [str(crf) for chk, crf in self.quality_checks if chk.isChecked()]
+
     def select_source_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Select Source Folder")
         if folder: self.input_path_display.setText(folder)
@@ -140,29 +272,113 @@ class BatchConvertTab(QWidget):
             return
 
         # Get User Selections
-        selected_crf = str(self.combo_quality.currentData())
+        crfs = self.selected_crfs()
+        mode = self.combo_mode.currentData()
+        tune_target = self.combo_tune.currentData() if mode == "encode" else None
+        if tune_target: crfs = [str(self.config.get("ffmpeg_crf"))] # Only a fallback if tuning fails
+        if mode == "encode" and not crfs:
+            QMessageBox.warning(self, "Input Error", "Please tick at least one Video Quality.")
+            return
+        selected_crf = crfs[0] if crfs else "20"
         selected_preset = self.combo_speed.currentData()
         keep_audio = self.chk_audio_copy.isChecked()
 
-        # UI Lock
+        self.lock_ui()
+        self.log(f"Starting batch process...")
+        if mode == "remux":
+            self.log("Settings: Remux (stream copy, no re-encode)")
+        elif tune_target:
+            self.log(f"Settings: Auto-tune to {self.combo_tune.currentText()} | Audio Copy: {keep_audio}")
+        else:
+            self.log(f"Settings: CRF {', '.join(crfs)} | Preset: {selected_preset} | Audio Copy: {keep_audio}")
+
+        # Pass specific settings to worker
+        self.worker = VobWorker(source, output, selected_crf, selected_preset, keep_audio,
+                                max_jobs=self.config.get("max_parallel_jobs"),
+                                chunked=self.config.get("chunked_encoding"),
+                                cache_dir=self.config.config_dir,
+                                min_title_seconds=self.config.get("min_title_seconds"),
+                                mode=mode,
+                                auto_deinterlace=self.config.get("auto_deinterlace"),
+                                auto_crop=self.chk_crop.isChecked(),
+                                staging_dir=self.config.get("staging_dir") or None,
+                                staging_gb=self.config.get("staging_cache_gb"),
+                                validate=self.config.get("validate_sources"),
+                                skip_damaged=self.config.get("skip_damaged_titles"),
+                                extra_crfs=crfs[1:],
+                                chapter_markers=self.config.get("chapter_markers"),
+                                chapter_clips=self.chk_chapters.isChecked(),
+                                prometheus_file=self.config.get("prometheus_textfile") or None,
+                                tune_target=tune_target,
+                                dedupe=self.config.get("dedupe_titles"),
+                                listen=self.config.get("cluster_listen") if self.chk_workers.isChecked() else None,
+                                cluster_token=self.config.get("cluster_token"),
+                                audio_langs=self.combo_audio.currentData(),
+                                subtitle_langs=self.combo_subs.currentData())
+        self.connect_worker()
+
+    def inspect_titles(self):
+        source = self.input_path_display.text().strip()
+        if not source or not os.path.exists(source):
+            QMessageBox.warning(self, "Input Error", "Please select a valid Source directory.")
+            return
+
+        self.lock_ui()
+        self.log("Inspecting titles (cached probe results are reused)...")
+
+        self.worker = TitleInspector(source, self.output_path_display.text().strip(),
+                                     (self.selected_crfs() or ["20"])[0],
+                                     self.combo_speed.currentData(),
+                                     cache_dir=self.config.config_dir,
+                                     min_title_seconds=self.config.get("min_title_seconds"),
+                                     validate=self.config.get("validate_sources"))
+        self.connect_worker()
+
+    def lock_ui(self):
         self.btn_start.setEnabled(False)
+        self.btn_inspect.setEnabled(False)
+        self.btn_stop.setEnabled(True)
         self.log_window.clear()
         self.progress.setValue(0)
 
-        self.log(f"Starting batch process...")
-        self.log(f"Settings: CRF {selected_crf} | Preset: {selected_preset} | Audio Copy: {keep_audio}")
-
-        # Pass specific settings to worker
-        # Note: We haven't updated the worker yet to accept 'keep_audio'
-        self.worker = VobWorker(source, output, selected_crf, selected_preset, keep_audio)
+    def connect_worker(self):
         self.worker.log_message.connect(self.log)
         self.worker.progress_update.connect(self.progress.setValue)
+        self.worker.title_progress.connect(self.on_title_progress)
+        self.worker.title_stats.connect(lambda stats: self.log(summary_line(stats)))
+        self.worker.node_status.connect(self.on_node_status)
         self.worker.finished.connect(self.on_finished)
         self.worker.start()
 
+    def stop_conversion(self):
+        if self.worker:
+            self.log("⏹️ Stopping...")
+            self.worker.stop()
+
+    def on_title_progress(self, name, percent, fps, speed, eta):
+        if percent >= 100:
+            self.title_stats.pop(name, None)
+        else:
+            eta_text = time.strftime("%H:%M:%S", time.gmtime(eta)) if eta >= 0 else "--:--:--"
+            self.title_stats[name] = f"{name}: {percent:5.1f}% | {fps:4.0f} fps | {speed:.2f}x | ETA {eta_text}"
+        self.lbl_stats.setText("\n".join(self.title_stats.values()))
+
+    def on_node_status(self, snapshot):
+        lines = [f"Queue: {snapshot['queued']} waiting | {snapshot['running']} running | "
+                 f"{snapshot['done']} done | {snapshot['failed']} failed"]
+        for name, node in sorted(snapshot["nodes"].items()):
+            lines.append(f"{name}: {node['running']}/{node['slots']} busy | {node['fps']:4.0f} fps | "
+                         f"{node['speed']:.2f}x now | {node['throughput']:.2f}x avg | {node['done']} done")
+        self.lbl_nodes.setText("\n".join(lines))
+
     def on_finished(self, success):
         self.btn_start.setEnabled(True)
+        self.btn_inspect.setEnabled(True)
+        self.btn_stop.setEnabled(False)
+        self.title_stats.clear()
+        self.lbl_stats.setText("")
+        self.lbl_nodes.setText("")
         status = "COMPLETE" if success else "FAILED / STOPPED"
         self.log(f"\n--- JOB {status} ---")
-        if success:
+        if success and not isinstance(self.worker, TitleInspector):
             QMessageBox.information(self, "Success", "Batch conversion finished successfully!")
\ No newline at end of file
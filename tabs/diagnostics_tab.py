@@ -1,32 +1,30 @@
-import shutil
-import subprocess
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QPushButton, 
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QPushButton,
                              QProgressBar, QTextEdit, QMessageBox)
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtGui import QFont
 
+from core.capabilities import load_capabilities, describe, supports
+
 # --- WORKER THREAD FOR CHECKS ---
 class DiagnosticWorker(QThread):
-    finished = pyqtSignal(bool, list)
+    finished = pyqtSignal(dict)
+
+    def __init__(self, cache_dir, refresh=False):
+        super().__init__()
+        self.cache_dir = cache_dir
+        self.refresh = refresh
 
     def run(self):
-        missing = []
-        # We only strictly need ffmpeg. 
-        # (ffprobe is usually included with ffmpeg, but good to check).
-        required_tools = ['ffmpeg', 'ffprobe']
-
-        for tool in required_tools:
-            if shutil.which(tool) is None:
-                missing.append(tool)
-        
-        # Success if list is empty
-        self.finished.emit(len(missing) == 0, missing)
+        # Cached per ffmpeg binary: instant unless ffmpeg changed (or refresh is asked for).
+        # The batch engine reads the same cache to pick bwdif, idet etc.
+        self.finished.emit(load_capabilities(self.cache_dir, self.refresh, with_calibration=True))
 
 # --- MAIN TAB UI ---
 class DiagnosticsTab(QWidget):
-    def __init__(self):
+    def __init__(self, config):
         super().__init__()
-        
+        self.config = config
+
         layout = QVBoxLayout()
         self.setLayout(layout)
 
@@ -40,9 +38,9 @@ class DiagnosticsTab(QWidget):
         self.log_window = QTextEdit()
         self.log_window.setReadOnly(True)
         self.log_window.setStyleSheet("""
-            background-color: #1e1e1e; 
-            color: #00ff00; 
-            font-family: Monospace; 
+            background-color: #1e1e1e;
+            color: #00ff00;
+            font-family: Monospace;
             font-size: 10pt;
         """)
         layout.addWidget(self.log_window)
@@ -53,34 +51,38 @@ class DiagnosticsTab(QWidget):
         self.progress.setTextVisible(False)
         layout.addWidget(self.progress)
 
-        # Run Button
+        # Run Button: always probes again, e.g. after installing a new FFmpeg
         self.btn_run = QPushButton("🔄 Run System Check")
         self.btn_run.setMinimumHeight(40)
-        self.btn_run.clicked.connect(self.run_diagnostics)
+        self.btn_run.clicked.connect(lambda: self.run_diagnostics(refresh=True))
         layout.addWidget(self.btn_run)
 
     def log(self, message):
         self.log_window.append(message)
 
-    def run_diagnostics(self):
+    def run_diagnostics(self, refresh=False):
         self.log_window.clear()
-        self.log("Checking system requirements...")
+        self.log("Checking FFmpeg and timing a short test encode..." if refresh else
+                 "Checking system requirements...")
         self.progress.setRange(0, 0) # Indeterminate mode
+        self.btn_run.setEnabled(False)
 
-        self.worker = DiagnosticWorker()
+        self.worker = DiagnosticWorker(self.config.config_dir, refresh)
         self.worker.finished.connect(self.on_finished)
         self.worker.start()
 
-    def on_finished(self, success, missing_items):
+    def on_finished(self, caps):
         self.progress.setRange(0, 100)
         self.progress.setValue(100)
+        self.btn_run.setEnabled(True)
 
-        if success:
-            self.log("\n✅ SUCCESS: FFmpeg is installed and ready.")
-        else:
+        for line in describe(caps): self.log(line)
+
+        if not caps["ffmpeg"] or not caps["ffprobe"]:
             self.log("\n❌ ERROR: Missing components!")
-            for item in missing_items:
-                self.log(f"   - {item} not found in PATH")
-            
-            QMessageBox.critical(self, "Missing Software", 
-                "FFmpeg was not found.\n\nPlease install FFmpeg to use this software.")
\ No newline at end of file
+            QMessageBox.critical(self, "Missing Software",
+                "FFmpeg was not found.\n\nPlease install FFmpeg to use this software.")
+        elif not supports(caps, "libx264"):
+            self.log("\n⚠️ This FFmpeg can't encode H.264 (no libx264). Only Remux will work.")
+        else:
+            self.log("\n✅ SUCCESS: FFmpeg is installed and ready.")
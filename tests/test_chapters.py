@@ -0,0 +1,37 @@
+from core.chapters import chapter_spans, keyframe_times, force_keyframes_args, write_ffmetadata
+
+
+def test_spans_cover_the_title():
+    assert chapter_spans([0.0, 300.0, 900.0], 1200.0) == [(0.0, 300.0), (300.0, 900.0), (900.0, 1200.0)]
+
+
+def test_unsorted_starts_and_no_zero():
+    assert chapter_spans([900.0, 300.0], 1200.0) == [(0.0, 300.0), (300.0, 900.0), (900.0, 1200.0)]
+
+
+def test_tiny_chapters_are_dropped():
+    # A 0.4 s menu leftover, and a last "chapter" that is one black frame
+    assert chapter_spans([0.0, 0.4, 300.0, 300.5, 1199.8], 1200.0) == [(0.0, 300.0), (300.0, 1200.0)]
+
+
+def test_nothing_worth_marking():
+    assert chapter_spans([0.0], 1200.0) == []
+    assert chapter_spans([], 1200.0) == []
+    assert chapter_spans([0.0, 300.0], 0) == []
+
+
+def test_keyframe_times_inside_a_piece():
+    spans = chapter_spans([0.0, 300.0, 900.0, 1500.0], 1800.0)
+    assert keyframe_times(spans) == [300.0, 900.0, 1500.0]
+    assert keyframe_times(spans, 600.0, 1200.0) == [300.0]
+    assert keyframe_times(spans, 1500.0) == []
+    assert force_keyframes_args([300.0, 900.5]) == ["-force_key_frames", "300.000,900.500"]
+    assert force_keyframes_args([]) == []
+
+
+def test_ffmetadata(tmp_path):
+    path = tmp_path / "chapters.txt"
+    write_ffmetadata([(0.0, 61.5), (61.5, 120.0)], str(path))
+    text = path.read_text(encoding="utf-8")
+    assert text.startswith(";FFMETADATA1\n")
+    assert "START=61500\nEND=120000\ntitle=Chapter 2\n" in text
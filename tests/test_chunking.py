@@ -0,0 +1,48 @@
+from core.chunking import parse_keyframes, plan_segments, MIN_SEGMENT_SECONDS
+
+
+def test_keyframes_are_rebased_on_the_first_packet():
+    lines = ["10.0,K__", "10.5,___", "N/A,K__", "", "11.0,K__", "12.5,___"]
+    assert parse_keyframes(lines) == ([0.0, 1.0], 2.5)
+
+
+def test_no_packets():
+    assert parse_keyframes([]) == ([], 0.0)
+
+
+def test_reordered_packets_are_not_a_reset():
+    # B-frames come out of order by a frame or two
+    keyframes, duration = parse_keyframes(["1.0,K__", "1.2,___", "1.1,___", "2.0,K__"])
+    assert keyframes == [0.0, 1.0]
+
+
+def test_timestamp_reset_gives_no_keyframes():
+    # A new cell/VOB starting its clock over at zero
+    lines = ["100.0,K__", "101.0,K__", "102.0,___", "0.2,K__", "1.2,K__"]
+    keyframes, duration = parse_keyframes(lines)
+    assert keyframes is None
+    assert duration == 2.0
+
+
+def test_short_title_stays_in_one_piece():
+    assert plan_segments([0.0, 10.0, 20.0], MIN_SEGMENT_SECONDS * 1.5, 4) == [(0.0, None)]
+
+
+def test_no_keyframes_stays_in_one_piece():
+    assert plan_segments([], 3600.0, 4) == [(0.0, None)]
+
+
+def test_cuts_snap_to_nearest_keyframes():
+    keyframes = [float(t) for t in range(0, 3600, 7)]
+    pieces = plan_segments(keyframes, 3600.0, 4)
+    assert len(pieces) == 4
+    assert pieces[0][0] == 0.0 and pieces[-1][1] is None
+    for (start, end), (next_start, _) in zip(pieces, pieces[1:]):
+        assert end == next_start
+        assert next_start in keyframes
+    assert [round(s) for s, _ in pieces[1:]] == [903, 1799, 2702]
+
+
+def test_sparse_keyframes_never_repeat_a_cut():
+    pieces = plan_segments([0.0, 1700.0], 3600.0, 4)
+    assert pieces == [(0.0, 1700.0), (1700.0, None)]
@@ -0,0 +1,92 @@
+import json
+import socket
+import threading
+
+import pytest
+
+from core.cluster import (DEFAULT_PORT, MAX_MESSAGE, Coordinator, ClusterWorker, parse_address, is_loopback,
+                          map_path)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("host:9000", ("host", 9000)),
+    ("host", ("host", DEFAULT_PORT)),
+    (":9000", ("0.0.0.0", 9000)),
+    ("127.0.0.1:80", ("127.0.0.1", 80)),
+    ("[::1]:7000", ("::1", 7000)),
+    ("[::1]", ("::1", DEFAULT_PORT)),
+    ("::1", ("::1", DEFAULT_PORT)),
+    ("fe80::1:2", ("fe80::1:2", DEFAULT_PORT)),
+])
+def test_parse_address(text, expected):
+    assert parse_address(text) == expected
+
+
+def test_parse_address_default_host():
+    assert parse_address(":9000", default_host="localhost") == ("localhost", 9000)
+
+
+@pytest.mark.parametrize("host, loopback", [
+    ("localhost", True), ("127.0.0.1", True), ("127.5.5.5", True), ("::1", True), ("[::1]", True),
+    ("0.0.0.0", False), ("192.168.1.10", False), ("nas.local", False),
+])
+def test_is_loopback(host, loopback):
+    assert is_loopback(host) == loopback
+
+
+def test_open_port_needs_a_token():
+    with pytest.raises(ValueError):
+        Coordinator("0.0.0.0:0")
+
+
+def test_map_path():
+    path_map = [("/mnt/dvds", "D:\\dvds")]
+    assert map_path("/mnt/dvds/Film/VIDEO_TS", path_map) == "D:\\dvds/Film/VIDEO_TS"
+    assert map_path("/mnt/dvds2/Film", path_map) == "/mnt/dvds2/Film"
+
+
+# --- WIRE PROTOCOL ---
+
+@pytest.fixture
+def coordinator():
+    coordinator = Coordinator("127.0.0.1:0", token="secret")
+    thread = threading.Thread(target=coordinator.server.serve_forever, daemon=True)
+    thread.start()
+    yield coordinator
+    coordinator.server.shutdown()
+    coordinator.server.server_close()
+
+
+def send(coordinator, raw):
+    with socket.create_connection(coordinator.address, timeout=5) as sock:
+        try:
+            sock.sendall(raw)
+            line = sock.makefile("rb").readline()
+        except ConnectionError:
+            return None # Hung up on before reading it all
+    return json.loads(line) if line else None
+
+
+def test_lease_and_finish(coordinator):
+    coordinator.add({"title": "Film_Title_1"})
+    worker = ClusterWorker(f"127.0.0.1:{coordinator.address[1]}", name="node-a", token="secret")
+    job = worker.request({"op": "lease", "slots": 1})["job"]
+    assert job["title"] == "Film_Title_1" and job["attempt"] == 1
+    assert worker.request({"op": "lease", "slots": 1}) == {"job": None, "finished": False}
+    assert worker.request({"op": "finish", "job": job["id"], "attempt": 1, "status": "done"}) == {"ok": True}
+    assert coordinator.settled()
+
+
+def test_wrong_token(coordinator):
+    worker = ClusterWorker(f"127.0.0.1:{coordinator.address[1]}", token="guess")
+    assert worker.request({"op": "lease"}) == {"error": "wrong token"}
+
+
+def test_message_must_be_an_object(coordinator):
+    assert send(coordinator, b"[1, 2, 3]\n") == {"error": "expected a JSON object"}
+    assert send(coordinator, b"\"lease\"\n") == {"error": "expected a JSON object"}
+
+
+def test_bad_and_oversized_lines_get_no_reply(coordinator):
+    assert send(coordinator, b"{not json\n") is None
+    assert send(coordinator, b"{\"op\": \"" + b"x" * MAX_MESSAGE + b"\"}\n") is None
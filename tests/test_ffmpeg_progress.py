@@ -0,0 +1,49 @@
+from core.ffmpeg_progress import ProgressParser
+
+BLOCK = """frame=250
+fps=49.87
+bitrate=1234.5kbits/s
+out_time_us=10010000
+out_time_ms=10010000
+speed=1.99x
+progress=continue
+"""
+
+
+def feed_all(parser, text):
+    return [s for s in (parser.feed(line) for line in text.splitlines()) if s]
+
+
+def test_snapshot_at_end_of_block():
+    parser = ProgressParser()
+    lines = BLOCK.splitlines()
+    assert all(parser.feed(line) is None for line in lines[:-1])
+    snapshot = parser.feed(lines[-1])
+    assert snapshot == {"frame": 250, "fps": 49.87, "out_time": 10.01, "speed": 1.99, "ended": False}
+
+
+def test_end_block():
+    snapshots = feed_all(ProgressParser(), BLOCK + BLOCK.replace("continue", "end"))
+    assert [s["ended"] for s in snapshots] == [False, True]
+
+
+def test_not_available_values_read_as_zero():
+    snapshot, = feed_all(ProgressParser(), "frame=0\nfps=0.00\nout_time_us=N/A\nspeed=N/A\nprogress=continue\n")
+    assert snapshot["out_time"] == 0.0 and snapshot["speed"] == 0.0
+
+
+def test_older_builds_with_only_out_time_ms():
+    snapshot, = feed_all(ProgressParser(), "frame=1\nout_time_ms=2500000\nprogress=continue\n")
+    assert snapshot["out_time"] == 2.5
+
+
+def test_blocks_dont_leak_into_each_other():
+    snapshots = feed_all(ProgressParser(), BLOCK + "frame=300\nprogress=continue\n")
+    assert snapshots[1]["frame"] == 300
+    assert snapshots[1]["fps"] == 0.0
+
+
+def test_stray_lines_are_ignored():
+    parser = ProgressParser()
+    assert parser.feed("[mpeg @ 0x55] something odd\n") is None
+    assert feed_all(parser, BLOCK)[0]["frame"] == 250
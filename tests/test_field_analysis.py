@@ -0,0 +1,31 @@
+from core.field_analysis import classify, field_ratios, deinterlace_filter
+
+
+def counts(tff=0, bff=0, progressive=0, neither=0, top=0, bottom=0):
+    return {"tff": tff, "bff": bff, "progressive": progressive, "neither": neither, "top": top, "bottom": bottom}
+
+
+def test_three_two_cadence_is_telecine():
+    film = counts(tff=150, progressive=350, neither=300, top=100, bottom=100)
+    assert field_ratios(film) == (0.4, 0.7)
+    assert classify(film) == "telecine"
+
+
+def test_off_cadence_repeats_are_deinterlaced():
+    # Plenty of repeats, but mostly combed frames: not clean pulldown
+    assert classify(counts(tff=400, progressive=100, neither=300, top=100, bottom=100)) == "interlaced"
+    # Repeats far from 2 in 5
+    assert classify(counts(tff=50, progressive=450, neither=100, top=200, bottom=200)) == "interlaced"
+
+
+def test_video_and_film():
+    assert classify(counts(tff=450, progressive=50, neither=500)) == "interlaced"
+    assert classify(counts(tff=10, progressive=490, neither=500)) == "progressive"
+    assert classify(counts()) == "interlaced"
+
+
+def test_bwdif_stands_in_for_yadif():
+    assert deinterlace_filter("interlaced") == "yadif"
+    assert deinterlace_filter("interlaced", bwdif=True) == "bwdif=mode=send_frame"
+    assert deinterlace_filter("telecine", bwdif=True) == "fieldmatch,bwdif=mode=send_frame:deint=interlaced,decimate"
+    assert deinterlace_filter("progressive", bwdif=True) == ""
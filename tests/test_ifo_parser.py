@@ -0,0 +1,192 @@
+import struct
+
+import pytest
+
+from core.ifo_parser import (SECTOR, IfoError, parse_vmg_ifo, parse_vts_ifo, disc_titles, dvd_time,
+                             title_set_info, title_set_chapters, title_set_tracks)
+
+# --- SYNTHETIC IFOs ---
+# Just the fields the parser reads, at their spec offsets
+
+
+def bcd_time(seconds, fps=25):
+    """4-byte playback time, 25 fps flag set."""
+    h, rest = divmod(int(seconds), 3600)
+    m, s = divmod(rest, 60)
+    bcd = lambda n: (n // 10) << 4 | n % 10
+    return bytes([bcd(h), bcd(m), bcd(s), 0x40 | bcd(0)])
+
+
+def make_vmg(titles):
+    """titles: [(vts, angles)]"""
+    data = bytearray(2 * SECTOR)
+    data[:12] = b"DVDVIDEO-VMG"
+    struct.pack_into(">I", data, 0xC4, 1)
+    struct.pack_into(">H", data, SECTOR, len(titles))
+    for i, (vts, angles) in enumerate(titles):
+        entry = SECTOR + 8 + i * 12
+        data[entry + 1] = angles
+        struct.pack_into(">H", data, entry + 2, 3)
+        data[entry + 6] = vts
+        data[entry + 7] = 1
+    return bytes(data)
+
+
+def make_pgc(cells, programs, audio=(0,), subpictures=((0, 1),)):
+    """cells: [(vob_id, cell_id, seconds, first_sector, last_sector, category)],
+    programs: entry cell (1-based) of each chapter."""
+    header = 0xEC
+    playback = header + len(programs)
+    position = playback + 24 * len(cells)
+    pgc = bytearray(position + 4 * len(cells))
+    pgc[2], pgc[3] = len(programs), len(cells)
+    pgc[4:8] = bcd_time(sum(c[2] for c in cells))
+    for i, stream in enumerate(audio):
+        struct.pack_into(">H", pgc, 0x0C + i * 2, 0x8000 | stream << 8)
+    for i, (four_three, wide) in enumerate(subpictures):
+        struct.pack_into(">I", pgc, 0x1C + i * 4, 0x80000000 | four_three << 24 | wide << 16)
+    struct.pack_into(">HHH", pgc, 0xE6, header, playback, position)
+    pgc[header:playback] = bytes(programs)
+    for i, (vob_id, cell_id, seconds, first, last, category) in enumerate(cells):
+        c = playback + i * 24
+        pgc[c] = category
+        pgc[c + 4:c + 8] = bcd_time(seconds)
+        struct.pack_into(">I", pgc, c + 8, first)
+        struct.pack_into(">I", pgc, c + 20, last)
+        struct.pack_into(">H", pgc, position + i * 4, vob_id)
+        pgc[position + i * 4 + 3] = cell_id
+    return bytes(pgc)
+
+
+def make_vts(pgcs):
+    data = bytearray(SECTOR)
+    data[:12] = b"DVDVIDEO-VTS"
+    struct.pack_into(">H", data, 0x200, 0x1000 | 0x0C00) # PAL, 16:9
+    struct.pack_into(">H", data, 0x202, 2)
+    data[0x204:0x20A] = bytes([0 << 5 | 1 << 2, 5]) + b"en" + bytes([0, 1])  # AC3 5.1 English
+    data[0x20C:0x212] = bytes([4 << 5 | 1 << 2, 1]) + b"fr" + bytes([0, 3])  # LPCM stereo French commentary
+    struct.pack_into(">H", data, 0x254, 1)
+    data[0x256:0x25C] = bytes([1, 0]) + b"de" + bytes([0, 1])
+    struct.pack_into(">I", data, 0xCC, 1)
+
+    table = bytearray(8 + 8 * len(pgcs))
+    struct.pack_into(">H", table, 0, len(pgcs))
+    body = b""
+    for i, pgc in enumerate(pgcs):
+        struct.pack_into(">II", table, 8 + i * 8, 0x80000000 | (i + 1) << 24, len(table) + len(body))
+        body += pgc
+    return bytes(data) + bytes(table) + body
+
+
+MAIN = make_pgc([(1, 1, 600, 0, 99, 0), (1, 2, 900, 100, 249, 0), (1, 3, 300, 250, 299, 0)], [1, 2, 3])
+# Cell 2 comes in two angles: only the first counts towards the running time
+ANGLES = make_pgc([(2, 1, 60, 300, 309, 0), (3, 1, 120, 310, 329, 0x50), (3, 2, 120, 330, 349, 0xD0)], [1, 2])
+
+
+def write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+# --- VMG ---
+
+def test_vmg_lists_titles(tmp_path):
+    titles = parse_vmg_ifo(write(tmp_path, "VIDEO_TS.IFO", make_vmg([(1, 1), (3, 2)])))
+    assert [(t["title"], t["vts"], t["angles"], t["chapters"]) for t in titles] == [(1, 1, 1, 3), (2, 3, 2, 3)]
+
+
+def test_vmg_truncated(tmp_path):
+    data = bytearray(make_vmg([(1, 1)]))
+    struct.pack_into(">I", data, 0xC4, 9) # Table past the end of the file
+    with pytest.raises(IfoError):
+        parse_vmg_ifo(write(tmp_path, "VIDEO_TS.IFO", bytes(data)))
+
+
+def test_not_an_ifo(tmp_path):
+    with pytest.raises(IfoError):
+        parse_vmg_ifo(write(tmp_path, "VIDEO_TS.IFO", make_vts([MAIN])))
+    with pytest.raises(IfoError):
+        parse_vts_ifo(write(tmp_path, "VTS_01_0.IFO", b"DVDVIDEO-VTS"))
+
+
+def test_disc_titles_falls_back_to_bup(tmp_path):
+    write(tmp_path, "VIDEO_TS.IFO", b"junk" * 1000)
+    write(tmp_path, "video_ts.bup", make_vmg([(2, 1)]))
+    assert [t["vts"] for t in disc_titles(str(tmp_path))] == [2]
+
+
+def test_disc_titles_without_vmg(tmp_path):
+    assert disc_titles(str(tmp_path)) is None
+
+
+# --- VTS ---
+
+def test_dvd_time():
+    assert dvd_time(bytes([0x01, 0x02, 0x03, 0x40 | 0x10]), 0) == 3723 + 10 / 25
+    assert dvd_time(bytes([0x00, 0x00, 0x01, 0xC0 | 0x15]), 0) == pytest.approx(1 + 15 / (30000 / 1001))
+
+
+def test_vts_attributes(tmp_path):
+    info = parse_vts_ifo(write(tmp_path, "VTS_01_0.IFO", make_vts([MAIN])))
+    assert (info["standard"], info["aspect"]) == ("PAL", "16:9")
+    assert [(a["coding"], a["channels"], a["language"], a["extension"]) for a in info["audio_attributes"]] == \
+        [("ac3", 6, "en", 1), ("lpcm", 2, "fr", 3)]
+    assert info["subpicture_attributes"][0]["language"] == "de"
+
+
+def test_vts_durations_and_chapters(tmp_path):
+    info = parse_vts_ifo(write(tmp_path, "VTS_01_0.IFO", make_vts([MAIN])))
+    pgc, = info["pgcs"]
+    assert pgc["duration"] == 1800
+    assert pgc["chapters"] == [0.0, 600.0, 1500.0]
+    assert info["duration"] == 1800
+    assert (pgc["angles"], info["angles"], info["longest"]) == (1, 1, 1800)
+
+
+def test_angle_blocks_count_once(tmp_path):
+    info = parse_vts_ifo(write(tmp_path, "VTS_01_0.IFO", make_vts([MAIN, ANGLES])))
+    main, angles = info["pgcs"]
+    assert [c["angle_skip"] for c in angles["cells"]] == [False, False, True]
+    assert angles["angles"] == 2 and info["angles"] == 2
+    assert angles["chapters"] == [0.0, 60.0]
+    # Both chains' distinct cells, the second angle left out
+    assert info["duration"] == 1800 + 60 + 120
+
+
+def test_chapters_merge_program_chains(tmp_path):
+    info = parse_vts_ifo(write(tmp_path, "VTS_01_0.IFO", make_vts([MAIN, ANGLES])))
+    # Disc order: the main chain (sectors 0-299), then the angle chain
+    assert title_set_chapters(info) == [0.0, 600.0, 1500.0, 1800.0, 1860.0]
+
+
+def test_tracks_name_their_streams(tmp_path):
+    pgc = make_pgc([(1, 1, 60, 0, 9, 0)], [1], audio=(0, 2), subpictures=((3, 7),))
+    info = parse_vts_ifo(write(tmp_path, "VTS_01_0.IFO", make_vts([pgc])))
+    tracks = title_set_tracks(info)
+    assert [(t["track"], t["stream"], t["language"]) for t in tracks["audio"]] == [(0, 0, "en"), (1, 2, "fr")]
+    # 16:9 title: the wide subpicture stream
+    assert [(t["track"], t["stream"]) for t in tracks["subtitles"]] == [(0, 7)]
+
+
+def test_title_set_info_falls_back_to_bup(tmp_path):
+    write(tmp_path, "VTS_02_0.IFO", bytes(SECTOR))
+    write(tmp_path, "VTS_02_0.BUP", make_vts([MAIN]))
+    assert title_set_info(str(tmp_path), "02")["duration"] == 1800
+    assert title_set_info(str(tmp_path), "03") is None
+
+
+def test_engine_skips_decoy_and_short_sets(tmp_path):
+    from core.engine import BatchEngine
+    write(tmp_path, "VIDEO_TS.IFO", make_vmg([(1, 1), (3, 1)]))
+    short = make_pgc([(1, 1, 5, 0, 9, 0)], [1])
+    sets = {}
+    for vts, pgcs in ((1, [MAIN]), (2, [MAIN]), (3, [short])):
+        write(tmp_path, f"VTS_{vts:02d}_0.IFO", make_vts(pgcs))
+        sets[f"Title_{vts}"] = [write(tmp_path, f"VTS_{vts:02d}_1.VOB", b"")]
+
+    logs = []
+    engine = BatchEngine(str(tmp_path), str(tmp_path / "out"), "20", "medium", cache_dir=str(tmp_path))
+    engine.on_log = logs.append
+    assert list(engine.inspect_titles(sets)) == ["Title_1"]
+    assert any("Title_2" in line and "decoy" in line for line in logs)
@@ -0,0 +1,59 @@
+import core.probe
+from core.probe import FULL_PROBE_SIZE, QUICK_PROBE_SIZE, ProbeCache, probe_args
+from core.streams import plan_streams, maps_late_tracks
+from core.chunking import build_audio_cmd
+
+
+def meta(sub_late=True, video_late=False):
+    return {
+        "duration": 60.0,
+        "video": {"index": 0, "id": "0x1e0", "codec": "mpeg2video", "language": "und", "late": video_late},
+        "audio": [{"index": 1, "id": "0x80", "codec": "ac3", "language": "und", "late": False}],
+        "subtitles": [{"index": 2, "id": "0x20", "codec": "dvd_subtitle", "language": "und", "late": sub_late}],
+    }
+
+
+def size(args):
+    return args[args.index("-probesize") + 1]
+
+
+def test_early_tracks_get_the_quick_probe():
+    plan = plan_streams(meta())
+    assert not maps_late_tracks(plan)
+    assert size(probe_args(meta(), maps_late_tracks(plan))) == QUICK_PROBE_SIZE
+
+
+def test_late_subtitles_need_the_deep_probe():
+    plan = plan_streams(meta(), subtitle_langs=["all"])
+    assert maps_late_tracks(plan)
+    assert size(probe_args(meta(), maps_late_tracks(plan))) == FULL_PROBE_SIZE
+    assert size(build_audio_cmd("in.vob", "out.mkv", [], maps_late_tracks(plan))) == FULL_PROBE_SIZE
+    assert size(build_audio_cmd("in.vob", "out.mkv", [], False)) == QUICK_PROBE_SIZE
+
+
+def test_late_video_or_no_probe_is_deep():
+    assert size(probe_args(meta(video_late=True), False)) == FULL_PROBE_SIZE
+    assert size(probe_args(None, False)) == FULL_PROBE_SIZE
+    assert maps_late_tracks(None)
+
+
+def test_unmarked_streams_count_as_late():
+    old = meta(sub_late=False)
+    del old["audio"][0]["late"]
+    assert maps_late_tracks(plan_streams(old))
+
+
+def test_cache_reprobes_entries_without_depth_marks(tmp_path, monkeypatch):
+    vob = tmp_path / "VTS_01_1.VOB"
+    vob.write_bytes(b"x")
+    calls = []
+    monkeypatch.setattr(core.probe, "run_ffprobe", lambda vobs: calls.append(vobs) or meta())
+
+    cache = ProbeCache(":memory:")
+    old = meta()
+    del old["video"]["late"]
+    cache.update([str(vob)], old)
+    assert cache.get([str(vob)])["video"]["late"] is False
+    assert cache.get([str(vob)])["video"]["late"] is False
+    assert len(calls) == 1
+    cache.close()
@@ -0,0 +1,19 @@
+import pytest
+
+from core.sampling import sample_starts
+
+
+def test_windows_stay_inside_the_margins():
+    starts = sample_starts(1000.0, 4, 10, margin=0.05)
+    assert starts[0] == 50.0
+    assert starts[-1] + 10 == pytest.approx(950.0)
+    assert starts == sorted(starts) and len(starts) == 4
+
+
+def test_short_title_gets_one_window():
+    assert sample_starts(30.0, 4, 10) == [0.0]
+    assert sample_starts(0.0, 6, 2) == [0.0]
+
+
+def test_single_window():
+    assert sample_starts(1000.0, 1, 10) == [100.0]
@@ -0,0 +1,91 @@
+from core.streams import plan_streams, stream_args, parse_languages, language_code, describe_plan
+
+
+def stream(index, stream_id, codec, language="und"):
+    return {"index": index, "id": stream_id, "codec": codec, "language": language}
+
+
+META = {
+    "duration": 3600.0,
+    "video": stream(0, "0x1e0", "mpeg2video"),
+    "audio": [stream(1, "0x80", "ac3"), stream(2, "0xa1", "pcm_dvd"), stream(3, "0x82", "ac3")],
+    "subtitles": [stream(4, "0x20", "dvd_subtitle"), stream(5, "0x21", "dvd_subtitle"),
+                  stream(6, "0x22", "dvd_subtitle")],
+}
+
+# What title_set_tracks reads from the VTS IFO: audio tracks 0/1 play from
+# streams 0 and 1, track 2 (commentary) from stream 2; subtitles 0 and 1
+# from streams 0 and 2. Stream 0x21 is a letterbox copy nobody lists.
+INFO = {
+    "aspect": "4:3",
+    "audio_attributes": [{"language": "en", "extension": 1}, {"language": "fr", "extension": 1},
+                         {"language": "en", "extension": 3}],
+    "subpicture_attributes": [{"language": "en", "extension": 1}, {"language": "de", "extension": 9}],
+    "pgcs": [{"audio_control": [0, 1, 2, None, None, None, None, None],
+              "subpicture_control": [{"4:3": 0, "wide": 0, "letterbox": 1, "panscan": 0},
+                                     {"4:3": 2, "wide": 2, "letterbox": 2, "panscan": 2}] + [None] * 30}],
+}
+
+
+def test_parse_languages():
+    assert parse_languages("") == []
+    assert parse_languages("en, fra; deu") == ["eng", "fre", "ger"]
+    assert parse_languages("en, ALL") == ["all"]
+    assert language_code(None) == "und"
+
+
+def test_default_is_first_audio_no_subtitles():
+    plan = plan_streams(META, INFO)
+    assert [t["stream"]["id"] for t in plan["audio"]] == ["0x80"]
+    assert plan["audio"][0]["codec"] == "aac"
+    assert plan["subtitles"] == [] and plan["mp4"]
+
+
+def test_languages_and_titles_come_from_the_ifo():
+    plan = plan_streams(META, INFO, audio_langs=["eng"], subtitle_langs=["all"])
+    assert [(t["stream"]["id"], t["language"], t["title"]) for t in plan["audio"]] == \
+        [("0x80", "eng", None), ("0x82", "eng", "Commentary")]
+    # The unlisted letterbox twin is left out
+    assert [(t["stream"]["id"], t["language"], t["title"]) for t in plan["subtitles"]] == \
+        [("0x20", "eng", None), ("0x22", "ger", "Forced")]
+    assert not plan["mp4"]
+
+
+def test_unmatched_language_falls_back_to_first_track():
+    plan = plan_streams(META, INFO, audio_langs=["jpn"], subtitle_langs=["jpn"])
+    assert [t["stream"]["id"] for t in plan["audio"]] == ["0x80"]
+    assert plan["subtitles"] == []
+
+
+def test_copy_audio():
+    plan = plan_streams(META, INFO, copy_audio=True, audio_langs=["all"])
+    assert [t["codec"] for t in plan["audio"]] == ["copy", "flac", "copy"]
+    assert not plan["mp4"] # FLAC needs MKV
+    plan = plan_streams(META, INFO, copy_audio=False, audio_langs=["all"])
+    assert [t["codec"] for t in plan["audio"]] == ["aac", "aac", "aac"]
+    assert plan["mp4"]
+
+
+def test_probe_languages_win_over_the_ifo():
+    meta = dict(META, audio=[stream(1, "0x80", "ac3", "spa")])
+    assert plan_streams(meta, INFO)["audio"][0]["language"] == "spa"
+
+
+def test_no_ifo_keeps_every_stream():
+    plan = plan_streams(META, None, subtitle_langs=["all"])
+    assert len(plan["subtitles"]) == 3
+    assert all(t["language"] == "und" for t in plan["subtitles"])
+
+
+def test_stream_args():
+    plan = plan_streams(META, INFO, copy_audio=True, audio_langs=["fre"], subtitle_langs=["ger"])
+    args = stream_args(plan)
+    assert args[:4] == ["-map", "0:i:0xa1", "-map", "0:i:0x22"]
+    assert ["-c:a:0", "flac"] == args[4:6]
+    assert "language=fre" in args and "title=Forced" in args
+    assert describe_plan(plan) == "audio: pcm_dvd fre -> flac | subs: ger"
+
+
+def test_no_probe():
+    plan = plan_streams(None)
+    assert stream_args(plan) == ["-map", "0:a:0?", "-c:a", "aac", "-b:a", "192k"]
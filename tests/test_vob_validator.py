@@ -0,0 +1,117 @@
+from core.vob_validator import SECTOR, MAX_BAD_PACKS, pes_fits, pack_scr, validate_title
+
+
+def make_pack(scr=0, payload=None):
+    """One MPEG-2 pack: header with the given SCR, then a single PES packet
+    filling the rest of the sector (or raw payload bytes if given)."""
+    pack = bytearray(14)
+    pack[:4] = b"\x00\x00\x01\xba"
+    pack[4] = 0x44 | ((scr >> 30) & 0x07) << 3 | (scr >> 28) & 0x03
+    pack[5] = (scr >> 20) & 0xFF
+    pack[6] = ((scr >> 15) & 0x1F) << 3 | 0x04 | (scr >> 13) & 0x03
+    pack[7] = (scr >> 5) & 0xFF
+    pack[8] = (scr & 0x1F) << 3 | 0x04
+    pack[13] = 0xF8 # No stuffing
+    if payload is None:
+        length = SECTOR - 14 - 6
+        payload = bytes([0, 0, 1, 0xE0, length >> 8, length & 0xFF]) + bytes(length)
+    return bytes(pack + payload)
+
+
+def write_vobs(tmp_path, *parts):
+    paths = []
+    for n, data in enumerate(parts, 1):
+        path = tmp_path / f"VTS_01_{n}.VOB"
+        path.write_bytes(data)
+        paths.append(str(path))
+    return paths
+
+
+def packs(count, step=3000):
+    return b"".join(make_pack(i * step) for i in range(count))
+
+
+def test_scr_round_trip():
+    for scr in (0, 3000, 2 ** 32 + 12345):
+        assert pack_scr(make_pack(scr), 0) == scr
+
+
+def test_pes_must_fill_the_pack():
+    assert pes_fits(make_pack(), 0)
+    # A PES packet 10 bytes short of the end, then zeros
+    length = SECTOR - 14 - 6 - 10
+    short = bytes([0, 0, 1, 0xE0, length >> 8, length & 0xFF]) + bytes(length + 10)
+    assert not pes_fits(make_pack(payload=short), 0)
+    # ...or one that claims to run past it
+    length = SECTOR
+    assert not pes_fits(make_pack(payload=bytes([0, 0, 1, 0xE0, length >> 8, length & 0xFF]) + bytes(SECTOR - 20)), 0)
+
+
+def test_pes_header_cut_off_at_end_of_file():
+    # The last pack ends three bytes into a PES header: no IndexError
+    length = SECTOR - 14 - 6 - 3
+    payload = bytes([0, 0, 1, 0xE0, length >> 8, length & 0xFF]) + bytes(length) + b"\x00\x00\x01"
+    data = make_pack(payload=payload)
+    assert len(data) == SECTOR
+    assert not pes_fits(data, 0)
+
+
+def test_healthy_title(tmp_path):
+    result = validate_title(write_vobs(tmp_path, packs(50)))
+    assert result["ok"] and not result["errors"] and not result["warnings"]
+    assert result["packs"] == 50
+
+
+def test_empty_vob_is_damaged(tmp_path):
+    result = validate_title(write_vobs(tmp_path, b""))
+    assert not result["ok"]
+    assert result["packs"] == 0
+    assert any("empty" in e for e in result["errors"])
+
+
+def test_title_without_a_whole_pack_is_damaged(tmp_path):
+    result = validate_title(write_vobs(tmp_path, make_pack()[:1000]))
+    assert not result["ok"]
+    assert any("truncated" in e for e in result["errors"])
+
+
+def test_truncated_last_pack_is_reported_not_raised(tmp_path):
+    length = SECTOR - 14 - 6 - 3
+    bad = make_pack(payload=bytes([0, 0, 1, 0xE0, length >> 8, length & 0xFF]) + bytes(length) + b"\x00\x00\x01")
+    result = validate_title(write_vobs(tmp_path, packs(10) + bad))
+    assert result["ok"]
+    assert any("1 malformed" in w for w in result["warnings"])
+
+
+def test_many_bad_packs_fail_the_title(tmp_path):
+    result = validate_title(write_vobs(tmp_path, packs(10) + b"\xff" * SECTOR * (MAX_BAD_PACKS + 1)))
+    assert not result["ok"]
+
+
+def test_zero_filled_region(tmp_path):
+    result = validate_title(write_vobs(tmp_path, packs(5) + bytes(SECTOR * 3) + packs(5)))
+    assert result["ok"]
+    assert any("3 zero-filled" in w for w in result["warnings"])
+
+
+def test_scr_jump_outside_a_cell_start(tmp_path):
+    data = packs(5) + make_pack(10 * 90000) + make_pack(10 * 90000 + 3000)
+    assert any("SCR" in w for w in validate_title(write_vobs(tmp_path, data))["warnings"])
+    # The same jump where the IFO says a cell starts is fine
+    info = {"pgcs": [{"cells": [{"first_sector": 0, "last_sector": 4}, {"first_sector": 5, "last_sector": 6}]}]}
+    assert not validate_title(write_vobs(tmp_path, data), info)["warnings"]
+
+
+def test_missing_and_short_parts(tmp_path):
+    paths = write_vobs(tmp_path, packs(10), packs(5), packs(3))
+    result = validate_title([paths[0], paths[2]])
+    assert any("missing part(s) 2" in e for e in result["errors"])
+    result = validate_title(paths)
+    assert any("VTS_01_2.VOB" in e and "shorter" in e for e in result["errors"])
+
+
+def test_fewer_sectors_than_the_ifo_needs(tmp_path):
+    info = {"pgcs": [{"cells": [{"first_sector": 0, "last_sector": 99}]}]}
+    result = validate_title(write_vobs(tmp_path, packs(50)), info)
+    assert not result["ok"]
+    assert any("need 100" in e for e in result["errors"])
@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+# Headless entry point: `python vobreel.py convert|inspect|watch|worker|check ...`
+# (main.py is the PyQt6 app; this one never imports Qt)
+import sys
+from core.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())